@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Shared article record for the pipeline scripts.
+
+An Article wraps one article dict of a data file without copying it, so
+`Article.from_dict(d).to_dict() is d` and writing the payload back is exactly
+lossless (key order and unknown fields included). On top of the dict it caches
+the keys every stage used to re-derive on its own:
+
+    pmid        PubMed id from the URL ("" for non-PubMed links)
+    url         stripped URL string
+    url_key     normalized URL (lowercased scheme/host, no trailing slash or fragment)
+    url_valid   whether the URL is http(s) with a host
+    title_key   lowercased title with whitespace runs collapsed
+    text        lowercased search text over TEXT_FIELDS (scoring)
+    issn        ISSN token of `journal_issn` (8 chars, no hyphen)
+
+Each is computed on first use. Writes through the Article (`a[k] = v`,
+`a.pop(k)`) drop the cached values; code that edits the underlying dict
+directly should call refresh(). pipeline.py wraps a payload's articles once
+with wrap_articles() and hands the same list to every stage.
+"""
+
+from __future__ import annotations
+
+import re
+from urllib.parse import urlparse
+
+
+PMID_RE = re.compile(r"pubmed\.ncbi\.nlm\.nih\.gov/(\d+)")
+ISSN_STRIP_RE = re.compile(r"[^0-9xX]")
+# Plain http(s) URLs whose urlparse() split is known; anything else takes the urlparse path.
+SIMPLE_URL_RE = re.compile(r"^(https?)://([A-Za-z0-9.-]+(?::\d*)?)([^?#;\s]*)(?:\?([^#\s]*))?(?:#\S*)?$")
+TEXT_FIELDS = ("title", "summary", "source", "subcategory", "category")
+
+
+def extract_pmid(url: str) -> str:
+    if not url:
+        return ""
+    match = PMID_RE.search(url)
+    return match.group(1) if match else ""
+
+
+def normalize_issn(value: str) -> str:
+    """Normalize ISSN strings to 8-char uppercase token without hyphen."""
+    return ISSN_STRIP_RE.sub("", value or "").upper()
+
+
+def _normalized_parts(scheme: str, netloc: str, path: str, query: str) -> str:
+    path = path.rstrip("/") or "/"
+    query = f"?{query}" if query else ""
+    return f"{scheme.lower()}://{netloc.lower()}{path}{query}"
+
+
+def split_url(value: str) -> tuple[bool, str]:
+    """(is a valid http/https URL, normalized URL) from a single parse of `value`."""
+    value = value.strip()
+    match = SIMPLE_URL_RE.match(value)
+    if match:
+        scheme, netloc, path, query = match.groups()
+        return True, _normalized_parts(scheme, netloc, path, query or "")
+    parsed = urlparse(value)
+    valid = parsed.scheme in ("http", "https") and bool(parsed.netloc)
+    return valid, _normalized_parts(parsed.scheme, parsed.netloc, parsed.path, parsed.query)
+
+
+def normalize_title(value: str) -> str:
+    # Same result as collapsing \s+ runs after strip(); str.split() needs no regex pass.
+    return " ".join(value.lower().split())
+
+
+def search_text(article: dict) -> str:
+    return " ".join(str(article.get(k, "")) for k in TEXT_FIELDS).lower()
+
+
+class Article:
+    """One article dict plus lazily cached derived keys (see module docstring)."""
+
+    __slots__ = ("data", "_pmid", "_url_key", "_url_valid", "_title_key", "_text", "_issn")
+
+    def __init__(self, data: dict):
+        self.data = data
+        self._pmid = self._url_key = self._url_valid = self._title_key = self._text = self._issn = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Article":
+        return cls(data)
+
+    def to_dict(self) -> dict:
+        return self.data
+
+    def refresh(self) -> None:
+        """Forget cached derived keys (after editing the underlying dict directly)."""
+        self._pmid = self._url_key = self._url_valid = self._title_key = self._text = self._issn = None
+
+    # ── dict access ─────────────────────────────────────────
+    def get(self, key: str, default=None):
+        return self.data.get(key, default)
+
+    def __getitem__(self, key: str):
+        return self.data[key]
+
+    def __setitem__(self, key: str, value) -> None:
+        self.data[key] = value
+        self.refresh()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.data
+
+    def pop(self, key: str, *default):
+        self.refresh()
+        return self.data.pop(key, *default)
+
+    def __repr__(self) -> str:
+        return f"Article({self.data!r})"
+
+    # ── derived keys ────────────────────────────────────────
+    @property
+    def url(self) -> str:
+        return str(self.data.get("url", "")).strip()
+
+    @property
+    def title(self) -> str:
+        return str(self.data.get("title", "")).strip()
+
+    @property
+    def pmid(self) -> str:
+        if self._pmid is None:
+            self._pmid = extract_pmid(str(self.data.get("url", "")))
+        return self._pmid
+
+    def _split_url(self) -> None:
+        self._url_valid, self._url_key = split_url(self.url)
+
+    @property
+    def url_key(self) -> str:
+        if self._url_key is None:
+            self._split_url()
+        return self._url_key
+
+    @property
+    def url_valid(self) -> bool:
+        if self._url_valid is None:
+            self._split_url()
+        return self._url_valid
+
+    @property
+    def title_key(self) -> str:
+        if self._title_key is None:
+            self._title_key = normalize_title(self.title)
+        return self._title_key
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = search_text(self.data)
+        return self._text
+
+    @property
+    def issn(self) -> str:
+        if self._issn is None:
+            self._issn = normalize_issn(str(self.data.get("journal_issn", "")).strip())
+        return self._issn
+
+
+def wrap_articles(articles: object) -> list[Article | None]:
+    """Article per entry of a payload's `articles` list, None for non-object entries."""
+    if not isinstance(articles, list):
+        return []
+    return [Article(a) if isinstance(a, dict) else None for a in articles]
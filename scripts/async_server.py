@@ -0,0 +1,813 @@
+#!/usr/bin/env python3
+"""Single-threaded asyncio backend for the dashboard (`server.py --async`).
+
+Serves the same routes as DailyNewsHandler — /api/status, /api/dates,
+/api/domains, /api/events and /api/stream (SSE), /api/trends, /api/related,
+/api/export, /api/digest/rolling,
+/api/fetch, /api/fetch/cancel, /api/debug/profile, /metrics, /data/* and
+static web/ — on one event loop.
+Fetch subprocess output is read through asyncio pipes, each SSE subscriber
+gets a bounded queue, and the number of open connections is capped, so memory
+stays predictable with hundreds of idle or streaming clients.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import email.utils
+import html
+import mimetypes
+import os
+import re
+import signal
+import time
+from datetime import datetime
+from urllib.parse import parse_qs, unquote, urlparse
+
+from dashboard_data import (
+    DATA_DIR,
+    FETCH_SCRIPT,
+    LOGS_DIR,
+    PROJECT_DIR,
+    WEB_DIR,
+    academic_domain_ids,
+    gzip_sidecar,
+    list_data_dates,
+    load_domains,
+)
+from export import (
+    CONTENT_TYPE as EXPORT_CONTENT_TYPE,
+    ExportQuery,
+    catalog_etag,
+    etag_matches,
+    iter_ndjson,
+    select_files,
+)
+from fetch_jobs import (
+    CANCEL_GRACE_SECONDS,
+    group_alive,
+    known_mode,
+    plan_fetch,
+    remaining_domains,
+    signal_group,
+    task_key_for,
+)
+from json_codec import JSONDecodeError, dumpb, dumps, loads
+from log_pipeline import filter_command
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, RequestMetrics
+from payload_cache import PayloadCache, warm_days_from_env
+from profiling import debug_profile
+from related import TOP_K, related_for
+from rolling_digest import DEFAULT_TOP as ROLLING_TOP, build_rolling_digest
+from rollups import query_trends
+from stream import DATA_POLL_SECONDS, DataWatcher, format_event
+
+
+MAX_CONNECTIONS = int(os.environ.get("ASYNC_MAX_CONNECTIONS", "512"))
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+SUBSCRIBER_QUEUE_SIZE = 1000
+KEEP_ALIVE_TIMEOUT = 15
+BUSY_READ_TIMEOUT = 1
+SSE_PING_SECONDS = 5
+FILE_CHUNK = 64 * 1024
+MODE_RE = re.compile(r"^[a-zA-Z0-9_-]+$")
+# [status code, declared body size] of the response being written on this connection.
+_response: contextvars.ContextVar[list | None] = contextvars.ContextVar("response", default=None)
+# True while answering a HEAD request: responses carry their headers only.
+_head_only: contextvars.ContextVar[bool] = contextvars.ContextVar("head_only", default=False)
+REASONS = {
+    200: "OK",
+    204: "No Content",
+    304: "Not Modified",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+def now_hms() -> str:
+    return datetime.now().strftime('%H:%M:%S')
+
+
+class Request:
+    __slots__ = ("method", "target", "version", "headers", "body")
+
+    def __init__(self, method: str, target: str, version: str, headers: dict[str, str], body: bytes):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self) -> bool:
+        conn = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return conn == "keep-alive"
+        return conn != "close"
+
+
+class TaskState:
+    """Log history, subscribers and process handle for one fetch task."""
+
+    def __init__(self):
+        self.logs: list[str] = []
+        self.subscribers: set[asyncio.Queue] = set()
+        self.proc: asyncio.subprocess.Process | None = None
+        self.domains: tuple[str, ...] = ()
+        self.cancelled = False
+
+    @property
+    def running(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    @property
+    def status(self) -> str:
+        if self.running:
+            return "running"
+        if self.cancelled:
+            return "cancelled"
+        return "done" if self.proc is not None and self.proc.returncode == 0 else "error"
+
+    def publish(self, item) -> None:
+        for q in list(self.subscribers):
+            try:
+                q.put_nowait(item)
+            except asyncio.QueueFull:
+                # Slow consumer: drop it rather than buffer without bound.
+                self.subscribers.discard(q)
+
+
+class AsyncDashboard:
+    def __init__(self):
+        self.tasks: dict[str, TaskState] = {}
+        self.slots = asyncio.Semaphore(MAX_CONNECTIONS)
+        self.metrics = RequestMetrics()
+        self.cache = PayloadCache.from_env()
+        self.stream_subscribers: set[asyncio.Queue] = set()
+        self.metrics.add_gauge(
+            "fetch_running",
+            "1 while the fetch subprocess of a task is running.",
+            lambda: [
+                ({"task": k}, 1 if t.proc is not None and t.proc.returncode is None else 0)
+                for k, t in sorted(self.tasks.items())
+            ],
+        )
+        self.metrics.add_gauge(
+            "sse_subscribers",
+            "Connected /api/events clients per task.",
+            lambda: [({"task": k}, len(t.subscribers)) for k, t in sorted(self.tasks.items())],
+        )
+        self.metrics.add_gauge(
+            "log_queue_depth",
+            "Log batches queued for SSE clients, summed per task.",
+            lambda: [({"task": k}, sum(q.qsize() for q in t.subscribers)) for k, t in sorted(self.tasks.items())],
+        )
+        self.metrics.add_gauge(
+            "data_cache_bytes",
+            "Bytes charged to the data/ payload cache, and its budget.",
+            lambda: [({"kind": "used"}, self.cache.stats()["bytes"]), ({"kind": "budget"}, self.cache.budget)],
+        )
+        self.metrics.add_gauge(
+            "stream_subscribers", "Connected /api/stream clients.", lambda: [({}, len(self.stream_subscribers))]
+        )
+        self.metrics.add_gauge(
+            "data_cache_entries", "Files held by the data/ payload cache.", lambda: [({}, len(self.cache))]
+        )
+
+    # ── connection handling ──────────────────────────────────
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self.slots.locked():
+            # Take the request head first: closing on unread data resets the
+            # connection, and the client may never see the 503.
+            try:
+                await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), BUSY_READ_TIMEOUT)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                pass
+            await self._send_simple(writer, 503, b"server busy\n", keep_alive=False)
+            writer.close()
+            return
+        async with self.slots:
+            try:
+                while True:
+                    request = await self._read_request(reader, writer)
+                    if request is None:
+                        break
+                    started = time.perf_counter()
+                    response = [None, 0]
+                    _response.set(response)
+                    _head_only.set(request.method == "HEAD")
+                    keep_alive = await self.dispatch(request, writer)
+                    if response[0] is not None:
+                        self.metrics.observe(
+                            urlparse(request.target).path,
+                            request.method,
+                            response[0],
+                            time.perf_counter() - started,
+                            response[1],
+                        )
+                    if not keep_alive:
+                        break
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except ConnectionError:
+                    pass
+
+    async def _read_request(self, reader, writer) -> Request | None:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            return None
+        except asyncio.LimitOverrunError:
+            await self._send_simple(writer, 400, b"headers too large\n", keep_alive=False)
+            return None
+        if len(head) > MAX_HEADER_BYTES:
+            await self._send_simple(writer, 400, b"headers too large\n", keep_alive=False)
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            await self._send_simple(writer, 400, b"bad request line\n", keep_alive=False)
+            return None
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            await self._send_simple(writer, 400, b"bad content-length\n", keep_alive=False)
+            return None
+        if length > MAX_BODY_BYTES:
+            await self._send_simple(writer, 413, b"body too large\n", keep_alive=False)
+            return None
+        body = await reader.readexactly(length) if length else b""
+        print(f"[{now_hms()}] {lines[0]}")
+        return Request(method.upper(), target, version, headers, body)
+
+    async def dispatch(self, request: Request, writer) -> bool:
+        parsed = urlparse(request.target)
+        path = parsed.path
+        if request.method == "OPTIONS":
+            await self._send(
+                writer,
+                204,
+                b"",
+                headers={
+                    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+                    "Access-Control-Allow-Headers": "Content-Type",
+                },
+                keep_alive=request.keep_alive,
+            )
+            return request.keep_alive
+        if request.method == "POST":
+            if path == "/api/fetch":
+                return await self.handle_fetch(request, writer)
+            if path == "/api/fetch/cancel":
+                return await self.handle_fetch_cancel(request, writer)
+            await self._send_simple(writer, 404, b"not found\n", keep_alive=request.keep_alive)
+            return request.keep_alive
+        if request.method not in ("GET", "HEAD"):
+            await self._send_simple(writer, 405, b"method not allowed\n", keep_alive=request.keep_alive)
+            return request.keep_alive
+
+        # Anything that reads files runs in the executor; a slow disk must not stall the loop.
+        loop = asyncio.get_running_loop()
+        if path == "/api/status":
+            return await self._json(writer, self.status(), keep_alive=request.keep_alive)
+        if path == "/api/dates":
+            dates = await loop.run_in_executor(None, list_data_dates)
+            return await self._json(writer, {"dates": dates}, keep_alive=request.keep_alive)
+        if path == "/api/domains":
+            domains = await loop.run_in_executor(None, load_domains)
+            return await self._json(writer, {"domains": domains}, keep_alive=request.keep_alive)
+        if path == "/api/events":
+            await self.handle_events(parsed, writer)
+            return False
+        if path == "/api/stream":
+            await self.handle_stream(writer)
+            return False
+        if path == "/api/trends":
+            query = parse_qs(parsed.query)
+            try:
+                result = await loop.run_in_executor(
+                    None,
+                    query_trends,
+                    query.get("domain", [""])[0],
+                    query.get("from", [""])[0],
+                    query.get("to", [""])[0],
+                    query.get("bucket", ["week"])[0],
+                    query.get("columns", [""])[0],
+                )
+            except ValueError as exc:
+                return await self._json(writer, {"error": str(exc)}, 400, keep_alive=request.keep_alive)
+            return await self._json(writer, result, keep_alive=request.keep_alive)
+        if path == "/api/related":
+            query = parse_qs(parsed.query)
+            url = query.get("url", [""])[0]
+            try:
+                k = int(query.get("k", [TOP_K])[0])
+            except ValueError:
+                return await self._json(writer, {"error": "k must be an integer"}, 400, keep_alive=request.keep_alive)
+            related = await loop.run_in_executor(None, related_for, url, k) if url else None
+            if related is None:
+                return await self._json(
+                    writer, {"error": "url not indexed", "url": url}, 404, keep_alive=request.keep_alive
+                )
+            return await self._json(writer, {"url": url, "related": related}, keep_alive=request.keep_alive)
+        if path == "/api/export":
+            return await self.handle_export(request, parsed, writer)
+        if path == "/api/digest/rolling":
+            query = parse_qs(parsed.query)
+            try:
+                top = int(query.get("top", [ROLLING_TOP])[0])
+            except ValueError:
+                return await self._json(writer, {"error": "top must be an integer"}, 400, keep_alive=request.keep_alive)
+            try:
+                # Loads (or parses) up to a month of files.
+                result = await loop.run_in_executor(
+                    None,
+                    lambda: build_rolling_digest(
+                        query.get("window", ["week"])[0],
+                        query.get("to", [""])[0],
+                        ",".join(query.get("domain", [])),
+                        top,
+                        load=self.cache.payload,
+                    ),
+                )
+            except ValueError as exc:
+                return await self._json(writer, {"error": str(exc)}, 400, keep_alive=request.keep_alive)
+            return await self._json(writer, result, keep_alive=request.keep_alive)
+        if path == "/api/debug/profile":
+            # Sample from a worker thread so the event loop itself shows up in the stacks.
+            peer = writer.get_extra_info("peername") or ("", 0)
+            code, data = await loop.run_in_executor(None, debug_profile, parse_qs(parsed.query), peer[0])
+            return await self._json(writer, data, code, keep_alive=request.keep_alive)
+        if path == "/metrics":
+            await self._send(
+                writer,
+                200,
+                self.metrics.render().encode("utf-8"),
+                METRICS_CONTENT_TYPE,
+                keep_alive=request.keep_alive,
+            )
+            return request.keep_alive
+        return await self.handle_file(request, path, writer)
+
+    # ── API handlers ─────────────────────────────────────────
+    def status(self) -> dict:
+        return {key: task.status for key, task in self.tasks.items() if task.proc is not None}
+
+    @staticmethod
+    def _request_mode(request: Request) -> str | None:
+        try:
+            params = loads(request.body) if request.body else {}
+        except JSONDecodeError:
+            params = {}
+        mode = params.get("mode", "ai") if isinstance(params, dict) else "ai"
+        if not isinstance(mode, str) or not MODE_RE.match(mode):
+            return None
+        return mode
+
+    async def handle_fetch(self, request: Request, writer) -> bool:
+        mode = self._request_mode(request)
+        if mode is None:
+            return await self._json(writer, {"error": "invalid mode"}, 400, keep_alive=request.keep_alive)
+
+        academic_ids = await asyncio.get_running_loop().run_in_executor(None, academic_domain_ids)
+        if not known_mode(mode, academic_ids):
+            return await self._json(writer, {"error": f"unknown mode: {mode}"}, 400, keep_alive=request.keep_alive)
+
+        task_key = task_key_for(mode)
+        running = {key: t.domains for key, t in self.tasks.items() if t.running}
+        # Domains already being fetched by another job are attached to, not run twice.
+        plan = plan_fetch(mode, academic_ids, running)
+        if plan.covered:
+            return await self._json(writer, plan.response("already_running"), keep_alive=request.keep_alive)
+
+        task = self.tasks.setdefault(task_key, TaskState())
+        task.logs = [f"[{now_hms()}] [SERVER] Fetch task accepted: mode={mode}"]
+        for other, domains in plan.attached.items():
+            task.logs.append(f"[{now_hms()}] [SERVER] Skipping {', '.join(domains)}: already being fetched by {other}")
+        task.cancelled = False
+        read_fd, write_fd = os.pipe()
+        try:
+            # Own session, so /api/fetch/cancel can signal the whole process group.
+            task.proc = await asyncio.create_subprocess_exec(
+                FETCH_SCRIPT,
+                *plan.argv,
+                stdout=write_fd,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=PROJECT_DIR,
+                start_new_session=True,
+            )
+            # Filtering and the raw log run in their own process (see log_pipeline.py).
+            log_filter = await asyncio.create_subprocess_exec(
+                *filter_command(os.path.join(LOGS_DIR, f"server-{task_key}.log")),
+                stdin=read_fd,
+                stdout=asyncio.subprocess.PIPE,
+            )
+        except Exception as exc:
+            task.logs.append(f"[{now_hms()}] [ERROR] Failed to start fetch process: {exc}")
+            return await self._json(
+                writer, {"status": "error", "mode": mode, "error": str(exc)}, 500, keep_alive=request.keep_alive
+            )
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+        task.domains = plan.todo
+        asyncio.create_task(self._pump_logs(task_key, task, log_filter))
+        self.broadcast("status", {"task": task_key, "status": "running"})
+        return await self._json(writer, plan.response("started"), keep_alive=request.keep_alive)
+
+    async def handle_fetch_cancel(self, request: Request, writer) -> bool:
+        mode = self._request_mode(request)
+        if mode is None:
+            return await self._json(writer, {"error": "invalid mode"}, 400, keep_alive=request.keep_alive)
+        task = self.tasks.get(task_key_for(mode))
+        if task is None or not task.running:
+            return await self._json(writer, {"status": "not_running", "mode": mode}, 404, keep_alive=request.keep_alive)
+        task.cancelled = True
+        line = f"[{now_hms()}] [SERVER] Fetch task cancelled: mode={mode}"
+        task.logs.append(line)
+        task.publish([line])
+        self.broadcast("log", {"task": task_key_for(mode), "lines": [line]})
+        if signal_group(task.proc.pid, signal.SIGTERM):
+            asyncio.create_task(self._escalate_kill(task.proc))
+        return await self._json(
+            writer, {"status": "cancelled", "mode": mode, "domains": list(task.domains)}, keep_alive=request.keep_alive
+        )
+
+    @staticmethod
+    async def _escalate_kill(proc: asyncio.subprocess.Process) -> None:
+        deadline = time.monotonic() + CANCEL_GRACE_SECONDS
+        try:
+            await asyncio.wait_for(proc.wait(), CANCEL_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        while group_alive(proc.pid) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        signal_group(proc.pid, signal.SIGKILL)
+
+    async def _pump_logs(self, task_key: str, task: TaskState, log_filter: asyncio.subprocess.Process) -> None:
+        pending = b""
+        try:
+            while True:
+                # read() returns whatever is buffered, so bursts fan out as one batch.
+                chunk = await log_filter.stdout.read(FILE_CHUNK)
+                if not chunk:
+                    break
+                *complete, pending = (pending + chunk).split(b"\n")
+                if complete:
+                    self._ingest(task_key, task, [line.decode("utf-8", errors="replace") for line in complete])
+            if pending:
+                self._ingest(task_key, task, [pending.decode("utf-8", errors="replace")])
+        finally:
+            await log_filter.wait()
+            await task.proc.wait()
+            task.publish(None)
+            self.broadcast("status", {"task": task_key, "status": task.status})
+
+    def _ingest(self, task_key: str, task: TaskState, lines: list[str]) -> None:
+        """Publish lines the filter process let through."""
+        if lines:
+            task.domains = remaining_domains(task.domains, lines)
+            task.logs.extend(lines)
+            task.publish(lines)
+            self.broadcast("log", {"task": task_key, "lines": lines})
+
+    # ── /api/stream ──────────────────────────────────────────
+    def broadcast(self, event: str, data: object) -> None:
+        if not self.stream_subscribers:
+            return
+        payload = format_event(event, data)
+        for q in list(self.stream_subscribers):
+            try:
+                q.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Slow consumer: drop it rather than buffer without bound.
+                self.stream_subscribers.discard(q)
+
+    async def watch_data(self, watcher: DataWatcher, interval: float = DATA_POLL_SECONDS) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            for change in await loop.run_in_executor(None, watcher.scan):
+                self.broadcast("data", change)
+
+    async def handle_stream(self, writer) -> None:
+        writer.write(
+            self._head(
+                200,
+                {
+                    "Content-Type": "text/event-stream",
+                    "Cache-Control": "no-cache",
+                    "Connection": "keep-alive",
+                },
+            )
+        )
+        if _head_only.get():
+            await writer.drain()
+            return
+        writer.write(b": connected\n\n" + format_event("hello", {"tasks": self.status()}))
+        await writer.drain()
+
+        q: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.stream_subscribers.add(q)
+        try:
+            while True:
+                try:
+                    payload = await asyncio.wait_for(q.get(), SSE_PING_SECONDS)
+                except asyncio.TimeoutError:
+                    if q not in self.stream_subscribers:
+                        break
+                    payload = b": keep-alive\n\n"
+                writer.write(payload)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.stream_subscribers.discard(q)
+
+    async def handle_events(self, parsed, writer) -> None:
+        query = parse_qs(parsed.query)
+        mode = query.get("mode", ["ai"])[0]
+        task = self.tasks.get(task_key_for(mode))
+        if task is None:
+            academic_ids = await asyncio.get_running_loop().run_in_executor(None, academic_domain_ids)
+            if not known_mode(mode, academic_ids):
+                await self._json(writer, {"error": f"unknown mode: {mode}"}, 400, keep_alive=False)
+                return
+            task = self.tasks.setdefault(task_key_for(mode), TaskState())
+        writer.write(
+            self._head(
+                200,
+                {
+                    "Content-Type": "text/event-stream",
+                    "Cache-Control": "no-cache",
+                    "Connection": "keep-alive",
+                },
+            )
+        )
+        if _head_only.get():
+            await writer.drain()
+            return
+        writer.write(b": connected\n\n")
+        writer.write(self._log_events(task.logs))
+        await writer.drain()
+
+        q: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        task.subscribers.add(q)
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(q.get(), SSE_PING_SECONDS)
+                except asyncio.TimeoutError:
+                    if q not in task.subscribers:
+                        break
+                    writer.write(b": keep-alive\n\n")
+                    await writer.drain()
+                    if task.proc is not None and task.proc.returncode is not None and q.empty():
+                        break
+                    continue
+                if item is None:
+                    writer.write(f"data: {dumps({'status': 'done'})}\n\n".encode("utf-8"))
+                    await writer.drain()
+                    break
+                writer.write(self._log_events(item))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            task.subscribers.discard(q)
+
+    async def handle_export(self, request: Request, parsed, writer) -> bool:
+        try:
+            query = ExportQuery.from_query(parse_qs(parsed.query))
+        except ValueError as exc:
+            return await self._json(writer, {"error": str(exc)}, 400, keep_alive=request.keep_alive)
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, select_files, query)
+        etag = await loop.run_in_executor(None, catalog_etag, files, query)
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            await self._send(writer, 304, b"", headers={"ETag": etag}, keep_alive=request.keep_alive)
+            return request.keep_alive
+
+        # HTTP/1.0 clients cannot take chunked bodies: stream raw and close.
+        chunked = request.version != "HTTP/1.0"
+        keep_alive = request.keep_alive and chunked
+        headers = {"Content-Type": EXPORT_CONTENT_TYPE, "ETag": etag, "Cache-Control": "no-cache"}
+        if chunked:
+            headers["Transfer-Encoding"] = "chunked"
+        writer.write(self._head(200, headers, keep_alive=keep_alive))
+        if _head_only.get():
+            await writer.drain()
+            return keep_alive
+        response = _response.get()
+        chunks = iter_ndjson(files, query.fields, self.cache.peek)
+        while True:
+            # Files are read and encoded off the loop, one chunk at a time.
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                break
+            if response is not None:
+                response[1] += len(chunk)
+            writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked else chunk)
+            await writer.drain()
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return keep_alive
+
+    @staticmethod
+    def _log_events(lines) -> bytes:
+        return "".join(f"data: {dumps({'log': line})}\n\n" for line in lines).encode("utf-8")
+
+    # ── static and data files ────────────────────────────────
+    def translate_path(self, path: str) -> str | None:
+        clean = unquote(path)
+        if clean.startswith("/data/"):
+            root, rel = DATA_DIR, clean[len("/data/"):]
+        else:
+            root, rel = WEB_DIR, clean.lstrip("/")
+        full = os.path.normpath(os.path.join(root, rel))
+        if full != root and not full.startswith(root + os.sep):
+            return None
+        return full
+
+    def locate(self, path: str) -> tuple[str | None, os.stat_result | None]:
+        """(full path, stat) of the file `path` serves; (directory, None) for a listing, (None, None) if missing."""
+        full = self.translate_path(path)
+        if full and os.path.isdir(full):
+            index = os.path.join(full, "index.html")
+            if not os.path.isfile(index):
+                return full, None
+            full = index
+        if not full or not os.path.isfile(full):
+            return None, None
+        return full, os.stat(full)
+
+    async def handle_file(self, request: Request, path: str, writer) -> bool:
+        # stat, open and read block on slow disks; they run off the loop like export reads.
+        loop = asyncio.get_running_loop()
+        full, st = await loop.run_in_executor(None, self.locate, path)
+        if full is None:
+            await self._send_simple(writer, 404, b"File not found\n", keep_alive=request.keep_alive)
+            return request.keep_alive
+        if st is None:
+            return await self._send_listing(request, path, full, writer)
+
+        last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+        since = request.headers.get("if-modified-since")
+        if since:
+            try:
+                if int(st.st_mtime) <= email.utils.parsedate_to_datetime(since).timestamp():
+                    await self._send(writer, 304, b"", keep_alive=request.keep_alive)
+                    return request.keep_alive
+            except (TypeError, ValueError):
+                pass
+
+        ctype = mimetypes.guess_type(full)[0] or "application/octet-stream"
+        headers = {"Content-Type": ctype, "Content-Length": str(st.st_size), "Last-Modified": last_modified}
+        body_path = full
+        if full.endswith(".json") and os.path.dirname(full) == DATA_DIR:
+            # Revalidate data files on every load (cheap 304s); /api/stream says when they change.
+            headers["Cache-Control"] = "no-cache"
+            headers["Vary"] = "Accept-Encoding"
+            sidecar = await loop.run_in_executor(
+                None, gzip_sidecar, full, request.headers.get("accept-encoding", "")
+            )
+            if sidecar:
+                headers["Content-Encoding"] = "gzip"
+                body_path = sidecar
+            if self.cache.enabled:
+                try:
+                    body, _ = await loop.run_in_executor(None, self.cache.read, body_path)
+                except OSError:
+                    await self._send_simple(writer, 404, b"File not found\n", keep_alive=request.keep_alive)
+                    return request.keep_alive
+                headers["Content-Length"] = str(len(body))
+                head = self._head(200, headers, keep_alive=request.keep_alive)
+                writer.write(head if request.method == "HEAD" else head + body)
+                await writer.drain()
+                return request.keep_alive
+        try:
+            f = await loop.run_in_executor(None, open, body_path, "rb")
+        except OSError:
+            await self._send_simple(writer, 404, b"File not found\n", keep_alive=request.keep_alive)
+            return request.keep_alive
+        with f:
+            # Size the response from the open descriptor so an atomic replace
+            # between stat() and open() cannot desync Content-Length.
+            headers["Content-Length"] = str(os.fstat(f.fileno()).st_size)
+            writer.write(self._head(200, headers, keep_alive=request.keep_alive))
+            if request.method == "HEAD":
+                await writer.drain()
+                return request.keep_alive
+            try:
+                await writer.drain()
+                await loop.sendfile(writer.transport, f)
+            except (NotImplementedError, RuntimeError):
+                while chunk := await loop.run_in_executor(None, f.read, FILE_CHUNK):
+                    writer.write(chunk)
+                    await writer.drain()
+        return request.keep_alive
+
+    @staticmethod
+    def _listing_items(full: str) -> str:
+        return "".join(
+            f'<li><a href="{html.escape(name + ("/" if os.path.isdir(os.path.join(full, name)) else ""))}">'
+            f"{html.escape(name)}</a></li>"
+            for name in sorted(os.listdir(full))
+        )
+
+    async def _send_listing(self, request: Request, path: str, full: str, writer) -> bool:
+        items = await asyncio.get_running_loop().run_in_executor(None, self._listing_items, full)
+        title = html.escape(path)
+        body = (
+            f"<!DOCTYPE HTML><html><head><meta charset=\"utf-8\"><title>Directory listing for {title}</title>"
+            f"</head><body><h1>Directory listing for {title}</h1><hr><ul>{items}</ul><hr></body></html>\n"
+        ).encode("utf-8")
+        await self._send(writer, 200, body, "text/html; charset=utf-8", keep_alive=request.keep_alive)
+        return request.keep_alive
+
+    # ── response helpers ─────────────────────────────────────
+    @staticmethod
+    def _head(code: int, headers: dict[str, str], keep_alive: bool = True) -> bytes:
+        response = _response.get()
+        if response is not None:
+            response[0] = code
+            response[1] = int(headers.get("Content-Length", 0) or 0)
+        lines = [f"HTTP/1.1 {code} {REASONS.get(code, '')}"]
+        lines.append(f"Date: {email.utils.formatdate(usegmt=True)}")
+        lines.append("Access-Control-Allow-Origin: *")
+        for key, value in headers.items():
+            lines.append(f"{key}: {value}")
+        if "Connection" not in headers:
+            lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send(
+        self,
+        writer,
+        code: int,
+        body: bytes,
+        content_type: str = "",
+        headers: dict[str, str] | None = None,
+        keep_alive: bool = True,
+    ) -> None:
+        all_headers = dict(headers or {})
+        if content_type:
+            all_headers["Content-Type"] = content_type
+        if code not in (204, 304):
+            all_headers["Content-Length"] = str(len(body))
+        head = self._head(code, all_headers, keep_alive)
+        writer.write(head if _head_only.get() else head + body)
+        await writer.drain()
+
+    async def _send_simple(self, writer, code: int, body: bytes, keep_alive: bool = True) -> None:
+        await self._send(writer, code, body, "text/plain; charset=utf-8", keep_alive=keep_alive)
+
+    async def _json(self, writer, data, code: int = 200, keep_alive: bool = True) -> bool:
+        body = dumpb(data)
+        await self._send(writer, code, body, "application/json; charset=utf-8", keep_alive=keep_alive)
+        return keep_alive
+
+
+async def run(port: int) -> None:
+    dashboard = AsyncDashboard()
+    loop = asyncio.get_running_loop()
+    warmed = await loop.run_in_executor(None, dashboard.cache.warm, warm_days_from_env())
+    watcher = await loop.run_in_executor(None, DataWatcher, DATA_DIR)
+    server = await asyncio.start_server(dashboard.handle_client, host="", port=port, limit=MAX_HEADER_BYTES)
+    print(f"Server running at http://localhost:{port} (asyncio, max {MAX_CONNECTIONS} connections)")
+    print(f"  Web UI:   http://localhost:{port}/")
+    print(f"  Domains:  http://localhost:{port}/api/domains")
+    print(f"  Data:     http://localhost:{port}/data/")
+    print(f"  Metrics:  http://localhost:{port}/metrics")
+    if dashboard.cache.enabled:
+        print(f"  Cache:    {warmed} data file(s) preloaded, budget {dashboard.cache.budget // (1024 * 1024)} MiB")
+    async with server:
+        await asyncio.gather(server.serve_forever(), dashboard.watch_data(watcher))
+
+
+def serve(port: int = 8080) -> None:
+    try:
+        asyncio.run(run(port))
+    except KeyboardInterrupt:
+        print("\nShutting down.")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Benchmark JSON load/dump per backend and layout on the real data/ and data/letpub/ files.
+
+`savings` compares the previous setup (stdlib json, pretty files) with orjson
+reading and writing the compact layout.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from json_codec import BACKEND, BACKENDS, dumps
+from profiling import run_main
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_DIR / "data"
+
+
+def collect_files(data_dir: Path) -> dict[str, list[bytes]]:
+    """File contents grouped as `data` (daily payloads) and `letpub` (journal catalogs)."""
+    groups = {
+        "data": [p.read_bytes() for p in sorted(data_dir.glob("*.json"))],
+        "letpub": [p.read_bytes() for p in sorted((data_dir / "letpub").glob("*.json"))],
+    }
+    return {name: blobs for name, blobs in groups.items() if blobs}
+
+
+def timed(fn, items: list, repeat: int) -> float:
+    """Best-of-`repeat` wall time in ms of fn() over every item."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 2)
+
+
+def bench_group(blobs: list[bytes], repeat: int) -> dict:
+    objects = [BACKENDS["json"][0](blob) for blob in blobs]
+    report = {"files": len(blobs)}
+    for name, (loads, dumpb) in BACKENDS.items():
+        pretty = [dumpb(obj, True) for obj in objects]
+        compact = [dumpb(obj, False) for obj in objects]
+        report[name] = {
+            "load_pretty_ms": timed(loads, pretty, repeat),
+            "load_compact_ms": timed(loads, compact, repeat),
+            "dump_pretty_ms": timed(lambda obj: dumpb(obj, True), objects, repeat),
+            "dump_compact_ms": timed(lambda obj: dumpb(obj, False), objects, repeat),
+            "pretty_bytes": sum(map(len, pretty)),
+            "compact_bytes": sum(map(len, compact)),
+        }
+    base = report["json"]
+    fastest = report.get("orjson", base)
+    report["savings"] = {
+        "load_speedup": round(base["load_pretty_ms"] / max(fastest["load_compact_ms"], 0.01), 1),
+        "dump_speedup": round(base["dump_pretty_ms"] / max(fastest["dump_compact_ms"], 0.01), 1),
+        "compact_bytes_saved_pct": round(100 * (1 - base["compact_bytes"] / base["pretty_bytes"]), 1),
+    }
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark JSON backends and on-disk layouts")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Directory with daily files and letpub/")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    groups = collect_files(Path(args.data_dir))
+    if not groups:
+        print(f"[ERROR] no JSON files under {args.data_dir}", file=sys.stderr)
+        return 1
+    if "orjson" not in BACKENDS:
+        print("[WARN] orjson is not installed; reporting the stdlib backend only.", file=sys.stderr)
+
+    report = {"active_backend": BACKEND, "repeat": args.repeat}
+    for name, blobs in groups.items():
+        report[name] = bench_group(blobs, args.repeat)
+    print(dumps(report, pretty=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Benchmark LetPub search-page parsing: streaming HTMLParser vs BeautifulSoup tree."""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from article import normalize_issn
+from enrich_journal import parse_letpub_search_html
+from http_client import DEFAULT_CACHE_DIR, ResponseCache
+from json_codec import dumps
+from profiling import run_main
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+
+def parse_with_bs4(html: str, target_issn: str) -> dict | None:
+    """Previous full-tree implementation, kept here as the comparison baseline."""
+    issn_token = normalize_issn(target_issn)
+    soup = BeautifulSoup(html, "html.parser")
+    issn_th = soup.find("th", string=lambda s: bool(s and "ISSN" in s))
+    if not issn_th:
+        return None
+    table = issn_th.find_parent("table")
+    if table is None:
+        return None
+    for tr in table.find_all("tr"):
+        tds = tr.find_all("td")
+        if len(tds) != 12:
+            continue
+        row_issn = normalize_issn(str(tds[0].get_text(" ", strip=True)))
+        if row_issn and row_issn != issn_token:
+            continue
+        journal_link = tds[1].find("a")
+        m_if = re.search(r"IF:\s*([0-9]+(?:\.[0-9]+)?)", str(tds[3].get_text(" ", strip=True)), re.I)
+        return {
+            "journal_name": str(journal_link.get_text(" ", strip=True)) if journal_link else "",
+            "issn": row_issn,
+            "impact_factor": float(m_if.group(1)) if m_if else None,
+        }
+    return None
+
+
+def load_captured_pages(cache_dir: Path) -> list[tuple[str, str]]:
+    """Collect (issn, html) pairs for LetPub search pages stored in the response cache."""
+    cache = ResponseCache(cache_dir)
+    pages = []
+    for key, entry in list(cache._entries.items()):
+        url = str(entry.get("url", ""))
+        if "letpub.com.cn" not in url:
+            continue
+        issn = parse_qs(urlparse(url).query).get("searchissn", [""])[0]
+        cached = cache.get(key)
+        if issn and cached:
+            pages.append((issn, cached[1].decode("utf-8", errors="ignore")))
+    return pages
+
+
+def synthetic_page(rows: int = 10) -> tuple[str, str]:
+    """Build a LetPub-shaped results page; the target ISSN sits in the last row."""
+    body = []
+    for i in range(rows):
+        issn = f"{1000 + i:04d}-{2000 + i:04d}"
+        cells = [
+            f"<td>{issn}</td>",
+            f'<td><a href="index.php?journalid={i}&page=journalapp&view=detail">Journal {i}</a>'
+            f"<br><font>J {i}</font></td>",
+            "<td>医学</td>",
+            f"<td>IF: {i}.5<br>h-index: {i}</td>",
+        ] + [f"<td>col {c}</td>" for c in range(8)]
+        body.append("<tr>" + "".join(cells) + "</tr>")
+    nav = "".join(f'<div class="nav"><a href="#n{i}">link {i}</a></div>' for i in range(400))
+    html = (
+        f"<html><head><title>LetPub</title></head><body>{nav}"
+        "<table><tr><th>ISSN</th><th>期刊名</th></tr>" + "".join(body) + "</table>"
+        f"{nav}</body></html>"
+    )
+    return f"{1000 + rows - 1:04d}-{2000 + rows - 1:04d}", html
+
+
+def bench(fn, pages: list[tuple[str, str]], repeat: int) -> tuple[float, list]:
+    results = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [fn(html, issn) for issn, html in pages]
+    return (time.perf_counter() - start) / (repeat * len(pages)), results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark LetPub search-page parsing")
+    parser.add_argument("files", nargs="*", help="Captured HTML files named <ISSN>.html")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Response cache to read pages from")
+    parser.add_argument("--repeat", type=int, default=20, help="Iterations per page")
+    args = parser.parse_args()
+
+    pages = [(Path(f).stem, Path(f).read_text(encoding="utf-8", errors="ignore")) for f in args.files]
+    if not pages:
+        pages = load_captured_pages(Path(args.cache_dir))
+    source = "captured"
+    if not pages:
+        pages = [synthetic_page()]
+        source = "synthetic"
+
+    stream_time, stream_results = bench(parse_letpub_search_html, pages, args.repeat)
+    report = {
+        "pages": len(pages),
+        "source": source,
+        "streaming_ms_per_page": round(stream_time * 1000, 3),
+    }
+    if BeautifulSoup is not None:
+        bs4_time, bs4_results = bench(parse_with_bs4, pages, args.repeat)
+        mismatches = sum(
+            1
+            for a, b in zip(stream_results, bs4_results)
+            if (a or {}).get("issn") != (b or {}).get("issn")
+            or (a or {}).get("impact_factor") != (b or {}).get("impact_factor")
+        )
+        report["bs4_ms_per_page"] = round(bs4_time * 1000, 3)
+        report["speedup"] = round(bs4_time / stream_time, 2) if stream_time else None
+        report["mismatches"] = mismatches
+    else:
+        report["bs4_ms_per_page"] = None
+        print("[WARN] beautifulsoup4 is not installed; reporting streaming parser only.", file=sys.stderr)
+
+    print(dumps(report, pretty=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
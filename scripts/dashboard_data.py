@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Project paths, domain configs and data/ file helpers shared by both dashboard servers.
+
+server.py and async_server.py import these from here rather than from each
+other, so starting `server.py --async` loads each module once.
+"""
+
+import os
+import re
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(PROJECT_DIR, "data")
+WEB_DIR = os.path.join(PROJECT_DIR, "web")
+FETCH_SCRIPT = os.path.join(PROJECT_DIR, "scripts", "fetch.sh")
+ACADEMIC_SOURCES_DIR = os.path.join(PROJECT_DIR, ".agents", "skills", "academic-search", "sources")
+SKILLS_DIR = os.path.join(PROJECT_DIR, ".agents", "skills")
+LOGS_DIR = os.path.join(PROJECT_DIR, "logs")
+
+
+def parse_frontmatter(filepath):
+    """Parse YAML frontmatter (between --- markers) from a markdown file."""
+    result = {}
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+        match = re.match(r'^---\s*\n(.*?)\n---', content, re.DOTALL)
+        if match:
+            for line in match.group(1).splitlines():
+                line = line.strip()
+                if ':' in line:
+                    key, _, value = line.partition(':')
+                    result[key.strip()] = value.strip().strip('"').strip("'")
+    except Exception:
+        pass
+    return result
+
+
+def load_domains():
+    """Load domain configs and auto-discover from data files.
+
+    Priority: academic-search/sources/{id}.md > skill SKILL.md (domain_* fields) > minimal fallback.
+    Any domain ID found in data/ but missing a config gets a default entry.
+    """
+    # Step 1: explicit configs from academic-search/sources/*.md
+    explicit = {}
+    if os.path.isdir(ACADEMIC_SOURCES_DIR):
+        for fname in sorted(os.listdir(ACADEMIC_SOURCES_DIR)):
+            if not fname.endswith('.md'):
+                continue
+            domain = parse_frontmatter(os.path.join(ACADEMIC_SOURCES_DIR, fname))
+            if domain.get('id'):
+                explicit[domain['id']] = domain
+
+    # Step 2: skill-level domain configs (skills that declare domain_id in SKILL.md)
+    skill_domains = {}
+    if os.path.isdir(SKILLS_DIR):
+        for skill_name in os.listdir(SKILLS_DIR):
+            skill_md = os.path.join(SKILLS_DIR, skill_name, 'SKILL.md')
+            if not os.path.isfile(skill_md):
+                continue
+            meta = parse_frontmatter(skill_md)
+            domain_id = meta.get('domain_id')
+            if not domain_id:
+                continue
+            skill_domains[domain_id] = {
+                'id': domain_id,
+                'label': meta.get('domain_label', domain_id.upper()),
+                'category': meta.get('domain_category', domain_id.upper()),
+                'color': meta.get('domain_color', '#6366f1'),
+                'icon': meta.get('domain_icon', 'layers'),
+                'skill': meta.get('name', skill_name),
+                'order': meta.get('domain_order', '0'),
+            }
+
+    # Step 3: discover domain IDs from data files
+    discovered = set()
+    if os.path.isdir(DATA_DIR):
+        for f in os.listdir(DATA_DIR):
+            if not f.endswith('.json'):
+                continue
+            name = f[:-5]
+            parts = name.rsplit('-', 1)
+            if len(parts) == 2 and re.match(r'^\d{4}-\d{2}-\d{2}$', parts[0]):
+                discovered.add(parts[1])
+
+    # Step 4: merge — explicit wins, then skill_domains, then minimal fallback
+    all_domains = dict(explicit)
+    for domain_id in discovered:
+        if domain_id in all_domains:
+            continue
+        if domain_id in skill_domains:
+            all_domains[domain_id] = skill_domains[domain_id]
+        else:
+            all_domains[domain_id] = {
+                'id': domain_id,
+                'label': domain_id.upper(),
+                'category': domain_id.upper(),
+                'color': '#6366f1',
+                'icon': 'layers',
+                'skill': 'daily-ai-news',
+                'order': '0',
+            }
+
+    domains = list(all_domains.values())
+    domains.sort(key=lambda d: int(d.get('order', 99)))
+    return domains
+
+
+def academic_domain_ids():
+    """Domain ids `fetch.sh all` runs after ai, in its order (skill: daily-ai-news excluded)."""
+    ids = []
+    if os.path.isdir(ACADEMIC_SOURCES_DIR):
+        for fname in sorted(os.listdir(ACADEMIC_SOURCES_DIR)):
+            if not fname.endswith('.md'):
+                continue
+            meta = parse_frontmatter(os.path.join(ACADEMIC_SOURCES_DIR, fname))
+            if meta.get('id') and meta.get('skill') != 'daily-ai-news':
+                ids.append(meta['id'])
+    return ids
+
+
+def list_data_dates():
+    """Return all dates (newest first) that have at least one data file."""
+    dates = set()
+    if os.path.isdir(DATA_DIR):
+        for f in os.listdir(DATA_DIR):
+            if not f.endswith('.json'):
+                continue
+            # Format: YYYY-MM-DD-{id}.json — split off domain id at last hyphen
+            name = f[:-5]  # strip .json
+            parts = name.rsplit('-', 1)
+            if len(parts) == 2 and re.match(r'^\d{4}-\d{2}-\d{2}$', parts[0]):
+                dates.add(parts[0])
+    return sorted(dates, reverse=True)
+
+
+def accepts_gzip(accept_encoding):
+    """True if an Accept-Encoding header value allows gzip (q=0 excluded)."""
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        q = params.strip().lower()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        return True
+    return False
+
+
+def gzip_sidecar(path, accept_encoding):
+    """Return the precompressed sidecar for a data JSON file, or None.
+
+    Only data/*.json files written by generate_digest.write_json have a
+    sidecar; it is used when the client accepts gzip and the sidecar is at
+    least as new as the JSON it was compressed from.
+    """
+    if not path.endswith(".json") or os.path.dirname(path) != DATA_DIR:
+        return None
+    if not accepts_gzip(accept_encoding):
+        return None
+    sidecar = path + ".gz"
+    try:
+        if os.stat(sidecar).st_mtime < os.stat(path).st_mtime:
+            return None
+    except OSError:
+        return None
+    return sidecar
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Change-aware writes and coalesced git auto-sync for data/.
+
+Writers call write_json_if_changed() (or unchanged_on_disk()) so that a file
+whose only difference is a volatile timestamp (`generated_at`, `updated_at`)
+is left untouched and never shows up in `git status`.
+
+fetch.sh calls `data_sync.py request --label <mode>` when AUTO_GIT_SYNC=1.
+The request is appended to a pending list and a detached runner is started;
+it returns at once, so the fetch (and the next one) never waits on git.
+Only one runner holds the leader lock. It waits until no request has arrived
+for the debounce window (AUTO_GIT_SYNC_DEBOUNCE, default 20s, capped at
+AUTO_GIT_SYNC_MAX_WAIT), then makes one commit covering every domain that
+finished meanwhile and pushes it, with a pull --rebase retry on rejection.
+Runner output goes to logs/sync.log.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from json_codec import JSONDecodeError, dumps, file_bytes, loads, read_file
+from profiling import run_main
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_DIR / "data"
+SYNC_DIR = PROJECT_DIR / ".cache" / "sync"
+PENDING_PATH = SYNC_DIR / "pending.jsonl"
+PENDING_LOCK_PATH = SYNC_DIR / "pending.lock"
+LEADER_LOCK_PATH = SYNC_DIR / "leader.lock"
+SYNC_LOG_PATH = PROJECT_DIR / "logs" / "sync.log"
+VOLATILE_KEYS = frozenset({"generated_at", "updated_at"})
+DEFAULT_DEBOUNCE_SECONDS = 20.0
+DEFAULT_MAX_WAIT_SECONDS = 120.0
+
+
+# ── change-aware writes ──────────────────────────────────────
+def strip_volatile(value: object) -> object:
+    """Copy of a JSON value without volatile timestamp keys, at any depth."""
+    if isinstance(value, dict):
+        return {k: strip_volatile(v) for k, v in value.items() if k not in VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [strip_volatile(v) for v in value]
+    return value
+
+
+def unchanged_on_disk(path: str | Path, payload: object) -> bool:
+    """True if `path` already holds `payload` up to volatile timestamps."""
+    try:
+        existing = read_file(path)
+    except (OSError, JSONDecodeError):
+        return False
+    return strip_volatile(existing) == strip_volatile(payload)
+
+
+def write_json_if_changed(path: str | Path, payload: object) -> bool:
+    """Atomically write JSON (json_codec.file_bytes) unless only volatile keys differ; returns True if written."""
+    if unchanged_on_disk(path, payload):
+        return False
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(file_bytes(payload))
+    os.replace(tmp_path, path)
+    return True
+
+
+# ── coordinator ──────────────────────────────────────────────
+def log(message: str) -> None:
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] [SYNC] {message}", flush=True)
+
+
+def _locked(path: Path, blocking: bool = True):
+    """Open and flock `path`; returns the open file (close it to unlock) or None if busy."""
+    SYNC_DIR.mkdir(parents=True, exist_ok=True)
+    handle = path.open("a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+    except BlockingIOError:
+        handle.close()
+        return None
+    return handle
+
+
+def add_pending(label: str) -> None:
+    with _locked(PENDING_LOCK_PATH):
+        with PENDING_PATH.open("a", encoding="utf-8") as f:
+            f.write(dumps({"label": label, "at": time.time()}) + "\n")
+
+
+def take_pending() -> list[dict]:
+    with _locked(PENDING_LOCK_PATH):
+        try:
+            lines = PENDING_PATH.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return []
+        PENDING_PATH.unlink()
+    out = []
+    for line in lines:
+        try:
+            out.append(loads(line))
+        except JSONDecodeError:
+            continue
+    return out
+
+
+def last_request_at() -> float | None:
+    try:
+        return PENDING_PATH.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def git(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["git", "-C", str(PROJECT_DIR), *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+
+def _echo(result: subprocess.CompletedProcess) -> None:
+    if result.stdout.strip():
+        print(result.stdout.rstrip(), flush=True)
+
+
+def commit_and_push(labels: list[str]) -> int:
+    """One commit for every pending domain, then push; mirrors the old fetch.sh flow."""
+    if git("rev-parse", "--is-inside-work-tree").returncode != 0:
+        log(f"[WARN] Not a git repository: {PROJECT_DIR}")
+        return 0
+    branch = git("branch", "--show-current").stdout.strip()
+    if not branch:
+        log("[WARN] Cannot detect current git branch; skip sync.")
+        return 0
+
+    # Commit only generated data files; avoid accidental code commits.
+    git("add", "-A", "--", "data")
+    has_changes = git("diff", "--cached", "--quiet", "--", "data").returncode != 0
+    if has_changes:
+        names = ", ".join(dict.fromkeys(labels)) or "data"
+        result = git("commit", "-m", f"data: auto-fetch {names} {datetime.now().strftime('%Y-%m-%d')}", "--", "data")
+        _echo(result)
+        if result.returncode != 0:
+            log("[ERROR] git commit failed; skip push.")
+            return 1
+
+    ahead = 0
+    if git("rev-parse", "--verify", f"origin/{branch}").returncode == 0:
+        count = git("rev-list", "--count", f"origin/{branch}..{branch}").stdout.strip()
+        ahead = int(count) if count.isdigit() else 0
+    if not has_changes and ahead == 0:
+        log("[INFO] No data changes to sync.")
+        return 0
+
+    result = git("push", "origin", branch)
+    _echo(result)
+    if result.returncode == 0:
+        log(f"[OK] Data synced to GitHub (branch: {branch})")
+        return 0
+
+    log("[WARN] Direct git push failed; trying pull --rebase and retry.")
+    result = git("-c", "rebase.autoStash=true", "pull", "--rebase", "origin", branch)
+    _echo(result)
+    if result.returncode != 0:
+        log("[ERROR] git pull --rebase failed; push skipped.")
+        return 1
+    result = git("push", "origin", branch)
+    _echo(result)
+    if result.returncode != 0:
+        log("[ERROR] git push failed after rebase retry.")
+        return 1
+    log(f"[OK] Data synced to GitHub after rebase retry (branch: {branch})")
+    return 0
+
+
+def run(debounce: float, max_wait: float) -> int:
+    """Leader loop: debounce, drain pending requests, commit once, push; repeat while requests remain."""
+    status = 0
+    while True:
+        leader = _locked(LEADER_LOCK_PATH, blocking=False)
+        if leader is None:
+            return status  # the current leader will pick our request up
+        with leader:
+            started = time.time()
+            while True:
+                last = last_request_at()
+                if last is None:
+                    break
+                quiet_for = time.time() - last
+                if quiet_for >= debounce or time.time() - started >= max_wait:
+                    break
+                time.sleep(min(debounce - quiet_for, max(0.0, max_wait - (time.time() - started))) + 0.05)
+            requests = take_pending()
+            if requests:
+                labels = [str(r.get("label", "")) for r in requests if r.get("label")]
+                log(f"Syncing {len(requests)} request(s): {', '.join(dict.fromkeys(labels))}")
+                status = commit_and_push(labels) or status
+        # A request may have landed after the drain but before the lock was released.
+        if last_request_at() is None:
+            return status
+
+
+def spawn_runner() -> None:
+    SYNC_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with SYNC_LOG_PATH.open("a", encoding="utf-8") as log_file:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "run"],
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            cwd=str(PROJECT_DIR),
+            start_new_session=True,
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Coalesced git auto-sync of data/")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_request = sub.add_parser("request", help="Queue a sync and return immediately")
+    p_request.add_argument("--label", default="", help="Fetch mode/domain named in the commit message")
+    p_request.add_argument("--wait", action="store_true", help="Run the sync in the foreground")
+    sub.add_parser("run", help="Act as the sync leader (normally spawned by `request`)")
+    args = parser.parse_args()
+
+    debounce = float(os.environ.get("AUTO_GIT_SYNC_DEBOUNCE", DEFAULT_DEBOUNCE_SECONDS))
+    max_wait = float(os.environ.get("AUTO_GIT_SYNC_MAX_WAIT", DEFAULT_MAX_WAIT_SECONDS))
+    if args.command == "request":
+        add_pending(args.label)
+        if args.wait:
+            return run(0.0, 0.0)
+        spawn_runner()
+        log(f"Queued data sync for '{args.label}' (debounce {debounce:g}s, log: {SYNC_LOG_PATH})")
+        return 0
+    return run(debounce, max_wait)
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
@@ -1,61 +1,74 @@
 #!/usr/bin/env python3
-"""Enrich academic articles with journal names and maintain IF registry JSON."""
+"""Enrich academic articles with journal names and maintain IF registry JSON.
+
+The upstream calls (PubMed esummary, LetPub ISSN search) are checkpointed per
+data file in .cache/enrich/ (ENRICH_CHECKPOINT_DIR overrides) as each one
+succeeds, so a run killed part way, e.g. by run_with_timeout, is resumed by
+the next run instead of starting over; see EnrichCheckpoint.
+"""
 
 from __future__ import annotations
 
 import argparse
-import json
 import math
+import os
 import re
-import time
 import urllib.parse
-import urllib.error
-import urllib.request
 from collections import Counter
 from datetime import datetime, timezone
+from html.parser import HTMLParser
 from pathlib import Path
 from urllib.parse import quote_plus
 
-try:
-    from bs4 import BeautifulSoup
-except ImportError:
-    BeautifulSoup = None
-
-
-PMID_RE = re.compile(r"pubmed\.ncbi\.nlm\.nih\.gov/(\d+)")
+from article import Article, normalize_issn, wrap_articles
+from data_sync import write_json_if_changed
+from http_client import (
+    HTTP_MODES,
+    PROJECT_DIR,
+    RETRYABLE_ERRORS,
+    HttpClient,
+    client_from_env,
+    get_default_client,
+    set_default_client,
+)
+from json_codec import dumpb, loads, read_file
+from pmid_store import carry_forward
+from profiling import run_main
+
+
+CHECKPOINT_DIR = PROJECT_DIR / ".cache" / "enrich"
 DATE_PREFIX_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-")
 ESUMMARY_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
 IF_REGISTRY_FILENAME = "journal_impact_factors.json"
 UNRESOLVED_IF_FILENAME = "if_unresolved_journals.json"
 LETPUB_DB_PATH = Path("letpub") / "letpub_life_med_unique.json"
+LETPUB_SEARCH_URL = "https://letpub.com.cn/index.php?page=journalapp&view=search"
+LETPUB_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
 IF_STATUS_AVAILABLE = "available"
 IF_STATUS_NOT_AVAILABLE_YET = "not_available_yet"
 IF_STATUS_NOT_FOUND = "not_found"
+LETPUB_ROW_CELLS = 12
+JOURNAL_ID_RE = re.compile(r"journalid=(\d+)")
+LETPUB_IF_RE = re.compile(r"IF:\s*([0-9]+(?:\.[0-9]+)?)", re.I)
 
 
 def now_iso_utc() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
 
-def extract_pmid(url: str) -> str:
-    if not url:
-        return ""
-    match = PMID_RE.search(url)
-    return match.group(1) if match else ""
-
-
 def normalize_journal_key(name: str) -> str:
     """Normalize journal names for robust matching across abbreviations/cases/punctuation."""
     cleaned = re.sub(r"[^a-z0-9]+", "", (name or "").lower())
     return cleaned
 
 
-def normalize_issn(value: str) -> str:
-    """Normalize ISSN strings to 8-char uppercase token without hyphen."""
-    token = re.sub(r"[^0-9xX]", "", (value or ""))
-    return token.upper()
-
-
 def format_issn(value: str) -> str:
     """Format normalized ISSN token as ####-#### for readability."""
     token = normalize_issn(value)
@@ -108,9 +121,13 @@ def infer_capture_date(path: Path) -> str:
     return datetime.now().strftime("%Y-%m-%d")
 
 
-def fetch_pubmed_summaries(pmids: list[str]) -> dict[str, dict]:
+def fetch_pubmed_summaries(
+    pmids: list[str], client: HttpClient | None = None, on_chunk=None
+) -> dict[str, dict]:
+    """Journal name and ISSN per PMID; `on_chunk(results)` is called for every chunk fetched successfully."""
     if not pmids:
         return {}
+    client = client or get_default_client()
     unique = list(dict.fromkeys(pmids))
     out: dict[str, dict] = {}
     chunk_size = 100
@@ -120,17 +137,12 @@ def fetch_pubmed_summaries(pmids: list[str]) -> dict[str, dict]:
             {"db": "pubmed", "id": ",".join(chunk), "retmode": "json"}
         )
         url = f"{ESUMMARY_URL}?{query}"
-        payload = None
-        for attempt in range(1, 4):
-            try:
-                with urllib.request.urlopen(url, timeout=20) as resp:
-                    payload = json.loads(resp.read().decode("utf-8"))
-                break
-            except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError, ConnectionError):
-                if attempt < 3:
-                    time.sleep(0.8 * attempt)
-                else:
-                    payload = {"result": {}}
+        fetched = True
+        try:
+            payload = loads(client.get(url, timeout=20, retries=3))
+        except RETRYABLE_ERRORS:
+            payload = {"result": {}}
+            fetched = False
         result = payload.get("result", {})
         for pmid in chunk:
             info = result.get(pmid) or result.get(str(int(pmid))) or {}
@@ -141,6 +153,8 @@ def fetch_pubmed_summaries(pmids: list[str]) -> dict[str, dict]:
             if not issn:
                 issn = normalize_issn(str(info.get("essn", "")).strip())
             out[pmid] = {"journal": journal, "issn": issn}
+        if fetched and on_chunk is not None:
+            on_chunk({pmid: out[pmid] for pmid in chunk})
     return out
 
 
@@ -155,7 +169,7 @@ def default_registry() -> dict:
 def load_registry(path: Path) -> dict:
     if not path.exists():
         return default_registry()
-    raw = json.loads(path.read_text(encoding="utf-8"))
+    raw = read_file(path)
     if not isinstance(raw, dict):
         return default_registry()
 
@@ -181,7 +195,7 @@ def default_unresolved_registry() -> dict:
 def load_unresolved_registry(path: Path) -> dict:
     if not path.exists():
         return default_unresolved_registry()
-    raw = json.loads(path.read_text(encoding="utf-8"))
+    raw = read_file(path)
     if not isinstance(raw, dict):
         return default_unresolved_registry()
     journals = raw.get("journals", {})
@@ -204,7 +218,7 @@ def load_letpub_if_index(data_dir: Path) -> dict[str, dict]:
         return {}
 
     try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
+        payload = read_file(path)
     except Exception:
         return {}
 
@@ -267,101 +281,272 @@ def load_letpub_if_index(data_dir: Path) -> dict[str, dict]:
     return {"by_name": by_name, "by_issn": by_issn}
 
 
+class _LetPubRowFound(Exception):
+    """Internal signal used to stop parsing once the target row is complete."""
+
+
+class LetPubSearchParser(HTMLParser):
+    """Streaming parser for the LetPub search results table.
+
+    Only the <table> enclosing the "ISSN" header is inspected. For each row,
+    direct <td> cells keep their text plus the first <a> (name, href) and the
+    first <font> (short name). With an ISSN token, parsing stops at the first
+    12-cell row whose ISSN matches, so the rest of the page is never tokenized;
+    without one, every 12-cell row is collected into ``rows``.
+    """
+
+    def __init__(self, issn_token: str = ""):
+        super().__init__(convert_charrefs=True)
+        self.issn_token = issn_token
+        self.result: dict | None = None
+        self.rows: list[list[dict]] = []
+        self._table_depth = 0
+        self._results_depth = 0
+        self._in_th = False
+        self._th_text: list[str] = []
+        self._row: list[dict] | None = None
+        self._cell: dict | None = None
+        self._cell_depth = 0
+        self._captures: list[tuple[str, list[str]]] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self._table_depth += 1
+            return
+        if tag == "th" and not self._results_depth:
+            self._in_th = True
+            self._th_text = []
+            return
+        if not self._results_depth or self._table_depth != self._results_depth:
+            if self._cell is not None and tag in ("a", "font"):
+                self._start_capture(tag, attrs)
+            return
+        if tag == "tr":
+            self._end_row()
+            self._row = []
+        elif tag == "td" and self._row is not None:
+            self._end_cell()
+            self._cell = {"text": [], "a_text": None, "a_href": "", "font_text": None}
+            self._cell_depth = self._table_depth
+        elif self._cell is not None and tag in ("a", "font"):
+            self._start_capture(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == "th" and self._in_th:
+            self._in_th = False
+            if "ISSN" in "".join(self._th_text):
+                self._results_depth = self._table_depth
+            return
+        if tag in ("a", "font") and self._captures and self._captures[-1][0] == tag:
+            name, parts = self._captures.pop()
+            self._cell[f"{name}_text"] = " ".join(parts)
+            return
+        if not self._results_depth:
+            if tag == "table":
+                self._table_depth -= 1
+            return
+        if tag == "table":
+            if self._table_depth == self._results_depth:
+                self._end_row()
+                self._results_depth = 0
+            self._table_depth -= 1
+        elif self._table_depth != self._results_depth:
+            return
+        elif tag == "td":
+            self._end_cell()
+        elif tag == "tr":
+            self._end_row()
+
+    def handle_data(self, data):
+        if self._in_th:
+            self._th_text.append(data)
+            return
+        if self._cell is None:
+            return
+        text = data.strip()
+        if not text:
+            return
+        self._cell["text"].append(text)
+        for _, parts in self._captures:
+            parts.append(text)
+
+    def close(self):
+        super().close()
+        # A truncated page can end inside the results table; keep its last row.
+        if self._results_depth:
+            self._end_row()
+
+    def _start_capture(self, tag, attrs):
+        if self._cell.get(f"{tag}_text") is not None or any(name == tag for name, _ in self._captures):
+            return
+        if tag == "a":
+            self._cell["a_href"] = dict(attrs).get("href") or ""
+        self._cell[f"{tag}_text"] = ""
+        self._captures.append((tag, []))
+
+    def _end_cell(self):
+        if self._cell is None:
+            return
+        while self._captures:
+            name, parts = self._captures.pop()
+            self._cell[f"{name}_text"] = " ".join(parts)
+        self._row.append(self._cell)
+        self._cell = None
+
+    def _end_row(self):
+        self._end_cell()
+        row, self._row = self._row, None
+        if not row or len(row) != LETPUB_ROW_CELLS:
+            return
+        if not self.issn_token:
+            self.rows.append(row)
+            return
+        row_issn = normalize_issn(" ".join(row[0]["text"]))
+        if row_issn and row_issn != self.issn_token:
+            return
+        self.result = letpub_row_to_result(row, row_issn)
+        raise _LetPubRowFound
+
+
+def letpub_row_to_result(row: list[dict], row_issn: str) -> dict:
+    journal_name = row[1]["a_text"] or ""
+    journal_name_short = row[1]["font_text"] or ""
+    jid_match = JOURNAL_ID_RE.search(row[1]["a_href"])
+    journal_id = int(jid_match.group(1)) if jid_match else None
+    m_if = LETPUB_IF_RE.search(" ".join(row[3]["text"]))
+    if_raw = float(m_if.group(1)) if m_if else None
+    if_status = (
+        IF_STATUS_AVAILABLE
+        if if_raw is not None and if_raw > 0
+        else IF_STATUS_NOT_AVAILABLE_YET
+        if if_raw == 0
+        else IF_STATUS_NOT_FOUND
+    )
+    return {
+        "journal_id": journal_id,
+        "journal_name": journal_name,
+        "journal_name_short": journal_name_short,
+        "issn": row_issn,
+        "impact_factor": if_raw if if_raw and if_raw > 0 else None,
+        "if_status": if_status,
+        "source": "letpub_issn_lookup",
+    }
+
+
 def parse_letpub_search_html(html: str, target_issn: str) -> dict | None:
     """Parse LetPub search result table and return first matched row for ISSN."""
-    if BeautifulSoup is None:
-        return None
     issn_token = normalize_issn(target_issn)
     if not issn_token:
         return None
-    soup = BeautifulSoup(html, "html.parser")
-    issn_th = soup.find("th", string=lambda s: bool(s and "ISSN" in s))
-    if not issn_th:
-        return None
-    table = issn_th.find_parent("table")
-    if table is None:
-        return None
+    parser = LetPubSearchParser(issn_token)
+    try:
+        parser.feed(html)
+        parser.close()
+    except _LetPubRowFound:
+        pass
+    return parser.result
 
-    for tr in table.find_all("tr"):
-        tds = tr.find_all("td")
-        if len(tds) != 12:
-            continue
-        row_issn_raw = str(tds[0].get_text(" ", strip=True))
-        row_issn = normalize_issn(row_issn_raw)
-        if row_issn and row_issn != issn_token:
-            continue
-        journal_link = tds[1].find("a")
-        journal_name = str(journal_link.get_text(" ", strip=True)) if journal_link else ""
-        journal_name_short_tag = tds[1].find("font")
-        journal_name_short = (
-            str(journal_name_short_tag.get_text(" ", strip=True))
-            if journal_name_short_tag
-            else ""
-        )
-        detail_href = str(journal_link.get("href", "")) if journal_link else ""
-        jid_match = re.search(r"journalid=(\d+)", detail_href)
-        journal_id = int(jid_match.group(1)) if jid_match else None
-        metrics_text = str(tds[3].get_text(" ", strip=True))
-        m_if = re.search(r"IF:\s*([0-9]+(?:\.[0-9]+)?)", metrics_text, re.I)
-        if_raw = float(m_if.group(1)) if m_if else None
-        if_status = (
-            IF_STATUS_AVAILABLE
-            if if_raw is not None and if_raw > 0
-            else IF_STATUS_NOT_AVAILABLE_YET
-            if if_raw == 0
-            else IF_STATUS_NOT_FOUND
-        )
-        return {
-            "journal_id": journal_id,
-            "journal_name": journal_name,
-            "journal_name_short": journal_name_short,
-            "issn": row_issn,
-            "impact_factor": if_raw if if_raw and if_raw > 0 else None,
-            "if_status": if_status,
-            "source": "letpub_issn_lookup",
-        }
-    return None
 
+def lookup_letpub_by_issn_online(
+    issn: str, retries: int = 3, timeout: int = 25, client: HttpClient | None = None, strict: bool = False
+) -> dict | None:
+    """Query LetPub search endpoint by ISSN and parse first matched result.
 
-def lookup_letpub_by_issn_online(issn: str, retries: int = 3, timeout: int = 25) -> dict | None:
-    """Query LetPub search endpoint by ISSN and parse first matched result."""
+    Network failures return None like a miss, or propagate with `strict`.
+    """
     issn_fmt = format_issn(issn)
     if not normalize_issn(issn_fmt):
         return None
+    client = client or get_default_client()
     url = (
-        "https://letpub.com.cn/index.php?page=journalapp&view=search"
+        f"{LETPUB_SEARCH_URL}"
         f"&searchname=&searchissn={quote_plus(issn_fmt)}"
         "&searchfield=&searchimpactlow=&searchimpacthigh="
         "&searchimpacttrend=&searchscitype=&searchcategory1=&searchcategory2="
         "&searchjcrkind=&searchopenaccess=&searchsort="
     )
-    req = urllib.request.Request(
-        url,
-        headers={
-            "User-Agent": (
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/131.0.0.0 Safari/537.36"
-            ),
-            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-        },
-    )
-    last_err: Exception | None = None
-    for i in range(1, retries + 1):
-        try:
-            with urllib.request.urlopen(req, timeout=timeout) as resp:
-                html = resp.read().decode("utf-8", errors="ignore")
-            result = parse_letpub_search_html(html, issn_fmt)
-            if result:
-                return result
-            return None
-        except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError, ConnectionError) as exc:
-            last_err = exc
-            if i < retries:
-                time.sleep(0.8 * i)
-    if last_err:
+    try:
+        html = client.get(url, headers=LETPUB_HEADERS, timeout=timeout, retries=retries).decode(
+            "utf-8", errors="ignore"
+        )
+    except RETRYABLE_ERRORS:
+        if strict:
+            raise
         return None
-    return None
+    return parse_letpub_search_html(html, issn_fmt)
+
+
+class EnrichCheckpoint:
+    """Upstream results of an unfinished enrichment of one data file, saved as they arrive.
+
+    `summaries` holds esummary results per PMID and `lookups` LetPub online
+    results per ISSN (None for a journal LetPub does not list); both stay
+    valid if the file's article list changes between runs. Failed requests
+    are not recorded, so they are retried. The data file is only written
+    once enrichment completes and callers call finish() after that write: a
+    killed run leaves the file as it was, and a run that had failed requests
+    keeps the checkpoint, so the next run only asks upstream for what is
+    still missing.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.summaries: dict[str, dict] = {}
+        self.lookups: dict[str, dict | None] = {}
+        self.failed = 0
+        if path.exists():
+            try:
+                raw = read_file(path)
+            except (OSError, ValueError):
+                raw = None
+            if isinstance(raw, dict):
+                self.summaries = dict(raw.get("summaries") or {})
+                self.lookups = dict(raw.get("lookups") or {})
+
+    @classmethod
+    def for_data_file(cls, path: Path) -> "EnrichCheckpoint":
+        directory = Path(os.environ.get("ENRICH_CHECKPOINT_DIR", "") or CHECKPOINT_DIR)
+        return cls(directory / path.name)
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.summaries or self.lookups)
+
+    def add_summaries(self, summaries: dict[str, dict]) -> None:
+        self.summaries.update(summaries)
+        self.save()
+
+    def add_lookup(self, issn: str, match: dict | None) -> None:
+        self.lookups[issn] = match
+        self.save()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_bytes(
+            dumpb(
+                {
+                    "updated_at": now_iso_utc(),
+                    "summaries": self.summaries,
+                    "lookups": self.lookups,
+                }
+            )
+        )
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def finish(self) -> None:
+        """Drop the checkpoint once the data file is written, unless upstream requests failed."""
+        if not self.failed:
+            self.clear()
+            return
+        self.save()
+        print(f"[WARN] {self.failed} upstream lookup(s) failed; progress kept in {self.path} (non-blocking)")
 
 
 def normalize_registry_entry(entry: dict, capture_date: str) -> dict:
@@ -400,32 +585,77 @@ def resolve_journal_key(journals: dict, key_index: dict, journal_name: str) -> s
 
 
 def enrich_file(path: Path) -> tuple[int, int, int, Path]:
-    data = json.loads(path.read_text(encoding="utf-8"))
+    data = read_file(path)
+    articles = data.get("articles", [])
+    if not isinstance(articles, list):
+        return (0, 0, 0, path.parent / IF_REGISTRY_FILENAME)
+    checkpoint = EnrichCheckpoint.for_data_file(path)
+    result = enrich_payload(data, path, checkpoint=checkpoint)
+    write_json_if_changed(path, data)
+    checkpoint.finish()
+    return result
+
+
+def enrich_payload(
+    data: dict,
+    path: Path,
+    records: list[Article | None] | None = None,
+    checkpoint: EnrichCheckpoint | None = None,
+) -> tuple[int, int, int, Path]:
+    """Enrich an in-memory payload for data file `path`.
+
+    Updates `data` in place and writes the IF registry and unresolved list
+    next to `path`; writing the data file itself is left to the caller.
+    `records` is wrap_articles(data["articles"]) when the caller already has it.
+    With a `checkpoint`, upstream results are saved to and reused from it; the
+    caller clears it once the data file is written.
+    """
     articles = data.get("articles", [])
     if not isinstance(articles, list):
         return (0, 0, 0, path.parent / IF_REGISTRY_FILENAME)
+    if records is None:
+        records = wrap_articles(articles)
 
     pmids = []
-    for article in articles:
-        if not isinstance(article, dict):
+    for article in records:
+        if article is None:
             continue
         if str(article.get("source", "")).lower() != "pubmed":
             continue
-        pmid = extract_pmid(str(article.get("url", "")))
-        if pmid:
-            pmids.append(pmid)
-
-    summary_by_pmid = fetch_pubmed_summaries(pmids)
+        if article.pmid:
+            pmids.append(article.pmid)
+
+    # PMIDs stored on an earlier day keep the journal/ISSN found then.
+    carried = carry_forward(path, pmids)
+    summary_by_pmid = {
+        pmid: {"journal": fields.get("journal", ""), "issn": fields.get("journal_issn", "")}
+        for pmid, fields in carried.items()
+    }
+    issn_lookup_cache: dict[str, dict | None] = {}
+    on_chunk = None
+    if checkpoint is not None:
+        if checkpoint.resumed:
+            print(
+                f"Resuming enrichment from {checkpoint.path} "
+                f"(summaries={len(checkpoint.summaries)}, letpub_lookups={len(checkpoint.lookups)})"
+            )
+        for pmid, summary in checkpoint.summaries.items():
+            summary_by_pmid.setdefault(pmid, summary)
+        issn_lookup_cache.update(checkpoint.lookups)
+        on_chunk = checkpoint.add_summaries
+    missing = [pmid for pmid in dict.fromkeys(pmids) if pmid not in summary_by_pmid]
+    summary_by_pmid.update(fetch_pubmed_summaries(missing, on_chunk=on_chunk))
+    if checkpoint is not None:
+        checkpoint.failed += sum(1 for pmid in missing if pmid not in checkpoint.summaries)
     updated_journal_field = 0
     inspected = 0
-    for article in articles:
-        if not isinstance(article, dict):
+    for article in records:
+        if article is None:
             continue
         if str(article.get("source", "")).lower() != "pubmed":
             continue
         inspected += 1
-        pmid = extract_pmid(str(article.get("url", "")))
-        summary = summary_by_pmid.get(pmid, {})
+        summary = summary_by_pmid.get(article.pmid, {})
         journal = str(summary.get("journal", "")).strip()
         article_issn = normalize_issn(str(summary.get("issn", "")).strip())
         if article_issn:
@@ -448,12 +678,11 @@ def enrich_file(path: Path) -> tuple[int, int, int, Path]:
     registry_new_count = 0
     letpub_by_name = letpub_if_index.get("by_name", {})
     letpub_by_issn = letpub_if_index.get("by_issn", {})
-    issn_lookup_cache: dict[str, dict | None] = {}
     unresolved_observed: dict[str, dict[str, str]] = {}
     resolved_keys: set[str] = set()
 
-    for article in articles:
-        if not isinstance(article, dict):
+    for article in records:
+        if article is None:
             continue
         journal_name = str(article.get("journal", "")).strip()
         if not journal_name:
@@ -470,11 +699,11 @@ def enrich_file(path: Path) -> tuple[int, int, int, Path]:
 
         # Fallback: auto-seed IF from LetPub DB when manual registry value is missing.
         if entry.get("impact_factor") in (None, "") and entry.get("if_status") != IF_STATUS_NOT_AVAILABLE_YET:
-            pmid = extract_pmid(str(article.get("url", "")))
-            summary = summary_by_pmid.get(pmid, {})
-            article_issn = normalize_issn(
-                str(article.get("journal_issn") or summary.get("issn", "")).strip()
-            )
+            summary = summary_by_pmid.get(article.pmid, {})
+            if article.get("journal_issn"):
+                article_issn = article.issn
+            else:
+                article_issn = normalize_issn(str(summary.get("issn", "")).strip())
 
             match = None
             if article_issn:
@@ -484,7 +713,16 @@ def enrich_file(path: Path) -> tuple[int, int, int, Path]:
             # Final fallback: online ISSN query against LetPub.
             if not match and article_issn:
                 if article_issn not in issn_lookup_cache:
-                    issn_lookup_cache[article_issn] = lookup_letpub_by_issn_online(article_issn)
+                    if checkpoint is None:
+                        issn_lookup_cache[article_issn] = lookup_letpub_by_issn_online(article_issn)
+                    else:
+                        try:
+                            checkpoint.add_lookup(article_issn, lookup_letpub_by_issn_online(article_issn, strict=True))
+                            issn_lookup_cache[article_issn] = checkpoint.lookups[article_issn]
+                        except RETRYABLE_ERRORS:
+                            # Not recorded: the next run asks LetPub again.
+                            issn_lookup_cache[article_issn] = None
+                            checkpoint.failed += 1
                 match = issn_lookup_cache.get(article_issn)
             if match:
                 entry["impact_factor"] = match.get("impact_factor")
@@ -530,6 +768,9 @@ def enrich_file(path: Path) -> tuple[int, int, int, Path]:
         else:
             resolved_keys.add(key)
 
+    if checkpoint is not None:
+        checkpoint.save()
+
     for key, hit_count in journal_hits.items():
         entry = normalize_registry_entry(journals.get(key, {}), capture_date)
         entry["last_seen"] = capture_date
@@ -573,25 +814,29 @@ def enrich_file(path: Path) -> tuple[int, int, int, Path]:
     }
     unresolved["updated_at"] = now_iso_utc()
 
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    registry_path.write_text(json.dumps(registry, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    unresolved_path.write_text(json.dumps(unresolved, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    write_json_if_changed(registry_path, registry)
+    write_json_if_changed(unresolved_path, unresolved)
     return (inspected, updated_journal_field, registry_new_count, registry_path)
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Enrich data file with journal names")
     parser.add_argument("file", help="Path to target JSON data file")
+    parser.add_argument(
+        "--http-mode",
+        choices=HTTP_MODES,
+        default=None,
+        help="Upstream response cache mode (default: $HTTP_MODE or live)",
+    )
+    parser.add_argument("--http-cache-dir", default=None, help="Response cache directory (default: .cache/http)")
     args = parser.parse_args()
 
     path = Path(args.file)
     if not path.exists():
         raise FileNotFoundError(f"file not found: {path}")
 
-    if BeautifulSoup is None:
-        print(
-            "[WARN] beautifulsoup4 is not installed; online LetPub ISSN parsing is disabled.",
-        )
+    if args.http_mode or args.http_cache_dir:
+        set_default_client(client_from_env(args.http_mode, args.http_cache_dir))
 
     inspected, updated, registry_new_count, registry_path = enrich_file(path)
     print(
@@ -603,4 +848,4 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(run_main(main))
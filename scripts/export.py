@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""NDJSON export of data files over a date range (`/api/export`).
+
+    GET /api/export?from=2026-01-01&to=2026-03-31&domain=ad,pd&fields=title,url,journal
+
+One JSON object per article, in date order (then domain), each carrying the
+article fields plus `domain`; `fields=` keeps only the named keys. Files are
+opened one at a time while the response streams, so memory stays bounded by
+the largest single file whatever the range (the servers read through their
+PayloadCache, which only keeps files within its byte budget).
+
+The catalog generation is a hash over name, mtime and size of every file the
+query selects; it is sent as the ETag, so a client that repeats a query with
+If-None-Match gets a 304 without any file being read.
+
+    python3 scripts/export.py --from 2026-02-01 --to 2026-02-28 --domain ai > ai.ndjson
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Callable, Iterator
+
+from json_codec import dumpb, read_file
+from profiling import run_main
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_DIR / "data"
+DATA_FILE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-([A-Za-z0-9_-]+)\.json$")
+DOMAIN_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+FORMATS = ("ndjson",)
+CONTENT_TYPE = "application/x-ndjson; charset=utf-8"
+CHUNK_BYTES = 64 * 1024
+
+
+class ExportQuery:
+    """Validated /api/export parameters; raises ValueError on bad input."""
+
+    def __init__(self, start: str = "", end: str = "", domains: str = "", fields: str = "", fmt: str = "ndjson"):
+        self.start = self._day(start, "from")
+        self.end = self._day(end, "to")
+        if self.start and self.end and self.start > self.end:
+            raise ValueError("from must not be after to")
+        self.domains = frozenset(d.strip().lower() for d in domains.split(",") if d.strip())
+        bad = [d for d in self.domains if not DOMAIN_RE.match(d)]
+        if bad:
+            raise ValueError(f"invalid domain: {bad[0]}")
+        self.fields = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        self.format = (fmt or "ndjson").strip().lower()
+        if self.format not in FORMATS:
+            raise ValueError(f"unsupported format: {self.format} (supported: {', '.join(FORMATS)})")
+
+    @classmethod
+    def from_query(cls, query: dict[str, list[str]]) -> "ExportQuery":
+        return cls(
+            query.get("from", [""])[0],
+            query.get("to", [""])[0],
+            ",".join(query.get("domain", [])),
+            ",".join(query.get("fields", [])),
+            query.get("format", ["ndjson"])[0],
+        )
+
+    @staticmethod
+    def _day(value: str, name: str) -> str:
+        value = (value or "").strip()
+        if not value:
+            return ""
+        try:
+            return date.fromisoformat(value).isoformat()
+        except ValueError:
+            raise ValueError(f"{name} must be YYYY-MM-DD") from None
+
+
+def select_files(query: ExportQuery, data_dir: Path = DATA_DIR) -> list[tuple[str, str, Path]]:
+    """(day, domain, path) of every data file in range, ordered by day then domain."""
+    selected = []
+    try:
+        names = os.listdir(data_dir)
+    except FileNotFoundError:
+        return []
+    for name in names:
+        match = DATA_FILE_RE.match(name)
+        if not match:
+            continue
+        day, domain = match.group(1), match.group(2).lower()
+        if query.start and day < query.start or query.end and day > query.end:
+            continue
+        if query.domains and domain not in query.domains:
+            continue
+        selected.append((day, domain, data_dir / name))
+    selected.sort()
+    return selected
+
+
+def catalog_etag(files: list[tuple[str, str, Path]], query: ExportQuery) -> str:
+    """Quoted ETag for the selected files' generation plus the projection."""
+    digest = hashlib.sha1(f"{query.format}|{','.join(query.fields)}".encode("utf-8"))
+    for _, _, path in files:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        digest.update(f"\n{path.name}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"))
+    return f'"{digest.hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def load_payload(path: Path) -> object:
+    return read_file(path)
+
+
+def iter_records(
+    files: list[tuple[str, str, Path]],
+    fields: tuple[str, ...] = (),
+    load: Callable[[Path], object] = load_payload,
+) -> Iterator[dict]:
+    """Export records of `files`; `load` lets the server read through its payload cache."""
+    for _, domain, path in files:
+        try:
+            payload = load(path)
+        except (OSError, ValueError):
+            continue
+        articles = payload.get("articles") if isinstance(payload, dict) else None
+        for article in articles if isinstance(articles, list) else []:
+            if not isinstance(article, dict):
+                continue
+            record = {"domain": domain, **article}
+            yield {k: record[k] for k in fields if k in record} if fields else record
+
+
+def iter_ndjson(
+    files: list[tuple[str, str, Path]],
+    fields: tuple[str, ...] = (),
+    load: Callable[[Path], object] = load_payload,
+) -> Iterator[bytes]:
+    """NDJSON lines grouped into chunks of about CHUNK_BYTES."""
+    buffer: list[bytes] = []
+    size = 0
+    for record in iter_records(files, fields, load):
+        line = dumpb(record) + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export articles of a date range as NDJSON")
+    parser.add_argument("--from", dest="start", default="", help="First day (YYYY-MM-DD, default: earliest)")
+    parser.add_argument("--to", dest="end", default="", help="Last day (YYYY-MM-DD, default: latest)")
+    parser.add_argument("--domain", default="", help="Comma-separated domain ids (default: all)")
+    parser.add_argument("--fields", default="", help="Comma-separated fields to keep (default: all)")
+    args = parser.parse_args()
+    try:
+        query = ExportQuery(args.start, args.end, args.domain, args.fields)
+    except ValueError as exc:
+        parser.error(str(exc))
+    for chunk in iter_ndjson(select_files(query), query.fields):
+        sys.stdout.buffer.write(chunk)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
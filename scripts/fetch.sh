@@ -1,19 +1,20 @@
 #!/bin/bash
 # fetch.sh — Wrapper for codex daily news fetching
-# Usage: ./scripts/fetch.sh [ai|all|test|{domain-id}]
+# Usage: ./scripts/fetch.sh [ai|all|test|{domain-id} ...]
 #   ai          — 抓取 AI 新闻（daily-ai-news 技能）
 #   all         — 抓取 AI 新闻 + 全部学术领域
 #   test        — 写入测试数据
-#   {domain-id} — 抓取指定学术领域（如 autism）
+#   {domain-id} — 抓取指定领域（如 autism；可列多个，ai 也可出现在列表中）
 
 PROJECT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
 TODAY=$(date +%Y-%m-%d)
 AI_DATA_FILE="$PROJECT_DIR/data/${TODAY}-ai.json"
 ACADEMIC_SOURCES_DIR="$PROJECT_DIR/.agents/skills/academic-search/sources"
-DIGEST_SCRIPT="$PROJECT_DIR/scripts/generate_digest.py"
-ENRICH_JOURNAL_SCRIPT="$PROJECT_DIR/scripts/enrich_journal.py"
+PIPELINE_SCRIPT="$PROJECT_DIR/scripts/pipeline.py"
 VALIDATE_DATA_SCRIPT="$PROJECT_DIR/scripts/validate_data.py"
 RUN_WITH_TIMEOUT_SCRIPT="$PROJECT_DIR/scripts/run_with_timeout.py"
+RELATED_SCRIPT="$PROJECT_DIR/scripts/related.py"
+DATA_SYNC_SCRIPT="$PROJECT_DIR/scripts/data_sync.py"
 AI_SKILL_DIR="$PROJECT_DIR/.agents/skills/daily-ai-news"
 AI_SKILL_FILE="$AI_SKILL_DIR/SKILL.md"
 AI_OUTPUT_SPEC_FILE="$AI_SKILL_DIR/sources/output.md"
@@ -84,45 +85,69 @@ validate_data_file() {
     return 0
 }
 
-generate_digest() {
+# Validate + enrich + digest in one Python process (parse once, write once).
+process_data_file() {
     local file="$1"
     local domain_id="$2"
-    local digest_output
-    if [ ! -f "$DIGEST_SCRIPT" ]; then
-        log "[ERROR] Digest script not found: $DIGEST_SCRIPT"
+    local pipeline_output
+    if [ ! -f "$file" ]; then
+        log "[ERROR] Data file was not created: $file"
         return 1
     fi
-    if ! digest_output=$(python3 "$DIGEST_SCRIPT" "$file" "$domain_id" 2>&1); then
-        log "[ERROR] Failed to generate digest for: $file"
-        [ -n "$digest_output" ] && echo "$digest_output"
+    if [ ! -f "$PIPELINE_SCRIPT" ]; then
+        log "[ERROR] Pipeline script not found: $PIPELINE_SCRIPT"
         return 1
     fi
-    [ -n "$digest_output" ] && echo "$digest_output"
-    log "[OK] Digest generated: $file"
+    local timeout_sec="${PIPELINE_TIMEOUT_SECONDS:-300}"
+    if ! [[ "$timeout_sec" =~ ^[0-9]+$ ]]; then
+        log "[WARN] Invalid PIPELINE_TIMEOUT_SECONDS=$timeout_sec, fallback to 300"
+        timeout_sec=300
+    fi
+    local pipeline_cmd=(python3 "$PIPELINE_SCRIPT" "$file" --domain "$domain_id")
+    # Only journal enrich waits on upstreams (esummary / LetPub); the AI
+    # domain skips it, so its pipeline runs unbounded.
+    if [ "$timeout_sec" -gt 0 ] && [ "$domain_id" != "ai" ]; then
+        pipeline_cmd=(python3 "$RUN_WITH_TIMEOUT_SCRIPT" --timeout "$timeout_sec" --key "pipeline-$domain_id" -- "${pipeline_cmd[@]}")
+    fi
+    local exit_code=0 done_msg="validated, enriched and digested"
+    pipeline_output=$("${pipeline_cmd[@]}" 2>&1) || exit_code=$?
+    if [ $exit_code -eq 124 ]; then
+        # Killed before its single write, so the file is as fetched and the
+        # enrich checkpoint keeps what was resolved for the next run. Enrich
+        # is non-blocking: validate and digest the file without it.
+        [ -n "$pipeline_output" ] && echo "$pipeline_output"
+        log "[WARN] Journal enrich timed out after ${timeout_sec}s (non-blocking): $file"
+        exit_code=0
+        done_msg="validated and digested"
+        pipeline_output=$(python3 "$PIPELINE_SCRIPT" "$file" --domain "$domain_id" --stages validate,digest 2>&1) || exit_code=$?
+    fi
+    if [ $exit_code -ne 0 ]; then
+        log "[ERROR] Data pipeline failed (validate/enrich/digest): $file"
+        [ -n "$pipeline_output" ] && echo "$pipeline_output"
+        return 1
+    fi
+    [ -n "$pipeline_output" ] && echo "$pipeline_output"
+    log "[OK] Data file $done_msg: $file"
     return 0
 }
 
-enrich_journal() {
-    local file="$1"
-    local enrich_output
-    if [ ! -f "$ENRICH_JOURNAL_SCRIPT" ]; then
-        log "[WARN] Journal enrich script not found: $ENRICH_JOURNAL_SCRIPT"
-        return 0
-    fi
-    if ! enrich_output=$(python3 "$ENRICH_JOURNAL_SCRIPT" "$file" 2>&1); then
-        log "[WARN] Journal enrich failed (non-blocking): $file"
-        [ -n "$enrich_output" ] && echo "$enrich_output"
-        return 0
+# Incrementally refresh the related-article table (non-blocking).
+update_related_index() {
+    local related_output
+    if related_output=$(python3 "$RELATED_SCRIPT" 2>&1); then
+        [ -n "$related_output" ] && echo "$related_output"
+    else
+        log "[WARN] Related-article index update failed (non-blocking)"
+        [ -n "$related_output" ] && echo "$related_output"
     fi
-    [ -n "$enrich_output" ] && echo "$enrich_output"
-    log "[OK] Journal names enriched: $file"
-    return 0
 }
 
 run_codex() {
     local title="$1"
     local prompt="$2"
+    local history_key="${3:-codex}"
     local timeout_sec="${CODEX_TIMEOUT_SECONDS:-600}"
+    local limit_args=()
     local provider="${CODEX_PROVIDER:-}"
     local provider_args=()
     local trace_file=""
@@ -136,6 +161,15 @@ run_codex() {
         log "[WARN] Invalid CODEX_TIMEOUT_SECONDS=$timeout_sec, fallback to 600"
         timeout_sec=600
     fi
+    if [ "${CODEX_ADAPTIVE_TIMEOUT:-0}" = "1" ]; then
+        limit_args+=(--adaptive)
+    fi
+    if [[ "${CODEX_MAX_MEMORY_MB:-0}" =~ ^[0-9]+$ ]] && [ "${CODEX_MAX_MEMORY_MB:-0}" -gt 0 ]; then
+        limit_args+=(--max-memory-mb "$CODEX_MAX_MEMORY_MB")
+    fi
+    if [[ "${CODEX_MAX_CPU_SECONDS:-0}" =~ ^[0-9]+$ ]] && [ "${CODEX_MAX_CPU_SECONDS:-0}" -gt 0 ]; then
+        limit_args+=(--max-cpu-seconds "$CODEX_MAX_CPU_SECONDS")
+    fi
     if [ "$timeout_sec" -gt 0 ]; then
         log "⏱️ [$title] timeout: ${timeout_sec}s"
     else
@@ -156,6 +190,8 @@ run_codex() {
         fi
         python3 "$RUN_WITH_TIMEOUT_SCRIPT" \
             --timeout "$timeout_sec" \
+            --key "$history_key" \
+            "${limit_args[@]}" \
             -- \
             codex exec \
             "${provider_args[@]}" \
@@ -175,7 +211,11 @@ run_codex() {
     fi
 
     if [ $exit_code -eq 124 ]; then
-        log "[ERROR] codex timed out after ${timeout_sec}s ($title)"
+        if [ "${CODEX_ADAPTIVE_TIMEOUT:-0}" = "1" ]; then
+            log "[ERROR] codex timed out at its adaptive limit (ceiling ${timeout_sec}s) ($title)"
+        else
+            log "[ERROR] codex timed out after ${timeout_sec}s ($title)"
+        fi
         if rg -qi "(websearch|webfetch|exec|thinking|curl|esearch|efetch|esummary|api)" "$trace_file" 2>/dev/null; then
             log "[WARN] Timeout reached while Codex was still collecting information."
         else
@@ -193,12 +233,12 @@ run_codex() {
     return 0
 }
 
+# Queue a coalesced commit/push of data/ and return immediately; a detached
+# data_sync.py runner batches domains finishing within the debounce window
+# into one commit and pushes in the background (output: logs/sync.log).
 git_sync_data() {
     local mode="$1"
-    local branch
-    local has_data_changes=0
-    local ahead_count=0
-    local git_output=""
+    local sync_output=""
 
     if ! command -v git >/dev/null 2>&1; then
         log "[WARN] git not found; skip auto sync."
@@ -215,66 +255,12 @@ git_sync_data() {
         return 0
     fi
 
-    branch=$(git -C "$PROJECT_DIR" branch --show-current 2>/dev/null || true)
-    if [ -z "$branch" ]; then
-        log "[WARN] Cannot detect current git branch; skip sync."
-        return 0
-    fi
-
-    # Commit only generated data files; avoid accidental code commits.
-    git -C "$PROJECT_DIR" add -A -- \
-        data \
-        >/dev/null 2>&1 || true
-
-    # Need to check both unstaged and staged changes in data/.
-    if ! git -C "$PROJECT_DIR" diff --quiet -- data \
-        || ! git -C "$PROJECT_DIR" diff --cached --quiet -- data; then
-        has_data_changes=1
-    fi
-
-    if [ "$has_data_changes" -eq 1 ]; then
-        if ! git_output=$(git -C "$PROJECT_DIR" commit -m "data: auto-fetch ${mode} ${TODAY}" -- \
-            data \
-            2>&1); then
-            log "[ERROR] git commit failed; skip push."
-            [ -n "$git_output" ] && echo "$git_output"
-            return 1
-        fi
-        [ -n "$git_output" ] && echo "$git_output"
-    fi
-
-    if git -C "$PROJECT_DIR" rev-parse --verify "origin/$branch" >/dev/null 2>&1; then
-        ahead_count=$(git -C "$PROJECT_DIR" rev-list --count "origin/$branch..$branch" 2>/dev/null || echo "0")
-    fi
-
-    if [ "$has_data_changes" -eq 0 ] && [ "$ahead_count" -eq 0 ]; then
-        log "[INFO] No data changes to sync."
-        return 0
-    fi
-
-    if git_output=$(git -C "$PROJECT_DIR" push origin "$branch" 2>&1); then
-        [ -n "$git_output" ] && echo "$git_output"
-        log "[OK] Data synced to GitHub (branch: $branch)"
-        return 0
-    fi
-
-    log "[WARN] Direct git push failed; trying pull --rebase and retry."
-    [ -n "$git_output" ] && echo "$git_output"
-    if ! git_output=$(git -C "$PROJECT_DIR" -c rebase.autoStash=true pull --rebase origin "$branch" 2>&1); then
-        log "[ERROR] git pull --rebase failed; push skipped."
-        [ -n "$git_output" ] && echo "$git_output"
+    if ! sync_output=$(python3 "$DATA_SYNC_SCRIPT" request --label "$mode" 2>&1); then
+        log "[ERROR] Failed to queue data sync."
+        [ -n "$sync_output" ] && echo "$sync_output"
         return 1
     fi
-    [ -n "$git_output" ] && echo "$git_output"
-
-    if ! git_output=$(git -C "$PROJECT_DIR" push origin "$branch" 2>&1); then
-        log "[ERROR] git push failed after rebase retry."
-        [ -n "$git_output" ] && echo "$git_output"
-        return 1
-    fi
-    [ -n "$git_output" ] && echo "$git_output"
-
-    log "[OK] Data synced to GitHub after rebase retry (branch: $branch)"
+    [ -n "$sync_output" ] && echo "$sync_output"
     return 0
 }
 
@@ -284,8 +270,13 @@ run_codex_with_fallback() {
     local prompt="$2"
     local file="$3"
     local domain_id="$4"
+    local history_key="codex-$domain_id"
 
-    run_codex "$title" "$prompt"
+    # The servers free the domains before this one (fetch_jobs.remaining_domains).
+    log "[DOMAIN] $domain_id"
+    # Keep the trivial test write out of the ai timing history.
+    [ "$MODE" = "test" ] && history_key="codex-test"
+    run_codex "$title" "$prompt" "$history_key"
     local rc=$?
     if [ $rc -eq 0 ]; then
         return 0
@@ -346,9 +337,7 @@ run_academic_domain() {
     prompt="${prompt//__ACADEMIC_SKILL_PATH__/$ACADEMIC_SKILL_FILE}"
 
     run_codex_with_fallback "Fetch $label" "$prompt" "$data_file" "$domain_id" || return $?
-    validate_data_file "$data_file" "$domain_id" || return $?
-    enrich_journal "$data_file" || return $?
-    generate_digest "$data_file" "$domain_id" || return $?
+    process_data_file "$data_file" "$domain_id" || return $?
 }
 
 # Run all academic domains (skip domains with skill: daily-ai-news)
@@ -397,30 +386,35 @@ case "$MODE" in
     ai)
         log "📂 AI data file: $AI_DATA_FILE"
         run_codex_with_fallback "Fetch AI News" "$AI_PROMPT" "$AI_DATA_FILE" "ai" || exit $?
-        validate_data_file "$AI_DATA_FILE" "ai" || exit $?
-        generate_digest "$AI_DATA_FILE" "ai" || exit $?
+        process_data_file "$AI_DATA_FILE" "ai" || exit $?
         ;;
     all)
         log "📂 AI data file: $AI_DATA_FILE"
         run_codex_with_fallback "Fetch AI News" "$AI_PROMPT" "$AI_DATA_FILE" "ai" || exit $?
-        validate_data_file "$AI_DATA_FILE" "ai" || exit $?
-        generate_digest "$AI_DATA_FILE" "ai" || exit $?
+        process_data_file "$AI_DATA_FILE" "ai" || exit $?
         run_all_academic_domains || exit $?
         ;;
     test)
         run_codex_with_fallback "Test Write" "$TEST_PROMPT" "$AI_DATA_FILE" "ai" || exit $?
-        validate_data_file "$AI_DATA_FILE" "ai" || exit $?
-        generate_digest "$AI_DATA_FILE" "ai" || exit $?
+        process_data_file "$AI_DATA_FILE" "ai" || exit $?
         ;;
     *)
-        # Treat all positional args as academic domain IDs
+        # Treat all positional args as domain IDs; the server passes an
+        # explicit list (e.g. "ai ad pd") when part of a mode is already running.
         for domain_id in "$@"; do
+            if [ "$domain_id" = "ai" ]; then
+                log "📂 AI data file: $AI_DATA_FILE"
+                run_codex_with_fallback "Fetch AI News" "$AI_PROMPT" "$AI_DATA_FILE" "ai" || exit $?
+                process_data_file "$AI_DATA_FILE" "ai" || exit $?
+                continue
+            fi
             run_academic_domain "$domain_id" || exit $?
         done
         ;;
 esac
 
+update_related_index
 log "✅ Task finished."
-if ! git_sync_data "$MODE"; then
+if ! git_sync_data "${*:-$MODE}"; then
     log "[WARN] Git sync failed, but local fetch artifacts are already generated."
 fi
@@ -13,6 +13,16 @@ AUTO_GIT_SYNC="${AUTO_GIT_SYNC:-1}"
 # 单次 codex 抓取超时（秒）。默认 600（10 分钟），设为 0 表示不限制。
 CODEX_TIMEOUT_SECONDS="${CODEX_TIMEOUT_SECONDS:-600}"
 
+# 按该领域历史运行时长的 p99 x 1.5 自动收紧超时（1=开启，0=关闭）；上面的超时仍是上限。
+CODEX_ADAPTIVE_TIMEOUT="${CODEX_ADAPTIVE_TIMEOUT:-0}"
+
+# 单次 codex 进程的虚拟内存（MiB）与 CPU 时间（秒）上限，0 表示不限制。
+CODEX_MAX_MEMORY_MB="${CODEX_MAX_MEMORY_MB:-0}"
+CODEX_MAX_CPU_SECONDS="${CODEX_MAX_CPU_SECONDS:-0}"
+
+# 学术领域数据文件处理（校验 + 期刊增强 + 摘要）的超时（秒），用于限制卡住的期刊增强。超时后跳过增强、仍校验并生成摘要，增强检查点保留，下次运行续跑；0 表示不限制。
+PIPELINE_TIMEOUT_SECONDS="${PIPELINE_TIMEOUT_SECONDS:-300}"
+
 AI_PROMPT_TEMPLATE='你必须严格执行 daily-ai-news 技能工作流，路径如下：
 - 技能文件：__AI_SKILL_PATH__
 - 来源目录：__AI_SOURCES_DIR__
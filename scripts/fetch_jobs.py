@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Fetch job planning and cancellation shared by both dashboard servers.
+
+A fetch mode names a set of domains: `ai` and `test` write the AI file,
+`all` is ai plus every academic domain, anything else is one academic
+domain. Before a POST /api/fetch starts fetch.sh, plan_fetch() compares the
+requested set with the domains of the jobs already running:
+
+    same task running  nothing is started; the response attaches to the job
+                       already running under the mode's task key, which keeps
+                       its process, logs and cancel handle ("already_running")
+    fully covered      nothing is started; the response names the running
+                       task(s) to follow ("already_running")
+    partly covered     fetch.sh runs only the missing domains
+                       (`fetch.sh ai ad ...`) under the requested mode's task
+                       key, and the response lists what it attached to
+    no overlap         fetch.sh <mode> as before
+
+A job only holds the domains it has not finished: fetch.sh logs
+`[DOMAIN] <id>` as it starts each domain, and remaining_domains() drops the
+ones before it, so a long `all` run frees ai once it has moved on.
+
+POST /api/fetch/cancel stops a job the way run_with_timeout.py does: SIGTERM
+to the job's process group, SIGKILL after CANCEL_GRACE_SECONDS. fetch.sh is
+started in its own session for that; run_with_timeout.py forwards the
+SIGTERM to the codex process group it owns and SIGKILLs that group after its
+own STOP_GRACE_SECONDS. CANCEL_GRACE_SECONDS is longer, so run_with_timeout
+is never killed before it has stopped codex, which would leave codex running
+in its separate session.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from typing import Iterable, Mapping
+
+from run_with_timeout import STOP_GRACE_SECONDS
+
+
+AI_DOMAIN = "ai"
+CANCEL_GRACE_SECONDS = STOP_GRACE_SECONDS + 2.0
+DOMAIN_LINE_RE = re.compile(r"\[DOMAIN\] (\S+)\s*$")
+
+
+def known_mode(mode: str, academic_ids: Iterable[str]) -> bool:
+    """True for the modes fetch.sh runs: ai, test, all or one academic domain id."""
+    return mode in (AI_DOMAIN, "test", "all") or mode in academic_ids
+
+
+def expand_mode(mode: str, academic_ids: Iterable[str]) -> tuple[str, ...]:
+    """Domains a fetch mode writes, in the order fetch.sh runs them."""
+    if mode in (AI_DOMAIN, "test"):
+        return (AI_DOMAIN,)
+    if mode == "all":
+        return (AI_DOMAIN, *(d for d in academic_ids if d != AI_DOMAIN))
+    return (mode,)
+
+
+class FetchPlan:
+    """What to do for one /api/fetch request (see module docstring)."""
+
+    __slots__ = ("mode", "domains", "todo", "attached")
+
+    def __init__(self, mode: str, domains: tuple[str, ...], todo: tuple[str, ...], attached: dict[str, list[str]]):
+        self.mode = mode
+        self.domains = domains
+        self.todo = todo
+        self.attached = attached
+
+    @property
+    def covered(self) -> bool:
+        return not self.todo
+
+    @property
+    def argv(self) -> list[str]:
+        """fetch.sh arguments: the mode itself unless only part of it is left to run."""
+        return [self.mode] if self.todo == self.domains else list(self.todo)
+
+    def response(self, status: str) -> dict:
+        data = {"status": status, "mode": self.mode, "domains": list(self.todo or self.domains)}
+        if self.attached:
+            data["attached"] = [{"task": key, "domains": domains} for key, domains in self.attached.items()]
+        return data
+
+
+def task_key_for(mode: str) -> str:
+    return f"fetch_{mode}"
+
+
+def plan_fetch(mode: str, academic_ids: Iterable[str], running: Mapping[str, Iterable[str]]) -> FetchPlan:
+    """Plan `mode` against `running` ({task key: domains} of live jobs)."""
+    domains = expand_mode(mode, academic_ids)
+    own_key = task_key_for(mode)
+    if own_key in running:
+        # Starting the leftovers under the same key would orphan the running job.
+        return FetchPlan(mode, domains, (), {own_key: list(running[own_key])})
+    attached: dict[str, list[str]] = {}
+    busy: set[str] = set()
+    for task_key, task_domains in running.items():
+        overlap = [d for d in domains if d in set(task_domains)]
+        if overlap:
+            attached[task_key] = overlap
+            busy.update(overlap)
+    todo = tuple(d for d in domains if d not in busy)
+    return FetchPlan(mode, domains, todo, attached)
+
+
+def remaining_domains(domains: tuple[str, ...], lines: Iterable[str]) -> tuple[str, ...]:
+    """`domains` of a running job minus those finished before the last `[DOMAIN]` line in `lines`."""
+    for line in lines:
+        match = DOMAIN_LINE_RE.search(line)
+        if match and match.group(1) in domains:
+            domains = domains[domains.index(match.group(1)):]
+    return domains
+
+
+def signal_group(pid: int, sig: int) -> bool:
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def group_alive(pid: int) -> bool:
+    """True while any process of the group `pid` leads is left (fetch.sh may exit before its children)."""
+    return signal_group(pid, 0)
+
+
+def terminate_group(proc: subprocess.Popen, grace: float = CANCEL_GRACE_SECONDS) -> threading.Thread | None:
+    """SIGTERM the process group of `proc` now and SIGKILL it after `grace` seconds if still alive.
+
+    Returns the escalation thread (already started), or None if the process was gone.
+    """
+    if proc.poll() is not None or not signal_group(proc.pid, signal.SIGTERM):
+        return None
+    deadline = time.monotonic() + grace
+
+    def escalate() -> None:
+        try:
+            proc.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            pass
+        while group_alive(proc.pid) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        signal_group(proc.pid, signal.SIGKILL)
+
+    thread = threading.Thread(target=escalate, daemon=True)
+    thread.start()
+    return thread
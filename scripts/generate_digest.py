@@ -4,115 +4,17 @@
 from __future__ import annotations
 
 import argparse
-import json
+import gzip
 import os
 from collections import Counter
 from datetime import datetime, timezone
 
-
-AI_MODEL_KEYWORDS = {
-    "model",
-    "llm",
-    "foundation model",
-    "open-weights",
-    "checkpoint",
-    "release",
-    "released",
-    "gpt",
-    "claude",
-    "gemini",
-    "sonnet",
-    "reasoning model",
-}
-
-AI_ARCH_KEYWORDS = {
-    "architecture",
-    "transformer",
-    "moe",
-    "mixture-of-experts",
-    "agent",
-    "multi-agent",
-    "orchestrator",
-    "framework",
-    "sdk",
-    "inference",
-    "benchmark",
-    "pipeline",
-}
-
-AI_BUSINESS_KEYWORDS = {
-    "acquisition",
-    "acquire",
-    "acquired",
-    "merger",
-    "merge",
-    "funding",
-    "raised",
-    "valuation",
-    "ipo",
-    "earnings",
-    "revenue",
-    "partnership",
-    "lawsuit",
-    "antitrust",
-}
-
-RESEARCH_ANALYSIS_KEYWORDS = {
-    "mri",
-    "fmri",
-    "dti",
-    "diffusion",
-    "tensor",
-    "voxel",
-    "connectivity",
-    "functional connectivity",
-    "multimodal",
-    "machine learning",
-    "deep learning",
-    "analysis",
-    "perfusion",
-    "spectroscopy",
-    "resting-state",
-    "graph",
-    "biomarker",
-}
-
-RESEARCH_MECHANISM_KEYWORDS = {
-    "mechanism",
-    "pathophysiology",
-    "neural",
-    "circuit",
-    "network",
-    "disease",
-    "alzheimer",
-    "amyloid",
-    "tau",
-    "autism",
-    "depression",
-    "adhd",
-    "parkinson",
-    "schizophrenia",
-    "cognitive decline",
-}
-
-
-def count_hits(text: str, keywords: set[str]) -> int:
-    return sum(1 for kw in keywords if kw in text)
-
-
-def article_text(article: dict) -> str:
-    return " ".join(
-        str(article.get(k, ""))
-        for k in ("title", "summary", "source", "subcategory", "category")
-    ).lower()
-
-
-def priority_from_score(score: int) -> str:
-    if score >= 5:
-        return "high"
-    if score >= 2:
-        return "medium"
-    return "low"
+from data_sync import unchanged_on_disk
+from json_codec import file_bytes, read_file
+from near_dup import find_near_duplicates, load_window, source_label
+from profiling import run_main
+from rollups import record_payload
+from scoring import ArticleBatch, ScoringProfile, get_profile
 
 
 def infer_kind(domain_id: str, articles: list[dict]) -> str:
@@ -125,73 +27,45 @@ def infer_kind(domain_id: str, articles: list[dict]) -> str:
 
 
 def score_ai(article: dict) -> dict:
-    text = article_text(article)
-    model_hits = count_hits(text, AI_MODEL_KEYWORDS)
-    arch_hits = count_hits(text, AI_ARCH_KEYWORDS)
-    business_hits = count_hits(text, AI_BUSINESS_KEYWORDS)
-
-    score = model_hits * 3 + arch_hits * 2 - business_hits * 3
-    if model_hits == 0 and arch_hits == 0 and business_hits == 0:
-        score = 1
-
-    reasons = []
-    if model_hits:
-        reasons.append("mentions new models or releases")
-    if arch_hits:
-        reasons.append("contains architecture/agent/framework signals")
-    if business_hits:
-        reasons.append("business-heavy content (deprioritized)")
-    if not reasons:
-        reasons.append("general AI update")
-
-    return {
-        "score": score,
-        "priority": priority_from_score(score),
-        "reason": "; ".join(reasons),
-        "model_hits": model_hits,
-        "arch_hits": arch_hits,
-        "business_hits": business_hits,
-    }
+    return get_profile(kind="ai").score_batch(ArticleBatch([article]))[0]
 
 
 def score_research(article: dict) -> dict:
-    text = article_text(article)
-    analysis_hits = count_hits(text, RESEARCH_ANALYSIS_KEYWORDS)
-    mechanism_hits = count_hits(text, RESEARCH_MECHANISM_KEYWORDS)
-
-    score = analysis_hits * 2 + mechanism_hits * 3
-    if analysis_hits == 0 and mechanism_hits == 0:
-        score = 1
-
-    reasons = []
-    if mechanism_hits:
-        reasons.append("has disease/neural mechanism relevance")
-    if analysis_hits:
-        reasons.append("has imaging analysis/method relevance")
-    if not reasons:
-        reasons.append("general literature update")
+    return get_profile(kind="research").score_batch(ArticleBatch([article]))[0]
 
-    return {
-        "score": score,
-        "priority": priority_from_score(score),
-        "reason": "; ".join(reasons),
-        "analysis_hits": analysis_hits,
-        "mechanism_hits": mechanism_hits,
-    }
 
+def build_digest(
+    payload: dict,
+    domain_id: str,
+    profile: ScoringProfile | None = None,
+    batch: ArticleBatch | None = None,
+    history: list[dict] | None = None,
+) -> dict:
+    """Score and rank one day's articles.
 
-def build_digest(payload: dict, domain_id: str) -> dict:
+    `history` holds past-window articles (see load_history); it is only used
+    by profiles with near-duplicate clustering enabled.
+    """
     articles = payload.get("articles")
     if not isinstance(articles, list):
         articles = []
 
-    kind = infer_kind(domain_id, articles)
-    scored = []
-    for article in articles:
-        if not isinstance(article, dict):
-            continue
-        metrics = score_ai(article) if kind == "ai" else score_research(article)
-        scored.append({"article": article, "metrics": metrics})
+    if profile is None:
+        profile = get_profile(kind=infer_kind(domain_id, articles))
+    kind = profile.kind
+    if batch is None:
+        batch = ArticleBatch(articles, str(payload.get("date", "")))
+    scored = [
+        {"index": i, "article": article, "metrics": metrics}
+        for i, (article, metrics) in enumerate(zip(batch.articles, profile.score_batch(batch)))
+    ]
+
+    clusters, first_seen = [], {}
+    if profile.near_duplicates:
+        clusters, first_seen = find_near_duplicates(
+            batch.articles, history, profile.near_duplicates["threshold"]
+        )
+    cluster_of = {i: members for members in clusters for i in members}
 
     high = sum(1 for item in scored if item["metrics"]["priority"] == "high")
     medium = sum(1 for item in scored if item["metrics"]["priority"] == "medium")
@@ -200,20 +74,20 @@ def build_digest(payload: dict, domain_id: str) -> dict:
     topic_counts = Counter()
     if kind == "ai":
         topic_counts["new_model"] = sum(
-            1 for item in scored if item["metrics"]["model_hits"] > 0
+            1 for item in scored if item["metrics"].get("model_hits", 0) > 0
         )
         topic_counts["new_architecture"] = sum(
-            1 for item in scored if item["metrics"]["arch_hits"] > 0
+            1 for item in scored if item["metrics"].get("arch_hits", 0) > 0
         )
         topic_counts["business_noise"] = sum(
-            1 for item in scored if item["metrics"]["business_hits"] > 0
+            1 for item in scored if item["metrics"].get("business_hits", 0) > 0
         )
     else:
         topic_counts["mechanism"] = sum(
-            1 for item in scored if item["metrics"]["mechanism_hits"] > 0
+            1 for item in scored if item["metrics"].get("mechanism_hits", 0) > 0
         )
         topic_counts["analysis"] = sum(
-            1 for item in scored if item["metrics"]["analysis_hits"] > 0
+            1 for item in scored if item["metrics"].get("analysis_hits", 0) > 0
         )
 
     # Prefer high-score content; keep deterministic fallback.
@@ -227,18 +101,35 @@ def build_digest(payload: dict, domain_id: str) -> dict:
         reverse=True,
     )
     recommendations = []
+    emitted = set()
     for item in ranked:
+        if item["index"] in emitted:
+            continue
         article = item["article"]
         metrics = item["metrics"]
-        recommendations.append(
-            {
-                "title": article.get("title", ""),
-                "url": article.get("url", ""),
-                "published_date": article.get("published_date", ""),
-                "priority": metrics["priority"],
-                "reason": metrics["reason"],
-            }
-        )
+        recommendation = {
+            "title": article.get("title", ""),
+            "url": article.get("url", ""),
+            "published_date": article.get("published_date", ""),
+            "priority": metrics["priority"],
+            "score": metrics["score"],
+            "reason": metrics["reason"],
+        }
+        # The best-ranked member of a near-duplicate cluster stands for the story.
+        members = cluster_of.get(item["index"], [item["index"]])
+        emitted.update(members)
+        alternates = [batch.articles[j] for j in members if j != item["index"]]
+        if alternates:
+            recommendation["alternate_sources"] = [
+                {"title": alt.get("title", ""), "url": alt.get("url", ""), "source": source_label(alt.get("url", ""))}
+                for alt in alternates
+            ]
+        seen = min((first_seen[j] for j in members if j in first_seen), key=lambda s: s["date"], default=None)
+        if seen:
+            recommendation["first_seen"] = seen["date"]
+            recommendation["first_seen_url"] = seen["url"]
+        recommendations.append(recommendation)
+    collapsed = sum(len(members) - 1 for members in clusters)
 
     if kind == "ai":
         summary = (
@@ -247,6 +138,8 @@ def build_digest(payload: dict, domain_id: str) -> dict:
             f"{low} low-priority. {topic_counts['business_noise']} business-heavy items "
             "were deprioritized."
         )
+        if collapsed:
+            summary += f" {collapsed} near-duplicate items were merged into {len(clusters)} stories."
         preference = {
             "focus": ["new models", "new technical architecture"],
             "deprioritize": ["M&A and business-only updates"],
@@ -272,42 +165,105 @@ def build_digest(payload: dict, domain_id: str) -> dict:
             {"topic": "imaging analysis", "count": topic_counts["analysis"]},
         ]
 
+    stats = {
+        "total": len(scored),
+        "high_priority": high,
+        "medium_priority": medium,
+        "low_priority": low,
+    }
+    if profile.near_duplicates:
+        stats["duplicates_collapsed"] = collapsed
+
     return {
         "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
         "version": 1,
+        "profile": profile.id,
         "summary": summary,
         "preference": preference,
-        "stats": {
-            "total": len(scored),
-            "high_priority": high,
-            "medium_priority": medium,
-            "low_priority": low,
-        },
+        "stats": stats,
         "focus_topics": [t for t in focus_topics if t["count"] > 0],
         "recommendations": recommendations,
     }
 
 
-def write_json(path: str, payload: dict) -> None:
+def build_digests_for_profiles(
+    payload: dict,
+    domain_id: str,
+    profile_ids: list[str],
+    history: list[dict] | None = None,
+) -> dict[str, dict]:
+    """Rank one day under several profiles, sharing a single ArticleBatch."""
+    articles = payload.get("articles")
+    if not isinstance(articles, list):
+        articles = []
+    batch = ArticleBatch(articles, str(payload.get("date", "")))
+    kind = infer_kind(domain_id, articles)
+    return {
+        profile_id: build_digest(payload, domain_id, get_profile(profile_id, kind), batch, history)
+        for profile_id in profile_ids
+    }
+
+
+def load_history(path: str, payload: dict, profile: ScoringProfile) -> list[dict]:
+    """Past-window articles for near-duplicate matching; empty unless the profile asks for them."""
+    if not profile.near_duplicates:
+        return []
+    return load_window(path, str(payload.get("date", "")), profile.near_duplicates["window_days"])
+
+
+def write_json(path: str, payload: dict) -> bool:
+    """Atomically write the data file and its precompressed <path>.gz sidecar.
+
+    The sidecar is replaced after the JSON so its mtime is never older; the
+    server only serves it while that holds, so a later plain rewrite of the
+    JSON (e.g. a standalone enrich run) makes the stale sidecar fall back.
+    Nothing is written when the file differs only in volatile timestamps
+    (see data_sync.unchanged_on_disk); returns whether the file was written.
+    """
+    sidecar = f"{path}.gz"
+    if unchanged_on_disk(path, payload):
+        try:
+            if os.stat(sidecar).st_mtime >= os.stat(path).st_mtime:
+                return False
+        except OSError:
+            pass
+    body = file_bytes(payload)
     tmp_path = f"{path}.tmp"
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
-        f.write("\n")
+    gz_tmp_path = f"{path}.gz.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    with open(gz_tmp_path, "wb") as f:
+        f.write(gzip.compress(body, compresslevel=9, mtime=0))
     os.replace(tmp_path, path)
+    os.replace(gz_tmp_path, sidecar)
+    if isinstance(payload.get("digest"), dict):
+        try:
+            record_payload(path, payload)
+        except Exception as exc:
+            print(f"[WARN] Rollup update failed (non-blocking): {path} ({exc})")
+    return True
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Generate digest summary for fetched data")
     parser.add_argument("file", help="Target JSON data file")
     parser.add_argument("domain_id", nargs="?", default="", help="Domain id (e.g. ai, brainmri)")
+    parser.add_argument(
+        "--profile",
+        default="",
+        help="Scoring profile id from scoring_profiles.json (default: per-kind default)",
+    )
     args = parser.parse_args()
 
-    with open(args.file, "r", encoding="utf-8") as f:
-        payload = json.load(f)
+    payload = read_file(args.file)
     if not isinstance(payload, dict):
         raise ValueError("Top-level JSON payload must be an object")
 
-    payload["digest"] = build_digest(payload, args.domain_id.strip().lower())
+    domain_id = args.domain_id.strip().lower()
+    articles = payload.get("articles") if isinstance(payload.get("articles"), list) else []
+    profile = get_profile(args.profile, infer_kind(domain_id, articles))
+    history = load_history(args.file, payload, profile)
+    payload["digest"] = build_digest(payload, domain_id, profile, history=history)
     write_json(args.file, payload)
 
     print(f"Digest generated: {args.file}")
@@ -315,4 +271,4 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(run_main(main))
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""Shared HTTP client with on-disk response cache and record/replay modes.
+
+Used by enrich_journal.py for PubMed esummary and LetPub lookups so that
+retries and reruns do not hit upstream again, and so that a captured run
+can be replayed fully offline.
+
+Modes (HTTP_MODE env var or --http-mode):
+  live    — use cache when fresh, revalidate stale entries (ETag/Last-Modified)
+  record  — always fetch from network and store every response
+  replay  — serve only from cache; a miss raises ReplayMissError
+  off     — bypass the cache entirely (plain urllib)
+"""
+
+from __future__ import annotations
+
+import atexit
+import fcntl
+import hashlib
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from json_codec import dumpb, read_file
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_DIR = PROJECT_DIR / ".cache" / "http"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 24 * 3600
+ACCESS_FLUSH_SECONDS = 30
+HTTP_MODES = ("live", "record", "replay", "off")
+RETRYABLE_ERRORS = (urllib.error.URLError, urllib.error.HTTPError, TimeoutError, ConnectionError)
+
+
+class ReplayMissError(urllib.error.URLError):
+    """Raised in replay mode when a request has no captured response."""
+
+
+def request_key(method: str, url: str) -> str:
+    return hashlib.sha256(f"{method.upper()} {url}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed response store with a size-capped LRU index.
+
+    Bodies live under blobs/<sha[:2]>/<sha> keyed by their own SHA-256, so
+    identical responses for different URLs are stored once. index.json maps
+    request keys to blob hashes plus validators and access times.
+
+    Several processes (e.g. one pipeline.py per domain) share a cache
+    directory: each save takes an flock on index.lock, re-reads index.json
+    and writes it back with only this instance's changes applied, so entries
+    stored by others are kept and eviction sees every entry. Access times of
+    cache hits are written with the next save, at most ACCESS_FLUSH_SECONDS
+    after the hit, or at exit.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.index_path = self.root / "index.json"
+        self.lock_path = self.root / "index.lock"
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = self._load_index()
+        # Entries changed (or dropped: None) since the last save.
+        self._changes: dict[str, dict | None] = {}
+        self._saved_at = time.monotonic()
+        atexit.register(self.flush)
+
+    def _load_index(self) -> dict[str, dict]:
+        if not self.index_path.exists():
+            return {}
+        try:
+            raw = read_file(self.index_path)
+        except (OSError, ValueError):
+            return {}
+        entries = raw.get("entries", {}) if isinstance(raw, dict) else {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _index_lock(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        lock_file = self.lock_path.open("a")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def _save_index(self) -> None:
+        with self._index_lock():
+            self._write_merged()
+
+    def _write_merged(self) -> None:
+        """Apply pending changes to the on-disk index, evict and write it; caller holds both locks."""
+        entries = self._load_index()
+        for key, entry in self._changes.items():
+            if entry is None:
+                entries.pop(key, None)
+                continue
+            current = entries.get(key)
+            if current is not None and float(current.get("stored_at", 0)) > float(entry.get("stored_at", 0)):
+                # Stored again by another process since: keep its response, merge the access time.
+                entry.update(current, last_access=max(current.get("last_access", 0), entry.get("last_access", 0)))
+            entries[key] = entry
+        self._entries = entries
+        self._changes.clear()
+        self._evict()
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        tmp_path.write_bytes(dumpb({"schema_version": 1, "entries": self._entries}) + b"\n")
+        os.replace(tmp_path, self.index_path)
+        self._saved_at = time.monotonic()
+
+    def flush(self) -> None:
+        """Write pending access times (registered with atexit)."""
+        with self._lock:
+            if self._changes:
+                self._save_index()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / digest
+
+    def get(self, key: str) -> tuple[dict, bytes] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            try:
+                body = self._blob_path(entry["blob"]).read_bytes()
+            except OSError:
+                self._entries.pop(key, None)
+                self._changes[key] = None
+                self._save_index()
+                return None
+            entry["last_access"] = time.time()
+            self._changes[key] = entry
+            if time.monotonic() - self._saved_at >= ACCESS_FLUSH_SECONDS:
+                self._save_index()
+            return dict(entry), body
+
+    def touch(self, key: str, headers: dict[str, str]) -> None:
+        """Mark an entry as revalidated (e.g. after a 304) and refresh validators."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            now = time.time()
+            entry["stored_at"] = now
+            entry["last_access"] = now
+            entry.update(_validators(headers, entry))
+            self._changes[key] = entry
+            self._save_index()
+
+    def put(self, key: str, url: str, body: bytes, headers: dict[str, str]) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(digest)
+        # The blob is written under the index lock so another process's
+        # eviction cannot unlink it before the entry pointing at it is saved.
+        with self._lock, self._index_lock():
+            if not blob_path.exists():
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = blob_path.with_suffix(".tmp")
+                tmp_path.write_bytes(body)
+                os.replace(tmp_path, blob_path)
+            now = time.time()
+            self._changes[key] = {
+                "url": url,
+                "blob": digest,
+                "size": len(body),
+                "stored_at": now,
+                "last_access": now,
+                **_validators(headers, {}),
+            }
+            self._write_merged()
+
+    def _evict(self) -> None:
+        blob_sizes: dict[str, int] = {}
+        for entry in self._entries.values():
+            blob_sizes[entry["blob"]] = int(entry.get("size", 0))
+        total = sum(blob_sizes.values())
+        if total <= self.max_bytes:
+            return
+        refs: dict[str, int] = {}
+        for entry in self._entries.values():
+            refs[entry["blob"]] = refs.get(entry["blob"], 0) + 1
+        for key in sorted(self._entries, key=lambda k: self._entries[k].get("last_access", 0)):
+            if total <= self.max_bytes:
+                break
+            entry = self._entries.pop(key)
+            digest = entry["blob"]
+            refs[digest] -= 1
+            if refs[digest] == 0:
+                total -= blob_sizes[digest]
+                try:
+                    self._blob_path(digest).unlink()
+                except OSError:
+                    pass
+
+
+def _validators(headers: dict[str, str], fallback: dict) -> dict:
+    lowered = {k.lower(): v for k, v in headers.items()}
+    return {
+        "etag": lowered.get("etag", fallback.get("etag", "")),
+        "last_modified": lowered.get("last-modified", fallback.get("last_modified", "")),
+    }
+
+
+class HttpClient:
+    """GET-only HTTP client with retry, caching and record/replay support."""
+
+    def __init__(
+        self,
+        mode: str = "live",
+        cache: ResponseCache | None = None,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ):
+        if mode not in HTTP_MODES:
+            raise ValueError(f"unknown http mode: {mode} (expected one of {', '.join(HTTP_MODES)})")
+        if mode != "off" and cache is None:
+            raise ValueError(f"http mode {mode} requires a response cache")
+        self.mode = mode
+        self.cache = cache
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "network": 0}
+
+    def get(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+        timeout: int = 20,
+        retries: int = 3,
+        ttl_seconds: int | None = None,
+    ) -> bytes:
+        """Return the response body for url; raise a urllib error after final retry."""
+        headers = dict(headers or {})
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        key = request_key("GET", url)
+        cached = self.cache.get(key) if self.cache is not None and self.mode != "off" else None
+
+        if self.mode == "replay":
+            if cached is None:
+                self.stats["misses"] += 1
+                raise ReplayMissError(f"no recorded response for {url}")
+            self.stats["hits"] += 1
+            return cached[1]
+
+        if self.mode == "live" and cached is not None:
+            entry, body = cached
+            if time.time() - float(entry.get("stored_at", 0)) < ttl:
+                self.stats["hits"] += 1
+                return body
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        self.stats["misses"] += 1
+        last_err: Exception | None = None
+        for attempt in range(1, retries + 1):
+            try:
+                self.stats["network"] += 1
+                req = urllib.request.Request(url, headers=headers)
+                with urllib.request.urlopen(req, timeout=timeout) as resp:
+                    body = resp.read()
+                    resp_headers = dict(resp.headers.items())
+                if self.cache is not None and self.mode != "off":
+                    self.cache.put(key, url, body, resp_headers)
+                return body
+            except urllib.error.HTTPError as exc:
+                if exc.code == 304 and cached is not None:
+                    self.stats["revalidated"] += 1
+                    self.cache.touch(key, dict(exc.headers.items()))
+                    return cached[1]
+                last_err = exc
+            except RETRYABLE_ERRORS as exc:
+                last_err = exc
+            if attempt < retries:
+                time.sleep(0.8 * attempt)
+        assert last_err is not None
+        raise last_err
+
+
+_default_client: HttpClient | None = None
+
+
+def client_from_env(mode: str | None = None, cache_dir: str | None = None) -> HttpClient:
+    """Build a client from HTTP_MODE / HTTP_CACHE_DIR / HTTP_CACHE_MAX_MB / HTTP_CACHE_TTL_SECONDS."""
+    mode = (mode or os.environ.get("HTTP_MODE", "live")).strip().lower()
+    root = Path(cache_dir or os.environ.get("HTTP_CACHE_DIR", "") or DEFAULT_CACHE_DIR)
+    max_mb = os.environ.get("HTTP_CACHE_MAX_MB", "")
+    max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+    ttl = int(os.environ.get("HTTP_CACHE_TTL_SECONDS", "") or DEFAULT_TTL_SECONDS)
+    cache = None if mode == "off" else ResponseCache(root, max_bytes=max_bytes)
+    return HttpClient(mode=mode, cache=cache, ttl_seconds=ttl)
+
+
+def get_default_client() -> HttpClient:
+    global _default_client
+    if _default_client is None:
+        _default_client = client_from_env()
+    return _default_client
+
+
+def set_default_client(client: HttpClient) -> None:
+    global _default_client
+    _default_client = client
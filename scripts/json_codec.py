@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""JSON encoding and decoding shared by every script and both servers.
+
+orjson is used when it is installed (`pip install orjson`); otherwise, or
+with JSON_BACKEND=json, everything goes through the stdlib json module. Both
+write UTF-8 with non-ASCII characters kept as is (ensure_ascii=False),
+compact `{"a":1}` by default and, with pretty=True, the same 2-space layout
+as json.dumps(indent=2). Values orjson refuses (e.g. integers beyond 64
+bits) are encoded by the stdlib instead.
+
+For strings, integers, booleans, None, lists and dicts the bytes are the
+same with either backend. Floats are not always: they parse back to the same
+value, but exponents are spelled differently (1e-05 vs 0.00001, 1e+16 vs
+1e16), and NaN/Infinity come out as the non-standard NaN/Infinity literals
+from the stdlib but as null from orjson. orjson also encodes dataclasses,
+datetimes, enums and UUIDs, which the stdlib rejects with TypeError.
+
+Files under data/ (daily payloads, data/letpub/) are committed to git, so
+they are written pretty by default; JSON_COMPACT=1 writes them without
+indentation instead, which is smaller and faster to load and dump. Readers
+accept both layouts. bench_json.py measures the difference on the real files:
+
+    python3 scripts/bench_json.py --repeat 5
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Decode errors of both backends (orjson.JSONDecodeError subclasses it).
+JSONDecodeError = json.JSONDecodeError
+
+
+def _std_loads(data: bytes | str) -> object:
+    return json.loads(data)
+
+
+def _std_dumpb(obj: object, pretty: bool = False) -> bytes:
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+if orjson is not None:
+
+    def _orjson_loads(data: bytes | str) -> object:
+        return orjson.loads(data)
+
+    def _orjson_dumpb(obj: object, pretty: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            return _std_dumpb(obj, pretty)
+
+
+BACKENDS = {"json": (_std_loads, _std_dumpb)}
+if orjson is not None:
+    BACKENDS["orjson"] = (_orjson_loads, _orjson_dumpb)
+
+BACKEND = os.environ.get("JSON_BACKEND", "") or ("orjson" if orjson is not None else "json")
+if BACKEND not in BACKENDS:
+    BACKEND = "json"
+loads, dumpb = BACKENDS[BACKEND]
+
+
+def dumps(obj: object, pretty: bool = False) -> str:
+    """Like dumpb() but returns str (for f-strings, print and text files)."""
+    return dumpb(obj, pretty).decode("utf-8")
+
+
+def compact_files() -> bool:
+    return os.environ.get("JSON_COMPACT", "") not in ("", "0")
+
+
+def file_bytes(obj: object) -> bytes:
+    """Encoded data file contents in the configured on-disk layout, newline-terminated."""
+    return dumpb(obj, not compact_files()) + b"\n"
+
+
+def read_file(path: str | Path) -> object:
+    """Parsed JSON of `path`; raises OSError or JSONDecodeError."""
+    with open(path, "rb") as f:
+        return loads(f.read())
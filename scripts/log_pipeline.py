@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Log ingestion for fetch subprocesses started by the dashboard servers.
+
+The noise filter and the raw log run in a filter process of their own (this
+script, started with filter_command()), so regex work on bursty fetch output
+never competes with request handling in the server process. fetch.sh writes
+into the filter's stdin. Inside it, a reader thread only moves raw lines off
+the pipe and an ingest thread drains whatever has accumulated, appends the
+full unfiltered stream to a rotating file under logs/, applies one
+precompiled noise filter and writes the surviving lines to stdout as a
+single batch. The server reads that stdout in chunks (read_batches()), so
+under bursts (e.g. thousands of opencode bus messages) its subscribers, and
+the lock behind them, are hit once per batch instead of once per line; when
+output is sparse each line is still delivered immediately.
+
+    python3 scripts/log_pipeline.py logs/server-fetch_ai.log < output
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import queue
+import re
+import sys
+import threading
+from typing import Callable, Iterable, Iterator
+
+from profiling import run_main
+
+
+ANSI_ESCAPE_RE = re.compile(r"\x1b\[[0-9;]*m")
+# INFO level markers, plus opencode internal bus messages
+# (service=bus, message.part.updated, etc.).
+NOISE_RE = re.compile(
+    r'(?i:\[INFO\]|\bINFO\[|\blevel=info\b|"level"\s*:\s*"info")'
+    r"|^INFO\s"
+    r"|service=bus|type=message\.|message\.part\."
+)
+MAX_LINE_CHARS = 500
+MAX_BATCH_LINES = 256
+READ_CHUNK = 64 * 1024
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+_EOF = object()
+
+
+def clean_line(raw: str) -> str:
+    """Strip trailing whitespace and ANSI colors; skip the regex when no escape is present."""
+    line = raw.rstrip()
+    if "\x1b" in line:
+        line = ANSI_ESCAPE_RE.sub("", line)
+    return line
+
+
+def is_noise(line: str) -> bool:
+    return NOISE_RE.search(line) is not None
+
+
+def filter_lines(raw_lines: Iterable[str]) -> list[str]:
+    """Return the SSE view of raw lines: cleaned, non-empty, non-noise, truncated."""
+    out = []
+    for raw in raw_lines:
+        line = clean_line(raw)
+        if not line or is_noise(line):
+            continue
+        if len(line) > MAX_LINE_CHARS:
+            line = line[:MAX_LINE_CHARS] + "  …[truncated]"
+        out.append(line)
+    return out
+
+
+class RotatingLogWriter:
+    """Append-only text log rotated by size (path, path.1 … path.N)."""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+
+    def write_lines(self, lines: list[str]) -> None:
+        if not lines:
+            return
+        # Sized in bytes: max_bytes caps the file on disk, and CJK text is 3 bytes a character.
+        chunk = "".join(line if line.endswith("\n") else line + "\n" for line in lines).encode("utf-8", "replace")
+        if self._size and self._size + len(chunk) > self.max_bytes:
+            self._rotate()
+        self._file.write(chunk)
+        self._file.flush()
+        self._size += len(chunk)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "wb")
+        self._size = 0
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class LogIngestor:
+    """Pump a text stream into a raw log file and a batched, filtered sink (inside the filter process)."""
+
+    def __init__(
+        self,
+        stream,
+        sink: Callable[[list[str]], None],
+        raw_writer: RotatingLogWriter | None = None,
+    ):
+        self.stream = stream
+        self.sink = sink
+        self.raw_writer = raw_writer
+        self._pending: queue.SimpleQueue = queue.SimpleQueue()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._ingest = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "LogIngestor":
+        self._reader.start()
+        self._ingest.start()
+        return self
+
+    def join(self) -> None:
+        self._reader.join()
+        self._ingest.join()
+
+    def _read(self) -> None:
+        try:
+            for line in iter(self.stream.readline, ""):
+                self._pending.put(line)
+        finally:
+            self._pending.put(_EOF)
+
+    def _run(self) -> None:
+        done = False
+        try:
+            while not done:
+                batch = [self._pending.get()]
+                while len(batch) < MAX_BATCH_LINES:
+                    try:
+                        batch.append(self._pending.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch[-1] is _EOF:
+                    batch.pop()
+                    done = True
+                if self.raw_writer is not None:
+                    self.raw_writer.write_lines(batch)
+                lines = filter_lines(batch)
+                if lines:
+                    self.sink(lines)
+        finally:
+            if self.raw_writer is not None:
+                self.raw_writer.close()
+
+
+def filter_command(raw_path: str) -> list[str]:
+    """argv of the filter process for one fetch job; `raw_path` receives the unfiltered output."""
+    return [sys.executable, os.path.abspath(__file__), raw_path]
+
+
+def read_batches(stream) -> Iterator[list[str]]:
+    """Lines written by the filter process, one list per read of whatever has accumulated."""
+    fd = stream.fileno()
+    pending = b""
+    while chunk := os.read(fd, READ_CHUNK):
+        *complete, pending = (pending + chunk).split(b"\n")
+        if complete:
+            yield [line.decode("utf-8", errors="replace") for line in complete]
+    if pending:
+        yield [pending.decode("utf-8", errors="replace")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Filter fetch output from stdin: raw log to a file, SSE view to stdout")
+    parser.add_argument("raw_log", help="Rotating file for the unfiltered output")
+    args = parser.parse_args()
+    sys.stdin.reconfigure(encoding="utf-8", errors="replace")
+
+    out = sys.stdout.buffer
+    reader_gone = False
+
+    def emit(lines: list[str]) -> None:
+        nonlocal reader_gone
+        if reader_gone:
+            return
+        try:
+            out.write("".join(line + "\n" for line in lines).encode("utf-8", "replace"))
+            out.flush()
+        except BrokenPipeError:
+            # The server went away: keep draining fetch.sh into the raw log.
+            reader_gone = True
+            os.dup2(os.open(os.devnull, os.O_WRONLY), out.fileno())
+
+    LogIngestor(sys.stdin, emit, RotatingLogWriter(args.raw_log)).start().join()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Request metrics for the dashboard servers, rendered in Prometheus text format.
+
+Each server owns a RequestMetrics and calls observe() once per finished
+request. Counters live in per-thread shards, so observe() itself takes no
+lock: a handler thread registers its shard on its first request and folds it
+into a retired total through retire_thread() when its connection ends (the
+threaded server calls it from the handler's finish()), so the number of
+shards is bounded by the live connections. /metrics merges the retired total
+with the live shards when it is scraped. Gauges such as SSE subscribers or
+running fetches are not tracked on the request path at all: callbacks
+registered with add_gauge() read them from server state at scrape time.
+
+Routes are collapsed to a fixed label set (API paths, "/data/", "static")
+so a crawler cannot blow up label cardinality. Streaming routes are counted
+but left out of the latency histogram, where their lifetime would swamp it.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "dailynews"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+API_ROUTES = frozenset(
+    {
+        "/api/status",
+        "/api/dates",
+        "/api/domains",
+        "/api/events",
+        "/api/stream",
+        "/api/trends",
+        "/api/related",
+        "/api/export",
+        "/api/digest/rolling",
+        "/api/fetch",
+        "/api/fetch/cancel",
+        "/api/debug/profile",
+        "/metrics",
+    }
+)
+STREAMING_ROUTES = frozenset({"/api/events", "/api/stream"})
+
+# A gauge callback returns (labels, value) pairs read from live server state.
+GaugeSamples = Iterable[tuple[dict[str, str], float]]
+
+
+def route_label(path: str) -> str:
+    if path in API_ROUTES:
+        return path
+    if path.startswith("/api/"):
+        return "/api/other"
+    if path.startswith("/data/"):
+        return "/data/"
+    return "static"
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: dict[str, str]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Shard:
+    """Counters written by exactly one thread."""
+
+    __slots__ = ("owner", "buckets", "sums", "requests", "sizes")
+
+    def __init__(self, owner: threading.Thread | None):
+        self.owner = owner
+        self.buckets: dict[tuple[str, str], list[int]] = {}
+        self.sums: dict[tuple[str, str], float] = {}
+        self.requests: dict[tuple[str, str, str], int] = {}
+        self.sizes: dict[str, int] = {}
+
+    def merge(self, other: "_Shard") -> None:
+        for key, counts in dict(other.buckets).items():
+            mine = self.buckets.setdefault(key, [0] * len(counts))
+            for i, count in enumerate(list(counts)):
+                mine[i] += count
+        for target, source in (
+            (self.sums, other.sums),
+            (self.requests, other.requests),
+            (self.sizes, other.sizes),
+        ):
+            for key, value in dict(source).items():
+                target[key] = target.get(key, 0) + value
+
+
+class RequestMetrics:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.started_at = time.time()
+        self._local = threading.local()
+        self._lock = threading.Lock()  # guards shard registration, retirement and scrapes
+        self._shards: list[_Shard] = []
+        self._retired = _Shard(None)
+        self._gauges: list[tuple[str, str, Callable[[], GaugeSamples]]] = []
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(threading.current_thread())
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def retire_thread(self) -> None:
+        """Fold the calling thread's shard into the retired total; call before the thread exits."""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            return
+        self._local.shard = None
+        with self._lock:
+            self._shards.remove(shard)
+            self._retired.merge(shard)
+
+    def observe(self, path: str, method: str, code: int, seconds: float, size: int = 0) -> None:
+        """Record one finished request."""
+        route = route_label(path)
+        shard = self._shard()
+        request_key = (route, method, str(code))
+        shard.requests[request_key] = shard.requests.get(request_key, 0) + 1
+        shard.sizes[route] = shard.sizes.get(route, 0) + max(0, int(size))
+        if route in STREAMING_ROUTES:
+            return
+        key = (route, method)
+        counts = shard.buckets.get(key)
+        if counts is None:
+            counts = shard.buckets[key] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, seconds)] += 1
+        shard.sums[key] = shard.sums.get(key, 0.0) + seconds
+
+    def add_gauge(self, name: str, help_text: str, collect: Callable[[], GaugeSamples]) -> None:
+        self._gauges.append((f"{PREFIX}_{name}", help_text, collect))
+
+    def _snapshot(self) -> _Shard:
+        total = _Shard(None)
+        with self._lock:
+            live = []
+            for shard in self._shards:
+                if shard.owner is not None and shard.owner.is_alive():
+                    live.append(shard)
+                else:
+                    self._retired.merge(shard)
+            self._shards = live
+            total.merge(self._retired)
+            for shard in live:
+                total.merge(shard)
+        return total
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format."""
+        snap = self._snapshot()
+        lines = []
+        name = f"{PREFIX}_http_request_duration_seconds"
+        lines += [f"# HELP {name} Time from parsed request line to finished response.", f"# TYPE {name} histogram"]
+        for (route, method), counts in sorted(snap.buckets.items()):
+            labels = {"route": route, "method": method}
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {snap.sums.get((route, method), 0.0):.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+        name = f"{PREFIX}_http_requests_total"
+        lines += [f"# HELP {name} Finished requests by route, method and status code.", f"# TYPE {name} counter"]
+        for (route, method, code), count in sorted(snap.requests.items()):
+            lines.append(f"{name}{_labels({'route': route, 'method': method, 'code': code})} {count}")
+
+        name = f"{PREFIX}_http_response_bytes_total"
+        lines += [f"# HELP {name} Declared response body bytes by route.", f"# TYPE {name} counter"]
+        for route, size in sorted(snap.sizes.items()):
+            lines.append(f"{name}{_labels({'route': route})} {size}")
+
+        for name, help_text, collect in self._gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for labels, value in collect():
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        name = f"{PREFIX}_process_start_time_seconds"
+        lines += [f"# HELP {name} Server start time (unix seconds).", f"# TYPE {name} gauge"]
+        lines.append(f"{name} {self.started_at:.3f}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Near-duplicate story detection for digest clustering.
+
+Each article's title + summary is reduced to word-bigram shingles (stopwords
+dropped) and a 64-value MinHash signature. Signatures are split into 16
+bands of 4 rows; articles sharing any band bucket become candidates, and a
+candidate pair is kept when its estimated Jaccard similarity reaches the
+threshold. Candidate lookup therefore touches only colliding buckets instead
+of every earlier article, for the current day and for the rolling window of
+past days alike.
+
+    python3 scripts/near_dup.py data/2026-02-24-ai.json --window-days 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import random
+import re
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+from urllib.parse import urlparse
+
+from json_codec import JSONDecodeError, read_file
+from profiling import run_main
+
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 2
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_WINDOW_DAYS = 7
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or that the this "
+    "to was were will with new now show hn".split()
+)
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = tuple((_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM))
+
+
+def story_text(article: dict) -> str:
+    return f"{article.get('title', '')} {article.get('summary', '')}"
+
+
+def shingles(text: str) -> set[int]:
+    tokens = [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+    if len(tokens) < SHINGLE_SIZE:
+        grams = tokens
+    else:
+        grams = [" ".join(tokens[i : i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    return {int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little") for g in grams}
+
+
+def signature(text: str) -> tuple[int, ...]:
+    """MinHash signature; empty for texts without any usable token."""
+    values = shingles(text)
+    if not values:
+        return ()
+    return tuple(min((a * x + b) % _PRIME for x in values) for a, b in _PERMUTATIONS)
+
+
+def similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity: the share of agreeing signature slots."""
+    if not left or not right:
+        return 0.0
+    return sum(1 for a, b in zip(left, right) if a == b) / NUM_PERM
+
+
+class LSHIndex:
+    """Banded MinHash index: add(key, signature) then query(signature) for candidate keys."""
+
+    def __init__(self):
+        self._buckets: dict[tuple[int, tuple[int, ...]], list] = defaultdict(list)
+
+    @staticmethod
+    def _bands(sig: tuple[int, ...]):
+        for band in range(BANDS):
+            yield band, sig[band * ROWS : (band + 1) * ROWS]
+
+    def add(self, key, sig: tuple[int, ...]) -> None:
+        if not sig:
+            return
+        for band_key in self._bands(sig):
+            self._buckets[band_key].append(key)
+
+    def query(self, sig: tuple[int, ...]) -> set:
+        found: set = set()
+        if not sig:
+            return found
+        for band_key in self._bands(sig):
+            found.update(self._buckets.get(band_key, ()))
+        return found
+
+
+def find_near_duplicates(
+    articles: list[dict],
+    history: list[dict] | None = None,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> tuple[list[list[int]], dict[int, dict]]:
+    """Cluster near-duplicate articles of one day and match them against past days.
+
+    Returns (clusters, first_seen): clusters are lists of article indices
+    (only groups of two or more, each sorted); first_seen maps an article
+    index to the earliest matching history entry ({date, title, url}).
+    """
+    index = LSHIndex()
+    past = history or []
+    past_sigs = []
+    for j, entry in enumerate(past):
+        sig = signature(story_text(entry))
+        past_sigs.append(sig)
+        index.add(("past", j), sig)
+
+    parent = list(range(len(articles)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    sigs = []
+    first_seen: dict[int, dict] = {}
+    for i, article in enumerate(articles):
+        sig = signature(story_text(article))
+        sigs.append(sig)
+        for kind, j in index.query(sig):
+            if kind == "past":
+                if similarity(sig, past_sigs[j]) < threshold:
+                    continue
+                entry = past[j]
+                seen = first_seen.get(i)
+                if seen is None or str(entry.get("date", "")) < seen["date"]:
+                    first_seen[i] = {
+                        "date": str(entry.get("date", "")),
+                        "title": entry.get("title", ""),
+                        "url": entry.get("url", ""),
+                    }
+            elif similarity(sig, sigs[j]) >= threshold:
+                parent[find(i)] = find(j)
+        index.add(("day", i), sig)
+
+    groups: dict[int, list[int]] = defaultdict(list)
+    for i in range(len(articles)):
+        groups[find(i)].append(i)
+    clusters = sorted(members for members in groups.values() if len(members) > 1)
+    return clusters, first_seen
+
+
+def source_label(url: str) -> str:
+    host = urlparse(str(url)).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def load_window(path: str | Path, day: str, window_days: int = DEFAULT_WINDOW_DAYS) -> list[dict]:
+    """Articles of the same domain from the window_days files before `day`, tagged with their file date."""
+    path = Path(path)
+    parts = path.stem.rsplit("-", 1)
+    try:
+        current = date.fromisoformat(str(day)[:10])
+    except ValueError:
+        return []
+    if len(parts) != 2 or window_days <= 0:
+        return []
+    history = []
+    for offset in range(1, window_days + 1):
+        past_day = (current - timedelta(days=offset)).isoformat()
+        past_path = path.with_name(f"{past_day}-{parts[1]}.json")
+        try:
+            payload = read_file(past_path)
+        except (OSError, JSONDecodeError):
+            continue
+        articles = payload.get("articles") if isinstance(payload, dict) else None
+        for article in articles if isinstance(articles, list) else []:
+            if isinstance(article, dict):
+                history.append(
+                    {
+                        "date": past_day,
+                        "title": article.get("title", ""),
+                        "summary": article.get("summary", ""),
+                        "url": article.get("url", ""),
+                    }
+                )
+    return history
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report near-duplicate clusters in a data file")
+    parser.add_argument("file", help="Path to data JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--window-days", type=int, default=DEFAULT_WINDOW_DAYS)
+    args = parser.parse_args()
+
+    path = Path(args.file)
+    payload = read_file(path)
+    articles = [a for a in payload.get("articles", []) if isinstance(a, dict)]
+    history = load_window(path, str(payload.get("date", "")), args.window_days)
+    clusters, first_seen = find_near_duplicates(articles, history, args.threshold)
+
+    print(f"{path.name}: {len(articles)} articles, {len(clusters)} clusters, {len(history)} window articles")
+    for members in clusters:
+        print("  cluster:")
+        for i in members:
+            print(f"    - {articles[i].get('title', '')} <{source_label(articles[i].get('url', ''))}>")
+    for i, seen in sorted(first_seen.items()):
+        print(f"  seen {seen['date']}: {articles[i].get('title', '')} ~ {seen['title']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""In-process cache of data/ files for the dashboard servers.
+
+The dashboard keeps asking for the same few recent days. PayloadCache keeps
+those files in memory, keyed by (path, mtime_ns, size), with two views per
+file: the encoded bytes served under /data/ (gzip sidecars are cached as
+files of their own) and the parsed payload the API endpoints work on
+(/api/digest/rolling). A lookup stats the file and reuses the entry only if mtime and
+size still match, so a rewritten file is picked up on the next request.
+
+Entries are charged their byte size, plus PARSED_COST_FACTOR times that once
+the payload has been parsed (a parsed JSON tree measures about 2-3x its
+source), against a byte budget; the least recently used entries are evicted
+when it is exceeded. Files larger than the budget are read but never kept.
+
+    DATA_CACHE_BYTES      budget in bytes (default 64 MiB, 0 disables the cache)
+    DATA_CACHE_WARM_DAYS  most recent days preloaded at server start (default 3)
+
+Scans over many files (/api/export of a long range) go through peek(): it
+uses an entry that is already cached but does not add the files it reads,
+so an export does not evict the recent days the dashboard keeps asking for.
+
+Parsed payloads are shared between requests: callers must not modify them.
+
+    python3 scripts/payload_cache.py --days 7   # what warm() would load
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from json_codec import loads
+from profiling import run_main
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_DIR / "data"
+DATA_FILE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-([A-Za-z0-9_-]+)\.json$")
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+DEFAULT_WARM_DAYS = 3
+PARSED_COST_FACTOR = 3
+
+
+class _Entry:
+    __slots__ = ("key", "mtime", "body", "payload", "cost")
+
+    def __init__(self, key: tuple[int, int], mtime: float, body: bytes):
+        self.key = key
+        self.mtime = mtime
+        self.body = body
+        self.payload = None
+        self.cost = len(body)
+
+
+class PayloadCache:
+    """Byte-budgeted LRU of file bytes and parsed JSON payloads; thread-safe."""
+
+    def __init__(self, budget: int = DEFAULT_BUDGET_BYTES):
+        self.budget = max(0, int(budget))
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "PayloadCache":
+        return cls(int(os.environ.get("DATA_CACHE_BYTES", DEFAULT_BUDGET_BYTES)))
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, path: str) -> _Entry | None:
+        """Current entry for `path`; drops it if the file changed or vanished."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                self.misses += 1
+                return None
+            if st is None or entry.key != (st.st_mtime_ns, st.st_size):
+                self._drop(path)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry
+
+    def _load(self, path: str) -> _Entry:
+        with open(path, "rb") as f:
+            # Key from the open descriptor so an atomic replace between a
+            # stat() and the read cannot pair old metadata with new bytes.
+            st = os.fstat(f.fileno())
+            body = f.read()
+        return _Entry((st.st_mtime_ns, st.st_size), st.st_mtime, body)
+
+    def _drop(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self.size -= entry.cost
+
+    def _charge(self, path: str, entry: _Entry) -> None:
+        """Account `entry` under `path` (new or re-costed), then evict down to the budget."""
+        with self._lock:
+            current = self._entries.get(path)
+            if current is not None and current is not entry:
+                self._drop(path)
+                current = None
+            if entry.cost > self.budget:
+                self._drop(path)
+                return
+            if current is None:
+                self._entries[path] = entry
+                self.size += entry.cost
+            self._entries.move_to_end(path)
+            while self.size > self.budget and self._entries:
+                self._drop(next(iter(self._entries)))
+
+    def read(self, path: str | Path) -> tuple[bytes, float]:
+        """(file bytes, mtime) of `path`; raises OSError like open()."""
+        path = str(path)
+        if not self.enabled:
+            entry = self._load(path)
+            return entry.body, entry.mtime
+        entry = self._lookup(path)
+        if entry is None:
+            entry = self._load(path)
+            self._charge(path, entry)
+        return entry.body, entry.mtime
+
+    def payload(self, path: str | Path) -> object:
+        """Parsed JSON of `path` (shared, do not modify); raises OSError or ValueError."""
+        path = str(path)
+        if not self.enabled:
+            return loads(self._load(path).body)
+        entry = self._lookup(path)
+        if entry is None:
+            entry = self._load(path)
+            entry.payload = loads(entry.body)
+            entry.cost += PARSED_COST_FACTOR * len(entry.body)
+            self._charge(path, entry)
+        elif entry.payload is None:
+            payload = loads(entry.body)
+            with self._lock:
+                if entry.payload is None and self._entries.get(path) is entry:
+                    entry.payload = payload
+                    extra = PARSED_COST_FACTOR * len(entry.body)
+                    entry.cost += extra
+                    self.size += extra
+            self._charge(path, entry)
+            return payload
+        return entry.payload
+
+    def peek(self, path: str | Path) -> object:
+        """Like payload(), but a file that is not cached is read without being added."""
+        path = str(path)
+        entry = self._lookup(path) if self.enabled else None
+        if entry is None:
+            return loads(self._load(path).body)
+        payload = entry.payload
+        return payload if payload is not None else loads(entry.body)
+
+    def warm(self, days: int = DEFAULT_WARM_DAYS, data_dir: str | Path = DATA_DIR) -> int:
+        """Load bytes, payloads and gzip sidecars of the `days` most recent days; returns files loaded."""
+        if not self.enabled or days <= 0:
+            return 0
+        loaded = 0
+        for path in warm_files(days, data_dir):
+            try:
+                self.payload(path)
+                loaded += 1
+                if os.path.exists(f"{path}.gz"):
+                    self.read(f"{path}.gz")
+            except (OSError, ValueError):
+                continue
+        return loaded
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "budget": self.budget,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def warm_files(days: int, data_dir: str | Path = DATA_DIR) -> list[Path]:
+    """Data files of the `days` most recent dates, newest first."""
+    data_dir = Path(data_dir)
+    try:
+        names = os.listdir(data_dir)
+    except FileNotFoundError:
+        return []
+    by_day: dict[str, list[str]] = {}
+    for name in names:
+        match = DATA_FILE_RE.match(name)
+        if match:
+            by_day.setdefault(match.group(1), []).append(name)
+    recent = sorted(by_day, reverse=True)[:days]
+    return [data_dir / name for day in recent for name in sorted(by_day[day])]
+
+
+def warm_days_from_env() -> int:
+    return int(os.environ.get("DATA_CACHE_WARM_DAYS", DEFAULT_WARM_DAYS))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Preload recent data files and report the cache footprint")
+    parser.add_argument("--days", type=int, default=warm_days_from_env(), help="Most recent days to load")
+    parser.add_argument("--budget", type=int, default=None, help="Byte budget (default: DATA_CACHE_BYTES or 64 MiB)")
+    args = parser.parse_args()
+    cache = PayloadCache(args.budget) if args.budget is not None else PayloadCache.from_env()
+    loaded = cache.warm(args.days)
+    stats = cache.stats()
+    print(
+        f"Warmed {loaded} file(s) from {args.days} day(s): {stats['entries']} entries, "
+        f"{stats['bytes'] / 1024:.1f} KiB of {stats['budget'] / 1024:.0f} KiB budget"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
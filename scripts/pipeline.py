@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Run validate → enrich → digest on data files in a single process.
+
+Each file is parsed once, all stages run on the in-memory payload, and the
+result is written back once atomically. Many files (e.g. every domain of a
+day) can be processed in one invocation. Stage semantics match fetch.sh:
+validation failures abort that file, enrich failures are non-blocking, and
+the AI domain skips journal enrichment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import traceback
+from pathlib import Path
+
+from article import wrap_articles
+from enrich_journal import EnrichCheckpoint, enrich_payload
+from generate_digest import build_digest, infer_kind, load_history, write_json
+from json_codec import JSONDecodeError, read_file
+from pmid_store import record_file
+from profiling import run_main
+from scoring import ArticleBatch, get_profile
+from validate_data import infer_domain_id, validate_payload
+
+
+STAGES = ("validate", "enrich", "digest")
+
+
+def run_file(path: Path, domain_id: str = "", stages: tuple[str, ...] = STAGES) -> int:
+    """Process one data file; return 0 on success, 1 on a blocking failure."""
+    if not path.exists():
+        print(f"[ERROR] file not found: {path}")
+        return 1
+    try:
+        payload = read_file(path)
+    except JSONDecodeError as exc:
+        print(f"[ERROR] Data file is not valid JSON: {path} ({exc})")
+        return 1
+
+    domain_id = (domain_id or infer_domain_id(path)).strip().lower()
+    # One Article per entry, shared by every stage so each derived key is computed once.
+    records = wrap_articles(payload.get("articles") if isinstance(payload, dict) else None)
+
+    if "validate" in stages:
+        errors = validate_payload(payload, domain_id, records)
+        if errors:
+            print(f"[ERROR] Data quality validation failed: {path}")
+            for err in errors:
+                print(f"  - {err}")
+            return 1
+        print(
+            f"Data quality validated: {path} "
+            f"(domain={domain_id or 'unknown'}, articles={len(payload.get('articles', []))})"
+        )
+    elif not isinstance(payload, dict):
+        print(f"[ERROR] Top-level JSON payload must be an object: {path}")
+        return 1
+
+    checkpoint = None
+    if "enrich" in stages and domain_id != "ai":
+        checkpoint = EnrichCheckpoint.for_data_file(path)
+        try:
+            inspected, updated, registry_new_count, registry_path = enrich_payload(payload, path, records, checkpoint)
+            print(
+                f"Journal enriched: {path} "
+                f"(inspected={inspected}, updated={updated}, registry_new={registry_new_count}, "
+                f"registry={registry_path})"
+            )
+        except Exception:
+            print(f"[WARN] Journal enrich failed (non-blocking): {path}")
+            traceback.print_exc(file=sys.stdout)
+            # Keep what was fetched for the next run.
+            checkpoint = None
+            # enrich_payload works in place; digest and write the articles as
+            # they were on disk rather than half-enriched.
+            payload = read_file(path)
+            records = wrap_articles(payload.get("articles"))
+
+    if "digest" in stages:
+        articles = payload.get("articles") if isinstance(payload.get("articles"), list) else []
+        profile = get_profile(kind=infer_kind(domain_id, articles))
+        history = load_history(str(path), payload, profile)
+        batch = ArticleBatch(records, str(payload.get("date", "")))
+        payload["digest"] = build_digest(payload, domain_id, profile, batch, history)
+        print(f"Digest generated: {path}")
+
+    if "enrich" in stages or "digest" in stages:
+        write_json(str(path), payload)
+    if checkpoint is not None:
+        checkpoint.finish()
+
+    if domain_id != "ai":
+        try:
+            added = record_file(path, payload, records)
+            if added is not None:
+                print(f"PMIDs recorded: {path} (new={added})")
+        except Exception:
+            print(f"[WARN] PMID store update failed (non-blocking): {path}")
+            traceback.print_exc(file=sys.stdout)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Validate, enrich and digest data files in one process")
+    parser.add_argument("files", nargs="+", help="Data files (YYYY-MM-DD-<domain>.json)")
+    parser.add_argument(
+        "--domain",
+        default="",
+        help="Domain id for all files (default: inferred from each filename)",
+    )
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help=f"Comma-separated stages to run (default: {','.join(STAGES)})",
+    )
+    args = parser.parse_args()
+
+    stages = tuple(s.strip() for s in args.stages.split(",") if s.strip())
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        print(f"[ERROR] Unknown stage(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    failed = 0
+    for file in args.files:
+        failed += run_file(Path(file), args.domain, stages)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
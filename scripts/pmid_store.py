@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Per-domain known-PMID store with an ingestion watermark.
+
+Academic sources search PubMed with a rolling `reldate` window, so most
+PMIDs of a run were already stored on a previous day. This store keeps,
+per domain, every stored PMID with the day it was first seen, as two
+parallel little-endian uint32 arrays sorted by PMID (.cache/pmids/<domain>.bin,
+a few bytes per paper). Membership is a binary search.
+
+    # drop PMIDs first stored before today from an esearch response
+    curl -s "<esearch url>" | python3 scripts/pmid_store.py filter ad
+    python3 scripts/pmid_store.py record data/2026-02-24-ad.json
+    python3 scripts/pmid_store.py rebuild
+    python3 scripts/pmid_store.py show ad
+
+pipeline.py records every processed research file, and enrich_journal.py
+copies journal/ISSN fields of known PMIDs forward from the file they were
+first stored in instead of asking PubMed again.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import date
+from pathlib import Path
+from typing import Iterable
+
+from article import Article, extract_pmid, wrap_articles
+from json_codec import JSONDecodeError, dumps, loads, read_file
+from profiling import run_main
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_DIR / "data"
+DEFAULT_STORE_DIR = PROJECT_DIR / ".cache" / "pmids"
+DATA_FILE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-([A-Za-z0-9_-]+)\.json$")
+PMID_TOKEN_RE = re.compile(r"\d+")
+HEADER = struct.Struct("<4sIII")  # magic, version, watermark ordinal, count
+MAGIC = b"PMID"
+STORE_VERSION = 1
+MAX_PMID = 0xFFFFFFFF
+# Fields enrich_journal copies forward for a known PMID.
+CARRY_FIELDS = ("journal", "journal_issn")
+
+_U32 = "I" if array("I").itemsize == 4 else "L"
+
+
+def store_dir() -> Path:
+    return Path(os.environ.get("PMID_STORE_DIR", "") or DEFAULT_STORE_DIR)
+
+
+def parse_data_filename(path: str | Path) -> tuple[date, str] | None:
+    match = DATA_FILE_RE.match(Path(path).name)
+    if not match:
+        return None
+    try:
+        return date.fromisoformat(match.group(1)), match.group(2).lower()
+    except ValueError:
+        return None
+
+
+def payload_pmids(payload: dict, records: list[Article | None] | None = None) -> list[int]:
+    """PMIDs of PubMed articles in a data payload, in article order."""
+    if records is None:
+        records = wrap_articles(payload.get("articles") if isinstance(payload, dict) else None)
+    return [int(r.pmid) for r in records if r is not None and r.pmid and int(r.pmid) <= MAX_PMID]
+
+
+class PmidStore:
+    """Sorted PMIDs with the ordinal of the day each was first stored."""
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.pmids = array(_U32)
+        self.first_seen = array(_U32)
+        self.watermark = 0  # ordinal of the newest recorded day
+
+    @classmethod
+    def load(cls, domain: str, path: Path | None = None) -> "PmidStore":
+        store = cls(domain)
+        path = path or store_dir() / f"{domain}.bin"
+        try:
+            raw = path.read_bytes()
+        except FileNotFoundError:
+            return store
+        magic, version, watermark, count = HEADER.unpack_from(raw)
+        if magic != MAGIC or version != STORE_VERSION:
+            raise ValueError(f"not a PMID store: {path}")
+        store.watermark = watermark
+        offset = HEADER.size
+        for column in (store.pmids, store.first_seen):
+            column.frombytes(raw[offset : offset + count * 4])
+            if sys.byteorder == "big":
+                column.byteswap()
+            offset += count * 4
+        return store
+
+    def save(self, path: Path | None = None) -> None:
+        path = path or store_dir() / f"{self.domain}.bin"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as f:
+            f.write(HEADER.pack(MAGIC, STORE_VERSION, self.watermark, len(self.pmids)))
+            for column in (self.pmids, self.first_seen):
+                if sys.byteorder == "big":
+                    column = array(_U32, column)
+                    column.byteswap()
+                f.write(column.tobytes())
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self.pmids)
+
+    def _index(self, pmid: int) -> int:
+        i = bisect_left(self.pmids, pmid)
+        return i if i < len(self.pmids) and self.pmids[i] == pmid else -1
+
+    def __contains__(self, pmid: int) -> bool:
+        return self._index(int(pmid)) >= 0
+
+    def first_seen_day(self, pmid: int) -> date | None:
+        i = self._index(int(pmid))
+        return date.fromordinal(self.first_seen[i]) if i >= 0 else None
+
+    @property
+    def watermark_day(self) -> date | None:
+        return date.fromordinal(self.watermark) if self.watermark else None
+
+    def record(self, pmids: Iterable[int], day: date) -> int:
+        """Add PMIDs stored on `day`; returns how many were new. Re-recording keeps the earliest day."""
+        ordinal = day.toordinal()
+        incoming = sorted({int(p) for p in pmids if 0 < int(p) <= MAX_PMID})
+        merged_pmids, merged_days = array(_U32), array(_U32)
+        i = added = 0
+        old_pmids, old_days = self.pmids, self.first_seen
+        for pmid in incoming:
+            while i < len(old_pmids) and old_pmids[i] < pmid:
+                merged_pmids.append(old_pmids[i])
+                merged_days.append(old_days[i])
+                i += 1
+            if i < len(old_pmids) and old_pmids[i] == pmid:
+                merged_pmids.append(pmid)
+                merged_days.append(min(old_days[i], ordinal))
+                i += 1
+            else:
+                merged_pmids.append(pmid)
+                merged_days.append(ordinal)
+                added += 1
+        merged_pmids.extend(old_pmids[i:])
+        merged_days.extend(old_days[i:])
+        self.pmids, self.first_seen = merged_pmids, merged_days
+        self.watermark = max(self.watermark, ordinal)
+        return added
+
+    def filter_new(self, pmids: Iterable[int], day: date) -> list[int]:
+        """PMIDs not stored before `day` (same-day re-runs keep their own PMIDs)."""
+        ordinal = day.toordinal()
+        out = []
+        for pmid in pmids:
+            i = self._index(int(pmid))
+            if i < 0 or self.first_seen[i] >= ordinal:
+                out.append(int(pmid))
+        return out
+
+
+def record_file(
+    path: str | Path, payload: dict | None = None, records: list[Article | None] | None = None
+) -> int | None:
+    """Record a data file's PMIDs; None if the path is not a file under data/."""
+    parsed = parse_data_filename(path)
+    if parsed is None or Path(path).resolve().parent != DATA_DIR.resolve():
+        return None
+    day, domain = parsed
+    if payload is None:
+        payload = read_file(path)
+    store = PmidStore.load(domain)
+    added = store.record(payload_pmids(payload, records), day)
+    store.save()
+    return added
+
+
+def carry_forward(path: str | Path, pmids: Iterable[str]) -> dict[str, dict]:
+    """Journal fields of PMIDs stored before this file's day, read from the file each was first stored in."""
+    parsed = parse_data_filename(path)
+    if parsed is None:
+        return {}
+    day, domain = parsed
+    store = PmidStore.load(domain)
+    wanted_by_day: dict[date, set[str]] = {}
+    for pmid in pmids:
+        seen = store.first_seen_day(int(pmid)) if str(pmid).isdigit() else None
+        if seen is not None and seen < day:
+            wanted_by_day.setdefault(seen, set()).add(str(pmid))
+
+    found: dict[str, dict] = {}
+    for seen, wanted in wanted_by_day.items():
+        source = Path(path).with_name(f"{seen.isoformat()}-{domain}.json")
+        try:
+            payload = read_file(source)
+        except (OSError, JSONDecodeError):
+            continue
+        for article in payload.get("articles", []) if isinstance(payload, dict) else []:
+            if not isinstance(article, dict):
+                continue
+            pmid = extract_pmid(str(article.get("url", "")))
+            if pmid not in wanted:
+                continue
+            fields = {k: article[k] for k in CARRY_FIELDS if article.get(k)}
+            if fields.get("journal"):
+                found[pmid] = fields
+    return found
+
+
+def rebuild(domains: set[str] | None = None, data_dir: Path = DATA_DIR) -> dict[str, PmidStore]:
+    stores: dict[str, PmidStore] = {}
+    for path in sorted(data_dir.glob("*.json")):
+        parsed = parse_data_filename(path)
+        if parsed is None or (domains and parsed[1] not in domains):
+            continue
+        try:
+            payload = read_file(path)
+        except (OSError, JSONDecodeError) as exc:
+            print(f"[WARN] skipped {path.name}: {exc}")
+            continue
+        day, domain = parsed
+        stores.setdefault(domain, PmidStore(domain)).record(payload_pmids(payload), day)
+    stores = {domain: store for domain, store in stores.items() if len(store)}
+    for store in stores.values():
+        store.save()
+    return stores
+
+
+def read_pmid_list(text: str) -> list[int]:
+    """PMIDs from an esearch JSON response or from any whitespace/comma separated list."""
+    try:
+        data = loads(text)
+    except JSONDecodeError:
+        data = None
+    if isinstance(data, dict):
+        ids = data.get("esearchresult", {}).get("idlist", [])
+        return [int(p) for p in ids if str(p).isdigit()]
+    if isinstance(data, list):
+        return [int(p) for p in data if str(p).isdigit()]
+    return [int(p) for p in PMID_TOKEN_RE.findall(text)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintain and query per-domain known-PMID stores")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_filter = sub.add_parser("filter", help="Print PMIDs not stored before --date (stdin or args)")
+    p_filter.add_argument("domain")
+    p_filter.add_argument("pmids", nargs="*", help="PMIDs (default: read esearch JSON or a list from stdin)")
+    p_filter.add_argument("--date", default="", help="Ingestion day (default: today)")
+    p_filter.add_argument("--json", action="store_true", help="Print a JSON array instead of a comma list")
+    p_record = sub.add_parser("record", help="Record PMIDs of data files")
+    p_record.add_argument("files", nargs="+")
+    p_rebuild = sub.add_parser("rebuild", help="Rebuild stores from data/*.json")
+    p_rebuild.add_argument("--domain", action="append", default=[])
+    p_show = sub.add_parser("show", help="Print store size and watermark")
+    p_show.add_argument("domain")
+    args = parser.parse_args()
+
+    if args.command == "filter":
+        day = date.fromisoformat(args.date) if args.date else date.today()
+        pmids = [int(p) for p in args.pmids if p.isdigit()] if args.pmids else read_pmid_list(sys.stdin.read())
+        fresh = PmidStore.load(args.domain.lower()).filter_new(pmids, day)
+        print(dumps([str(p) for p in fresh]) if args.json else ",".join(str(p) for p in fresh))
+        print(f"kept {len(fresh)}/{len(pmids)} PMIDs", file=sys.stderr)
+    elif args.command == "record":
+        for file in args.files:
+            added = record_file(file)
+            if added is None:
+                print(f"[WARN] not a data file (data/YYYY-MM-DD-<domain>.json): {file}")
+            else:
+                print(f"PMIDs recorded: {file} (new={added})")
+    elif args.command == "rebuild":
+        for domain, store in sorted(rebuild({d.lower() for d in args.domain} or None).items()):
+            print(f"PMID store rebuilt: {domain} ({len(store)} PMIDs, watermark={store.watermark_day})")
+    else:
+        store = PmidStore.load(args.domain.lower())
+        watermark = store.watermark_day.isoformat() if store.watermark_day else ""
+        print(dumps({"domain": store.domain, "pmids": len(store), "watermark": watermark}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""Opt-in profiling for scripts/ entry points and the live dashboard server.
+
+Every script runs its main() through run_main(). Profiling is off unless
+PROFILE_SCRIPTS is set or `--profile-run` is passed (the flag is removed from
+argv before the script parses it; `--profile` is taken by generate_digest.py):
+
+    PROFILE_SCRIPTS=1 python3 scripts/enrich_journal.py data/2026-02-24-ad.json
+    python3 scripts/generate_digest.py data/2026-02-24-ai.json --profile-run
+
+PROFILE_SCRIPTS=cpu records only cProfile, =mem only tracemalloc, anything
+else both. Results go to logs/profiles/<script>-<timestamp>-<pid>.*:
+`.pstats` (load with `python3 -m pstats`) and a `.txt` report with the top
+functions by cumulative time and the tracemalloc peak plus top allocation sites.
+
+cProfile only sees the thread it was enabled on, so the server side uses
+sample_stacks(): it polls sys._current_frames() of every other thread for a
+fixed window and aggregates self/cumulative sample counts per function.
+`GET /api/debug/profile?seconds=N` exposes it on a running server; the route
+answers 404 unless SERVER_DEBUG_PROFILE=1, and 403 to non-loopback clients.
+
+    python3 scripts/profiling.py logs/profiles/enrich_journal-*.pstats --sort tottime
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import io
+import ipaddress
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+PROFILES_DIR = PROJECT_DIR / "logs" / "profiles"
+PROFILE_ENV = "PROFILE_SCRIPTS"
+PROFILE_FLAG = "--profile-run"
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 20
+TRACEMALLOC_FRAMES = 8
+DEFAULT_SAMPLE_INTERVAL = 0.005
+DEBUG_PROFILE_ENV = "SERVER_DEBUG_PROFILE"
+DEFAULT_PROFILE_SECONDS = 5.0
+MAX_PROFILE_SECONDS = 60.0
+MAX_RETURNED_STACKS = 50
+# Frames a thread sits in while it waits for I/O or work; skipped by sample_stacks(idle=False).
+IDLE_FRAMES = frozenset(
+    {
+        ("selectors.py", "select"),
+        ("socket.py", "readinto"),
+        ("socket.py", "accept"),
+        ("threading.py", "wait"),
+        ("queue.py", "get"),
+        ("socketserver.py", "serve_forever"),
+    }
+)
+
+
+def profiles_dir() -> Path:
+    return Path(os.environ.get("PROFILES_DIR", "") or PROFILES_DIR)
+
+
+def _output_stem(name: str) -> Path:
+    directory = profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+def _requested_modes(argv: list[str]) -> set[str]:
+    """Profiling modes from PROFILE_SCRIPTS / --profile-run; strips the flag from argv."""
+    flagged = PROFILE_FLAG in argv
+    while PROFILE_FLAG in argv:
+        argv.remove(PROFILE_FLAG)
+    value = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if value in ("", "0", "false", "no", "off"):
+        return {"cpu", "mem"} if flagged else set()
+    if value in ("cpu", "mem"):
+        return {value}
+    return {"cpu", "mem"}
+
+
+def _format_memory(snapshot: tracemalloc.Snapshot, current: int, peak: int) -> str:
+    lines = [f"tracemalloc: current={current / 1024:.1f} KiB peak={peak / 1024:.1f} KiB", ""]
+    stats = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        )
+    ).statistics("lineno")
+    for stat in stats[:TOP_ALLOCATIONS]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}")
+    return "\n".join(lines)
+
+
+def run_main(main: Callable[[], int | None], name: str | None = None) -> int | None:
+    """Run a script's main(), under cProfile/tracemalloc when profiling is requested."""
+    modes = _requested_modes(sys.argv)
+    if not modes:
+        return main()
+    name = name or Path(sys.argv[0]).stem or "script"
+    profiler = cProfile.Profile() if "cpu" in modes else None
+    if "mem" in modes:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    started = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        return main()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+        sections = [f"{name} argv={sys.argv[1:]} wall={elapsed:.3f}s"]
+        memory = None
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            memory = _format_memory(snapshot, current, peak)
+        stem = _output_stem(name)
+        if profiler is not None:
+            profiler.dump_stats(f"{stem}.pstats")
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            sections.append(text.getvalue().strip())
+        if memory is not None:
+            sections.append(memory)
+        Path(f"{stem}.txt").write_text("\n\n".join(sections) + "\n", encoding="utf-8")
+        print(f"[PROFILE] {name}: wall {elapsed:.3f}s, report {stem}.txt", file=sys.stderr)
+
+
+# ── live sampling (server) ───────────────────────────────────
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+
+def sample_stacks(
+    seconds: float,
+    interval: float = DEFAULT_SAMPLE_INTERVAL,
+    idle: bool = False,
+    top: int = TOP_FUNCTIONS,
+) -> dict:
+    """Sample the Python stacks of every other thread for `seconds`.
+
+    Returns {seconds, samples, threads, self, cumulative, stacks}: per-function
+    sample counts where the function was on top of the stack (self) or anywhere
+    on it (cumulative), plus collapsed stacks ("a;b;c count") usable by
+    flamegraph tools. Threads parked in IDLE_FRAMES are skipped unless idle=True.
+    """
+    own = threading.get_ident()
+    self_counts: Counter[str] = Counter()
+    cumulative: Counter[str] = Counter()
+    stacks: Counter[str] = Counter()
+    threads: set[int] = set()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            code = frame.f_code
+            if not idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            samples += 1
+            threads.add(ident)
+            self_counts[labels[0]] += 1
+            cumulative.update(set(labels))
+            stacks[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+
+    def ranked(counter: Counter[str]) -> list[dict]:
+        return [
+            {"function": label, "samples": count, "percent": round(100.0 * count / samples, 1)}
+            for label, count in counter.most_common(top)
+        ]
+
+    return {
+        "seconds": seconds,
+        "samples": samples,
+        "threads": len(threads),
+        "self": ranked(self_counts),
+        "cumulative": ranked(cumulative),
+        "stacks": [f"{stack} {count}" for stack, count in stacks.most_common()],
+    }
+
+
+def save_samples(result: dict, name: str = "server") -> Path:
+    """Write collapsed stacks of a sample_stacks() result; returns the .folded path."""
+    path = Path(f"{_output_stem(name)}.folded")
+    path.write_text("\n".join(result["stacks"]) + "\n", encoding="utf-8")
+    return path
+
+
+_debug_profile_lock = threading.Lock()
+
+
+def _is_loopback(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    mapped = getattr(address, "ipv4_mapped", None)
+    return (mapped or address).is_loopback
+
+
+def debug_profile(query: dict[str, list[str]], client_host: str) -> tuple[int, dict]:
+    """Serve /api/debug/profile: (status code, JSON body). Blocks for the sampling window."""
+    if os.environ.get(DEBUG_PROFILE_ENV, "") != "1":
+        return 404, {"error": "not found"}
+    if not _is_loopback(client_host):
+        return 403, {"error": "profiling is only available from localhost"}
+    try:
+        seconds = float(query.get("seconds", [DEFAULT_PROFILE_SECONDS])[0])
+    except ValueError:
+        return 400, {"error": "seconds must be a number"}
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        return 400, {"error": f"seconds must be in (0, {MAX_PROFILE_SECONDS:g}]"}
+    if not _debug_profile_lock.acquire(blocking=False):
+        return 409, {"error": "a profile is already running"}
+    try:
+        result = sample_stacks(seconds, idle=query.get("idle", ["0"])[0] == "1")
+    finally:
+        _debug_profile_lock.release()
+    result["folded"] = str(save_samples(result))
+    result["stacks"] = result["stacks"][:MAX_RETURNED_STACKS]
+    return 200, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Print a saved cProfile .pstats file")
+    parser.add_argument("file", help="Path to a .pstats file under logs/profiles/")
+    parser.add_argument("--sort", default="cumulative", help="pstats sort key (default: cumulative)")
+    parser.add_argument("--limit", type=int, default=TOP_FUNCTIONS)
+    args = parser.parse_args()
+    pstats.Stats(args.file).sort_stats(args.sort).print_stats(args.limit)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""Refresh the offline LetPub journal catalog under data/letpub/ incrementally.
+
+Pages through the LetPub search listing for every field recorded in the
+catalog's `fields` metadata, with a small worker pool behind a shared rate
+limit. Each finished page is checkpointed, so an interrupted refresh resumes
+where it stopped (pages older than a day, or scraped for another data
+directory, are not reused). The result is diffed against the existing catalog: only
+journals whose metrics changed are rewritten, and files are left untouched
+when nothing changed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+from enrich_journal import (
+    LETPUB_DB_PATH,
+    LETPUB_HEADERS,
+    LETPUB_SEARCH_URL,
+    JOURNAL_ID_RE,
+    LetPubSearchParser,
+    format_issn,
+    load_letpub_if_index,
+)
+from http_client import PROJECT_DIR, RETRYABLE_ERRORS, HttpClient, client_from_env
+from json_codec import file_bytes, read_file
+from profiling import run_main
+
+
+DATA_DIR = PROJECT_DIR / "data"
+RAW_PATH = Path("letpub") / "letpub_life_med_raw.json"
+CSV_PATH = Path("letpub") / "letpub_life_med_unique.csv"
+CHECKPOINT_PATH = PROJECT_DIR / ".cache" / "letpub_refresh_checkpoint.json"
+CHECKPOINT_MAX_AGE_SECONDS = 24 * 3600
+PAGE_SIZE = 10
+# Pseudo field for journals added one by one via ISSN lookups; never paged.
+SUPPLEMENT_FIELD_TAG = 99999
+# Columns that change on every scrape without meaning the journal changed.
+VOLATILE_KEYS = ("views", "field", "field_tag", "page", "fields")
+CSV_COLUMNS = (
+    "journal_id",
+    "journal_name",
+    "journal_name_short",
+    "issn",
+    "impact_factor",
+    "h_index",
+    "citescore",
+    "overall_score",
+    "cas_quartile",
+    "big_category",
+    "sub_category",
+    "sci_indexed",
+    "oa_status",
+    "acceptance_rate",
+    "review_cycle",
+    "views",
+    "fields",
+    "detail_url",
+    "article_url",
+)
+FLOAT_RE = re.compile(r"[0-9]+(?:\.[0-9]+)?")
+H_INDEX_RE = re.compile(r"h-index:\s*([0-9]+)", re.I)
+CITESCORE_RE = re.compile(r"CiteScore:\s*([0-9]+(?:\.[0-9]+)?)", re.I)
+IF_RE = re.compile(r"IF:\s*([0-9]+(?:\.[0-9]+)?)", re.I)
+
+
+def now_iso_utc() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def write_json_atomic(path: Path, payload: object) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(file_bytes(payload))
+    os.replace(tmp_path, path)
+
+
+def field_page_url(field_tag: int, page: int) -> str:
+    return (
+        f"{LETPUB_SEARCH_URL}"
+        f"&searchname=&searchissn=&searchfield={field_tag}"
+        "&searchimpactlow=&searchimpacthigh=&searchimpacttrend=&searchscitype="
+        "&searchcategory1=&searchcategory2=&searchjcrkind=&searchopenaccess=&searchsort="
+        f"&currentpage={page}"
+    )
+
+
+def _cell_text(cell: dict) -> str:
+    return " ".join(cell["text"])
+
+
+def _first_float(text: str, pattern: re.Pattern = FLOAT_RE):
+    match = pattern.search(text)
+    if not match:
+        return None
+    return float(match.group(1) if match.groups() else match.group(0))
+
+
+def _first_int(text: str, pattern: re.Pattern = FLOAT_RE):
+    value = _first_float(text, pattern)
+    return int(value) if value is not None else None
+
+
+def listing_row_to_record(row: list[dict], field: str, field_tag: int, page: int) -> dict | None:
+    """Map one 12-cell listing row to a raw catalog record.
+
+    Column layout: ISSN | name (link + short name) | overall score |
+    IF / h-index / CiteScore | CAS quartile | big category | sub category |
+    SCI index | OA | acceptance rate | review cycle | views.
+    """
+    jid_match = JOURNAL_ID_RE.search(row[1]["a_href"])
+    if not jid_match:
+        return None
+    journal_id = int(jid_match.group(1))
+    metrics = _cell_text(row[3])
+    return {
+        "field": field,
+        "issn": format_issn(_cell_text(row[0])),
+        "journal_name": row[1]["a_text"] or "",
+        "journal_name_short": row[1]["font_text"] or "",
+        "journal_id": journal_id,
+        "detail_url": f"https://letpub.com.cn/index.php?journalid={journal_id}&page=journalapp&view=detail",
+        "overall_score": _first_float(_cell_text(row[2])),
+        "impact_factor": _first_float(metrics, IF_RE),
+        "h_index": _first_int(metrics, H_INDEX_RE),
+        "citescore": _first_float(metrics, CITESCORE_RE),
+        "cas_quartile": _cell_text(row[4]),
+        "big_category": _cell_text(row[5]),
+        "sub_category": _cell_text(row[6]),
+        "sci_indexed": _cell_text(row[7]),
+        "oa_status": _cell_text(row[8]),
+        "acceptance_rate": _cell_text(row[9]),
+        "review_cycle": _cell_text(row[10]),
+        "article_url": (
+            "https://letpub.com.cn/index.php?page=journalapp&view=detail"
+            f"&journalid={journal_id}&xuanxiangk_id=2#xuanxk_3"
+        ),
+        "views": _first_int(_cell_text(row[11]).replace(",", "")),
+        "field_tag": field_tag,
+        "page": page,
+    }
+
+
+class RateLimiter:
+    """Allow at most one request start per `interval` seconds across threads."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Checkpoint:
+    """Per-page scrape results persisted after every page for resumable runs.
+
+    Pages are only reused by a run against the same data directory and while
+    the checkpoint is younger than `max_age` seconds; otherwise it starts empty.
+    """
+
+    def __init__(self, path: Path, scope: str = "", max_age: float = CHECKPOINT_MAX_AGE_SECONDS):
+        self.path = path
+        self.scope = scope
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self.pages: dict[str, list[dict]] = {}
+        if path.exists():
+            try:
+                raw = read_file(path)
+            except (OSError, ValueError):
+                raw = None
+            if (
+                isinstance(raw, dict)
+                and raw.get("scope", "") == scope
+                and time.time() - float(raw.get("started_at", 0) or 0) <= max_age
+            ):
+                self.pages = raw.get("pages", {})
+                self.started_at = float(raw["started_at"])
+
+    @staticmethod
+    def key(field_tag: int, page: int) -> str:
+        return f"{field_tag}:{page}"
+
+    def get(self, field_tag: int, page: int) -> list[dict] | None:
+        return self.pages.get(self.key(field_tag, page))
+
+    def save(self, field_tag: int, page: int, rows: list[dict]) -> None:
+        with self._lock:
+            self.pages[self.key(field_tag, page)] = rows
+            write_json_atomic(
+                self.path,
+                {
+                    "updated_at": now_iso_utc(),
+                    "scope": self.scope,
+                    "started_at": self.started_at,
+                    "pages": self.pages,
+                },
+            )
+
+    def clear(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def scrape_page(
+    client: HttpClient,
+    limiter: RateLimiter,
+    checkpoint: Checkpoint,
+    field: str,
+    field_tag: int,
+    page: int,
+) -> list[dict]:
+    cached = checkpoint.get(field_tag, page)
+    if cached is not None:
+        return cached
+    limiter.wait()
+    body = client.get(field_page_url(field_tag, page), headers=LETPUB_HEADERS, timeout=25, retries=3)
+    parser = LetPubSearchParser()
+    parser.feed(body.decode("utf-8", errors="ignore"))
+    parser.close()
+    rows = [
+        record
+        for record in (listing_row_to_record(row, field, field_tag, page) for row in parser.rows)
+        if record is not None
+    ]
+    checkpoint.save(field_tag, page, rows)
+    return rows
+
+
+def scrape_field(
+    pool: ThreadPoolExecutor,
+    client: HttpClient,
+    limiter: RateLimiter,
+    checkpoint: Checkpoint,
+    field: str,
+    meta: dict,
+    max_pages: int,
+) -> tuple[list[dict], int]:
+    """Scrape a field in waves of `pages` hint; keep going while the last page is full."""
+    field_tag = int(meta["field_tag"])
+    wave = max(1, int(meta.get("pages", 1) or 1))
+    rows: list[dict] = []
+    next_page = 1
+    while next_page <= max_pages:
+        pages = list(range(next_page, min(next_page + wave, max_pages + 1)))
+        futures = [
+            pool.submit(scrape_page, client, limiter, checkpoint, field, field_tag, page) for page in pages
+        ]
+        results = [f.result() for f in futures]
+        for page_rows in results:
+            rows.extend(page_rows)
+        if len(results[-1]) < PAGE_SIZE:
+            last_page = pages[-1] if results[-1] else pages[-1] - 1
+            return rows, last_page
+        next_page = pages[-1] + 1
+        wave = 1
+    return rows, max_pages
+
+
+def build_unique(raw_rows: list[dict]) -> dict[int, dict]:
+    """Collapse raw rows by journal_id, merging the list of fields a journal appears in."""
+    unique: dict[int, dict] = {}
+    for row in raw_rows:
+        journal_id = row.get("journal_id")
+        if journal_id is None:
+            continue
+        current = unique.get(journal_id)
+        if current is None:
+            current = {
+                "field": row["field"],
+                "field_tag": row["field_tag"],
+                "page": row["page"],
+                **{k: v for k, v in row.items() if k not in ("field", "field_tag", "page")},
+                "fields": [],
+            }
+            unique[journal_id] = current
+        if row["field"] not in current["fields"]:
+            current["fields"].append(row["field"])
+    return unique
+
+
+def semantic_view(journal: dict) -> dict:
+    return {k: v for k, v in journal.items() if k not in VOLATILE_KEYS}
+
+
+def diff_catalog(
+    existing: list[dict], refreshed: dict[int, dict], prune: bool, targets: Iterable[str] = ()
+) -> tuple[list[dict], dict]:
+    """Merge refreshed journals into the existing list; untouched entries are kept as-is.
+
+    With `prune`, a journal missing from `refreshed` loses the refreshed
+    `targets` from its fields, and is removed only when no other field lists it.
+    Journals of fields that were not refreshed are never pruned.
+    """
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    targets = set(targets)
+    existing_ids = {journal.get("journal_id") for journal in existing}
+    merged: dict[int, dict] = {}
+    for journal in existing:
+        journal_id = journal.get("journal_id")
+        fresh = refreshed.get(journal_id)
+        if fresh is None:
+            fields = list(journal.get("fields", []))
+            kept = [field for field in fields if field not in targets]
+            if not prune or kept == fields:
+                merged[journal_id] = journal
+            elif kept:
+                merged[journal_id] = {**journal, "fields": kept}
+                stats["updated"] += 1
+            else:
+                stats["removed"] += 1
+            continue
+        fields = list(journal.get("fields", []))
+        for field in fresh["fields"]:
+            if field not in fields:
+                fields.append(field)
+        if semantic_view(journal) == semantic_view(fresh) and fields == journal.get("fields", []):
+            merged[journal_id] = journal
+            stats["unchanged"] += 1
+        else:
+            merged[journal_id] = {**journal, **semantic_view(fresh), "views": fresh.get("views"), "fields": fields}
+            stats["updated"] += 1
+    for journal_id, fresh in refreshed.items():
+        if journal_id not in existing_ids:
+            merged[journal_id] = fresh
+            stats["added"] += 1
+    ordered = sorted(merged.values(), key=lambda j: (str(j.get("journal_name", "")).lower(), j.get("journal_id")))
+    return ordered, stats
+
+
+def render_csv(journals: list[dict]) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_COLUMNS)
+    for journal in journals:
+        writer.writerow(
+            [
+                "|".join(journal.get("fields", []))
+                if col == "fields"
+                else ("" if journal.get(col) is None else journal.get(col))
+                for col in CSV_COLUMNS
+            ]
+        )
+    return buf.getvalue()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Refresh LetPub journal catalog incrementally")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Data directory containing letpub/")
+    parser.add_argument("--field", action="append", default=[], help="Only refresh this field name (repeatable)")
+    parser.add_argument("--workers", type=int, default=3, help="Concurrent page fetchers")
+    parser.add_argument("--min-interval", type=float, default=1.5, help="Seconds between request starts")
+    parser.add_argument("--max-pages", type=int, default=200, help="Safety cap on pages per field")
+    parser.add_argument("--prune", action="store_true", help="Drop journals no longer listed in refreshed fields")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="Report the diff without writing files")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    unique_path = data_dir / LETPUB_DB_PATH
+    raw_path = data_dir / RAW_PATH
+    csv_path = data_dir / CSV_PATH
+    if not unique_path.exists():
+        raise FileNotFoundError(f"catalog not found: {unique_path}")
+
+    catalog = read_file(unique_path)
+    raw = read_file(raw_path) if raw_path.exists() else {"rows": []}
+    fields_meta: dict[str, dict] = catalog.get("fields", {})
+    targets = {
+        name: meta
+        for name, meta in fields_meta.items()
+        if int(meta.get("field_tag", 0)) != SUPPLEMENT_FIELD_TAG and (not args.field or name in args.field)
+    }
+    if not targets:
+        print("[ERROR] No LetPub fields to refresh", file=sys.stderr)
+        return 2
+
+    if args.restart:
+        Checkpoint(CHECKPOINT_PATH).clear()
+    checkpoint = Checkpoint(CHECKPOINT_PATH, str(data_dir.resolve()))
+    client = client_from_env()
+    limiter = RateLimiter(args.min_interval)
+
+    scraped: dict[str, list[dict]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for name, meta in targets.items():
+            try:
+                rows, pages = scrape_field(pool, client, limiter, checkpoint, name, meta, args.max_pages)
+            except RETRYABLE_ERRORS as exc:
+                print(f"[ERROR] {name}: {exc}; progress kept in {CHECKPOINT_PATH}", file=sys.stderr)
+                return 1
+            scraped[name] = rows
+            meta["pages"] = pages
+            meta["scraped_rows"] = len(rows)
+            meta.setdefault("declared_total", len(rows))
+            print(f"Scraped {name}: pages={pages}, rows={len(rows)}")
+
+    # Keep raw rows grouped in `fields` order; untouched fields keep their old rows.
+    rows_by_field: dict[str, list[dict]] = {}
+    for row in raw.get("rows", []):
+        rows_by_field.setdefault(row.get("field", ""), []).append(row)
+    rows_by_field.update(scraped)
+    raw_rows = [row for name in fields_meta for row in rows_by_field.get(name, [])]
+    refreshed = build_unique([row for name in targets for row in scraped[name]])
+    journals, stats = diff_catalog(catalog.get("journals", []), refreshed, args.prune, targets)
+    print(
+        f"Catalog diff: added={stats['added']}, updated={stats['updated']}, "
+        f"unchanged={stats['unchanged']}, removed={stats['removed']}"
+    )
+
+    changed = stats["added"] or stats["updated"] or stats["removed"]
+    if args.dry_run:
+        # Keep the scraped pages: the real run that usually follows reuses them.
+        print(f"Dry run: files left untouched; scraped pages kept in {CHECKPOINT_PATH}")
+        return 0
+    if not changed:
+        print("Catalog unchanged; files left untouched.")
+        checkpoint.clear()
+        return 0
+
+    scraped_at = now_iso_utc()
+    write_json_atomic(
+        raw_path,
+        {
+            "scraped_at": scraped_at,
+            "source": LETPUB_SEARCH_URL,
+            "fields": fields_meta,
+            "raw_total": len(raw_rows),
+            "rows": raw_rows,
+        },
+    )
+    write_json_atomic(
+        unique_path,
+        {
+            "scraped_at": scraped_at,
+            "source": LETPUB_SEARCH_URL,
+            "fields": fields_meta,
+            "raw_total": len(raw_rows),
+            "unique_total": len(journals),
+            "journals": journals,
+        },
+    )
+    tmp_csv = csv_path.with_suffix(".csv.tmp")
+    with tmp_csv.open("w", encoding="utf-8", newline="") as f:
+        f.write(render_csv(journals))
+    os.replace(tmp_csv, csv_path)
+    checkpoint.clear()
+
+    # enrich_journal builds its ISSN/name lookup straight from the unique catalog.
+    index = load_letpub_if_index(data_dir)
+    print(
+        f"LetPub catalog refreshed: {unique_path} (journals={len(journals)}, "
+        f"index_by_issn={len(index.get('by_issn', {}))}, index_by_name={len(index.get('by_name', {}))})"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""Related-article table built from TF-IDF over every data file.
+
+Titles (counted twice) and summaries become sparse term-frequency vectors.
+Cosine similarity runs over an inverted index (term -> postings), i.e. one
+sparse matrix-vector product per query document, so documents that share no
+informative term are never compared. The top-k neighbors of every article
+are written to .cache/related/neighbors.json, which /api/related serves as a
+plain lookup.
+
+Runs are incremental: files whose (mtime, size) match the last run are
+skipped, and a re-digested file whose titles and summaries did not change
+dirties nothing. Only new, changed or removed articles are re-scored against
+the archive, and their scores are merged into the neighbor lists of the
+articles they touch. Older pairs keep the IDF of the run that scored them
+until the corpus has grown by REBUILD_DRIFT since the last full build (or
+--rebuild is passed), which triggers a full recomputation.
+
+    python3 scripts/related.py            # incremental update
+    python3 scripts/related.py --rebuild  # recompute everything
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from json_codec import JSONDecodeError, dumpb, read_file
+from profiling import run_main
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_DIR / "data"
+DEFAULT_INDEX_DIR = PROJECT_DIR / ".cache" / "related"
+DATA_FILE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-([A-Za-z0-9_-]+)\.json$")
+TOKEN_RE = re.compile(r"[a-z][a-z0-9\-]{2,}|[0-9]+[a-z][a-z0-9\-]*")
+STOPWORDS = frozenset(
+    """about after also among and are based been between both but can could did does during each for
+    from had has have here how however into its may more most new not now one only other our out over
+    such than that the their them then there these they this those through to under upon use used using
+    was were what when where which while who will with within without would study studies results
+    show shows showed patients""".split()
+)
+TOP_K = 10
+MIN_SCORE = 0.05
+# Terms in more than this share of documents carry almost no signal and
+# dominate posting-list sizes, so they are left out of the index.
+MAX_DF_RATIO = 0.3
+REBUILD_DRIFT = 0.25
+INDEX_VERSION = 1
+
+_neighbors_cache: dict[str, tuple[tuple[int, int], dict]] = {}
+_neighbors_lock = threading.Lock()
+
+
+def index_dir() -> Path:
+    return Path(os.environ.get("RELATED_INDEX_DIR", "") or DEFAULT_INDEX_DIR)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def term_frequencies(article: dict) -> dict[str, int]:
+    title = str(article.get("title", ""))
+    counts = Counter(tokenize(title) * 2)
+    counts.update(tokenize(str(article.get("summary", ""))))
+    return dict(counts)
+
+
+def _fingerprint(tf: dict[str, int]) -> str:
+    # Stdlib on purpose: fingerprints must not change with the installed JSON backend.
+    raw = json.dumps(sorted(tf.items()), separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=12).hexdigest()
+
+
+def scan_file(path: Path) -> dict[str, dict]:
+    """Documents of one data file keyed by url."""
+    match = DATA_FILE_RE.match(path.name)
+    if not match:
+        return {}
+    try:
+        payload = read_file(path)
+    except (OSError, JSONDecodeError):
+        return {}
+    articles = payload.get("articles") if isinstance(payload, dict) else None
+    docs = {}
+    for article in articles if isinstance(articles, list) else []:
+        if not isinstance(article, dict):
+            continue
+        url = str(article.get("url", "")).strip()
+        if not url:
+            continue
+        tf = term_frequencies(article)
+        if not tf:
+            continue
+        docs[url] = {
+            "title": str(article.get("title", "")),
+            "date": match.group(1),
+            "domain": match.group(2).lower(),
+            "file": path.name,
+            "tf": tf,
+            "fp": _fingerprint(tf),
+        }
+    return docs
+
+
+class RelatedIndex:
+    """Persistent document store, DF table and top-k neighbor lists."""
+
+    def __init__(self):
+        self.files: dict[str, dict] = {}
+        self.docs: dict[str, dict] = {}
+        self.neighbors: dict[str, list[list]] = {}
+        self.full_build_size = 0
+        self.df: Counter = Counter()
+
+    # ── persistence ──────────────────────────────────────────
+    @classmethod
+    def load(cls, directory: Path | None = None) -> "RelatedIndex":
+        index = cls()
+        path = (directory or index_dir()) / "index.json"
+        try:
+            raw = read_file(path)
+        except (OSError, JSONDecodeError):
+            return index
+        if raw.get("version") != INDEX_VERSION:
+            return index
+        index.files = raw.get("files", {})
+        index.docs = raw.get("docs", {})
+        index.neighbors = raw.get("neighbors", {})
+        index.full_build_size = int(raw.get("full_build_size", 0))
+        for doc in index.docs.values():
+            index.df.update(doc["tf"].keys())
+        return index
+
+    def save(self, directory: Path | None = None) -> None:
+        directory = directory or index_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        state = {
+            "version": INDEX_VERSION,
+            "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "full_build_size": self.full_build_size,
+            "files": self.files,
+            "docs": self.docs,
+            "neighbors": self.neighbors,
+        }
+        _write_atomic(directory / "index.json", state)
+        table = {
+            url: [
+                {
+                    "url": other,
+                    "title": self.docs[other]["title"],
+                    "date": self.docs[other]["date"],
+                    "domain": self.docs[other]["domain"],
+                    "score": score,
+                }
+                for other, score in pairs
+                if other in self.docs
+            ]
+            for url, pairs in self.neighbors.items()
+        }
+        _write_atomic(directory / "neighbors.json", {"updated_at": state["updated_at"], "neighbors": table})
+
+    # ── corpus maintenance ───────────────────────────────────
+    def sync_files(self, data_dir: Path = DATA_DIR) -> tuple[set[str], set[str]]:
+        """Bring docs in line with data/; returns (new or changed urls, removed urls)."""
+        current = {}
+        for path in sorted(data_dir.glob("*.json")):
+            if DATA_FILE_RE.match(path.name):
+                st = path.stat()
+                current[path.name] = [st.st_mtime_ns, st.st_size]
+
+        scanned = {
+            name: scan_file(data_dir / name)
+            for name, sig in current.items()
+            if self.files.get(name, {}).get("sig") != sig
+        }
+        file_urls = {
+            name: list(scanned[name]) if name in scanned else self.files[name]["urls"] for name in current
+        }
+        # A URL can appear in several files; the newest file owns it.
+        owners = {}
+        for name in sorted(file_urls):
+            for url in file_urls[name]:
+                owners[url] = name
+
+        dirty, removed = set(), set()
+        for url in list(self.docs):
+            if url not in owners:
+                removed.add(url)
+                self._drop(url)
+        for url, name in owners.items():
+            doc = self.docs.get(url)
+            if doc is not None and doc["file"] == name and name not in scanned:
+                continue
+            if name not in scanned:
+                scanned[name] = scan_file(data_dir / name)
+            fresh = scanned[name].get(url)
+            if fresh is None:
+                continue
+            if doc is not None and doc["fp"] == fresh["fp"]:
+                doc.update(title=fresh["title"], date=fresh["date"], domain=fresh["domain"], file=name)
+                continue
+            if doc is not None:
+                self._drop(url)
+            self.docs[url] = fresh
+            self.df.update(fresh["tf"].keys())
+            dirty.add(url)
+        self.files = {name: {"sig": current[name], "urls": file_urls[name]} for name in current}
+        return dirty, removed
+
+    def _drop(self, url: str) -> None:
+        doc = self.docs.pop(url)
+        self.df.subtract(doc["tf"].keys())
+        self.neighbors.pop(url, None)
+
+    # ── scoring ──────────────────────────────────────────────
+    def _vectors(self) -> tuple[dict[str, dict[str, float]], dict[str, list[tuple[str, float]]]]:
+        """L2-normalized sublinear TF-IDF vectors and the inverted index over them."""
+        n = len(self.docs)
+        max_df = max(2, int(n * MAX_DF_RATIO))
+        idf = {term: math.log((1 + n) / (1 + df)) + 1.0 for term, df in self.df.items() if 0 < df <= max_df}
+        vectors, postings = {}, defaultdict(list)
+        for url, doc in self.docs.items():
+            weights = {t: (1.0 + math.log(c)) * idf[t] for t, c in doc["tf"].items() if t in idf}
+            norm = math.sqrt(sum(w * w for w in weights.values()))
+            if not norm:
+                continue
+            vector = {t: w / norm for t, w in weights.items()}
+            vectors[url] = vector
+            for term, weight in vector.items():
+                postings[term].append((url, weight))
+        return vectors, postings
+
+    @staticmethod
+    def _scores(vector: dict[str, float], postings, exclude: str) -> dict[str, float]:
+        scores: dict[str, float] = defaultdict(float)
+        for term, weight in vector.items():
+            for other, other_weight in postings.get(term, ()):
+                scores[other] += weight * other_weight
+        scores.pop(exclude, None)
+        return scores
+
+    @staticmethod
+    def _top(scores, k: int) -> list[list]:
+        best = heapq.nlargest(k, ((s, u) for u, s in scores if s >= MIN_SCORE))
+        return [[url, round(score, 4)] for score, url in best]
+
+    def needs_rebuild(self) -> bool:
+        """True before the first full build and once the corpus grew by REBUILD_DRIFT since it."""
+        grown = len(self.docs) - self.full_build_size
+        return not self.full_build_size or grown > self.full_build_size * REBUILD_DRIFT
+
+    def rebuild(self, k: int = TOP_K) -> int:
+        vectors, postings = self._vectors()
+        self.neighbors = {
+            url: self._top(self._scores(vectors[url], postings, url).items(), k) if url in vectors else []
+            for url in self.docs
+        }
+        self.full_build_size = len(self.docs)
+        return len(vectors)
+
+    def update(self, dirty: set[str], removed: set[str], k: int = TOP_K) -> int:
+        """Re-score dirty docs and merge their pairs into everyone else's lists."""
+        stale = dirty | removed
+        refill = set()
+        for url, pairs in self.neighbors.items():
+            if url in stale:
+                continue
+            kept = [pair for pair in pairs if pair[0] not in stale]
+            if len(kept) < len(pairs):
+                self.neighbors[url] = kept
+                if len(kept) < k:
+                    refill.add(url)
+        if not dirty and not refill:
+            return 0
+
+        vectors, postings = self._vectors()
+        incoming: dict[str, list[tuple[str, float]]] = defaultdict(list)
+        for url in dirty:
+            vector = vectors.get(url)
+            if vector is None:
+                self.neighbors[url] = []
+                continue
+            scores = self._scores(vector, postings, url)
+            self.neighbors[url] = self._top(scores.items(), k)
+            for other, score in scores.items():
+                if other not in dirty and other not in refill and score >= MIN_SCORE:
+                    incoming[other].append((url, score))
+        for url in refill:
+            if url in vectors:
+                self.neighbors[url] = self._top(self._scores(vectors[url], postings, url).items(), k)
+        for url, pairs in incoming.items():
+            merged = {other: score for other, score in self.neighbors.get(url, [])}
+            for other, score in pairs:
+                merged[other] = round(score, 4)
+            self.neighbors[url] = self._top(merged.items(), k)
+        return len(dirty) + len(refill)
+
+
+def _write_atomic(path: Path, payload: object) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(dumpb(payload))
+    os.replace(tmp_path, path)
+
+
+def load_neighbors() -> dict:
+    """The served neighbor table, reparsed only when neighbors.json changes."""
+    path = index_dir() / "neighbors.json"
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return {}
+    key = (st.st_mtime_ns, st.st_size)
+    with _neighbors_lock:
+        cached = _neighbors_cache.get(str(path))
+        if cached and cached[0] == key:
+            return cached[1]
+    table = read_file(path).get("neighbors", {})
+    with _neighbors_lock:
+        _neighbors_cache[str(path)] = (key, table)
+    return table
+
+
+def related_for(url: str, k: int = TOP_K) -> list[dict] | None:
+    """Precomputed neighbors of a URL, or None when the URL is not indexed."""
+    neighbors = load_neighbors().get(url.strip())
+    return None if neighbors is None else neighbors[: max(0, k)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the related-article table from data/")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every neighbor list")
+    parser.add_argument("-k", type=int, default=TOP_K, help=f"Neighbors kept per article (default: {TOP_K})")
+    args = parser.parse_args()
+
+    index = RelatedIndex.load()
+    dirty, removed = index.sync_files()
+    if args.rebuild or index.needs_rebuild():
+        scored = index.rebuild(args.k)
+        mode = "full"
+    else:
+        scored = index.update(dirty, removed, args.k)
+        mode = "incremental"
+    index.save()
+    print(
+        f"Related index {mode}: docs={len(index.docs)} rescored={scored} "
+        f"new_or_changed={len(dirty)} removed={len(removed)} -> {index_dir() / 'neighbors.json'}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Weekly / monthly "best of" digests merged from the per-day digest blocks.
+
+Every data file already carries a ranked `digest.recommendations` list whose
+entries hold the article's `score` (generate_digest.build_digest). A rolling
+digest does not rescore anything: it streams those lists of every file in the
+window, which are each sorted by (score, published_date, title), through a
+k-way heap merge (heapq.merge), drops repeats of the same paper or link
+(PubMed id, else normalized URL) and stops after `top` entries. The cost is
+the files' JSON load plus O(top * log k) for k files, however many articles
+the window holds.
+
+Digests written before recommendations carried a score are rescored from
+their own articles as a fallback, once per file per run.
+
+    python3 scripts/rolling_digest.py --window week --top 20
+    python3 scripts/rolling_digest.py --window month --domain ad,pd --to 2026-02-28 --write
+
+`--write` stores the result under .cache/rolling/ (ROLLING_DIGEST_DIR
+overrides); the servers compute it on request at /api/digest/rolling.
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Iterator
+
+from article import extract_pmid, normalize_title, split_url
+from export import DATA_DIR, ExportQuery, load_payload, select_files
+from generate_digest import infer_kind
+from json_codec import dumps
+from profiling import run_main
+from scoring import ArticleBatch, get_profile
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+ROLLING_DIR = PROJECT_DIR / ".cache" / "rolling"
+WINDOWS = {"week": 7, "month": 30}
+DEFAULT_TOP = 20
+MAX_TOP = 200
+
+
+def rolling_dir() -> Path:
+    return Path(os.environ.get("ROLLING_DIGEST_DIR", "") or ROLLING_DIR)
+
+
+def dedupe_key(recommendation: dict) -> str:
+    url = str(recommendation.get("url", "")).strip()
+    pmid = extract_pmid(url)
+    if pmid:
+        return f"pmid:{pmid}"
+    if url:
+        return f"url:{split_url(url)[1]}"
+    return f"title:{normalize_title(str(recommendation.get('title', '')))}"
+
+
+def rank_key(entry: dict) -> tuple:
+    """Merge key; the same ordering build_digest ranks a day by."""
+    return (entry["score"], str(entry.get("published_date", "")), str(entry.get("title", "")))
+
+
+def _rescored(payload: dict, domain: str, recommendations: list[dict]) -> list[dict]:
+    """Recommendations of a digest without stored scores, scored from the file's articles."""
+    articles = [a for a in payload.get("articles", []) if isinstance(a, dict)]
+    digest = payload.get("digest") or {}
+    try:
+        profile = get_profile(str(digest.get("profile", "")), infer_kind(domain, articles))
+    except KeyError:
+        profile = get_profile("", infer_kind(domain, articles))
+    by_url = {}
+    for article, metrics in zip(articles, profile.score_batch(ArticleBatch(articles, str(payload.get("date", ""))))):
+        by_url.setdefault(str(article.get("url", "")), metrics["score"])
+    scored = [{**rec, "score": by_url.get(str(rec.get("url", "")), 0)} for rec in recommendations]
+    scored.sort(key=rank_key, reverse=True)
+    return scored
+
+
+def ranked_stream(payload: object, day: str, domain: str) -> Iterator[dict]:
+    """One file's recommendations in descending rank_key order, tagged with date and domain."""
+    digest = payload.get("digest") if isinstance(payload, dict) else None
+    recommendations = digest.get("recommendations") if isinstance(digest, dict) else None
+    if not isinstance(recommendations, list):
+        return
+    recommendations = [r for r in recommendations if isinstance(r, dict)]
+    if not all(isinstance(r.get("score"), (int, float)) for r in recommendations):
+        recommendations = _rescored(payload, domain, recommendations)
+    for rec in recommendations:
+        yield {**rec, "date": day, "domain": domain}
+
+
+def window_bounds(window: str, end: str = "", data_dir: Path = DATA_DIR) -> tuple[str, str]:
+    """(first day, last day) of a window ending at `end` (default: newest day with data)."""
+    if window not in WINDOWS:
+        raise ValueError(f"window must be one of: {', '.join(WINDOWS)}")
+    if not end:
+        days = [day for day, _, _ in select_files(ExportQuery(), data_dir)]
+        end = days[-1] if days else date.today().isoformat()
+    last = date.fromisoformat(ExportQuery._day(end, "to"))
+    return (last - timedelta(days=WINDOWS[window] - 1)).isoformat(), last.isoformat()
+
+
+def build_rolling_digest(
+    window: str = "week",
+    end: str = "",
+    domains: str = "",
+    top: int = DEFAULT_TOP,
+    data_dir: Path = DATA_DIR,
+    load: Callable[[Path], object] = load_payload,
+) -> dict:
+    """Top-`top` recommendations across days and domains of the window; raises ValueError on bad input."""
+    if not 1 <= top <= MAX_TOP:
+        raise ValueError(f"top must be in 1..{MAX_TOP}")
+    start, end = window_bounds(window, end, data_dir)
+    query = ExportQuery(start, end, domains)
+    files = select_files(query, data_dir)
+
+    streams = []
+    for day, domain, path in files:
+        try:
+            payload = load(path)
+        except (OSError, ValueError):
+            continue
+        streams.append(ranked_stream(payload, day, domain))
+
+    recommendations = []
+    seen = set()
+    for entry in heapq.merge(*streams, key=rank_key, reverse=True):
+        key = dedupe_key(entry)
+        if key in seen:
+            continue
+        seen.add(key)
+        recommendations.append(entry)
+        if len(recommendations) >= top:
+            break
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "window": window,
+        "from": start,
+        "to": end,
+        "domains": sorted(query.domains),
+        "files": len(files),
+        "recommendations": recommendations,
+    }
+
+
+def write_rolling_digest(digest: dict) -> Path:
+    directory = rolling_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = f"-{'-'.join(digest['domains'])}" if digest["domains"] else ""
+    path = directory / f"{digest['window']}-{digest['to']}{suffix}.json"
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(dumps(digest, pretty=True) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+    return path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Merge per-day digests into a weekly or monthly top-N")
+    parser.add_argument("--window", choices=sorted(WINDOWS), default="week")
+    parser.add_argument("--to", dest="end", default="", help="Last day of the window (YYYY-MM-DD, default: newest data)")
+    parser.add_argument("--domain", default="", help="Comma-separated domain ids (default: all)")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help=f"Recommendations to keep (default: {DEFAULT_TOP})")
+    parser.add_argument("--write", action="store_true", help="Store the result under .cache/rolling/")
+    args = parser.parse_args()
+    try:
+        digest = build_rolling_digest(args.window, args.end, args.domain, args.top)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.write:
+        print(f"Rolling digest written: {write_rolling_digest(digest)}")
+        return 0
+    sys.stdout.write(dumps(digest, pretty=True) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
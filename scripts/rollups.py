@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""Per-day, per-domain counter rollups of digest output.
+
+Whenever generate_digest.write_json writes a file under data/, that day's
+counters (priority tiers, focus topics, journals, impact-factor buckets)
+replace the day's row in .cache/rollups/<domain>.u32. Every counter is a
+dense uint32 column indexed by day offset. Queries build a cumulative sum
+per column once per loaded store, so any bucket total costs one
+subtraction no matter how many days the bucket spans.
+
+The store is derived data and can be rebuilt from data/ at any time:
+
+    python3 scripts/rollups.py --rebuild
+    python3 scripts/rollups.py --show ad --bucket month
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import math
+import os
+import re
+import sys
+import threading
+from array import array
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Mapping
+
+from json_codec import JSONDecodeError, dumpb, dumps, loads, read_file
+from profiling import run_main
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_DIR / "data"
+DEFAULT_ROLLUP_DIR = PROJECT_DIR / ".cache" / "rollups"
+DATA_FILE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-([A-Za-z0-9_-]+)\.json$")
+DOMAIN_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+BUCKETS = ("day", "week", "month")
+# Highest threshold first; the first one reached names the bucket.
+IF_BUCKETS = ((10.0, "if.10+"), (5.0, "if.5-10"), (3.0, "if.3-5"), (1.0, "if.1-3"), (0.0, "if.<1"))
+IF_MISSING = "if.none"
+STORE_VERSION = 1
+
+# uint32 cells, stored little-endian on disk.
+_CELL = "I" if array("I").itemsize == 4 else "L"
+
+_store_cache: dict[str, tuple[tuple[int, int], "RollupStore"]] = {}
+_store_cache_lock = threading.Lock()
+
+
+def rollup_dir() -> Path:
+    return Path(os.environ.get("ROLLUP_DIR", "") or DEFAULT_ROLLUP_DIR)
+
+
+def store_path(domain: str) -> Path:
+    return rollup_dir() / f"{domain}.u32"
+
+
+def if_bucket(value: object) -> str:
+    try:
+        impact_factor = float(value)
+    except (TypeError, ValueError):
+        return IF_MISSING
+    if not math.isfinite(impact_factor) or impact_factor <= 0:
+        return IF_MISSING
+    for threshold, name in IF_BUCKETS:
+        if impact_factor >= threshold:
+            return name
+    return IF_MISSING
+
+
+def day_counters(payload: dict) -> Counter:
+    """Counters for one data file: digest stats and topics plus article-level journal/IF columns."""
+    digest = payload.get("digest") if isinstance(payload.get("digest"), dict) else {}
+    stats = digest.get("stats") if isinstance(digest.get("stats"), dict) else {}
+    counts: Counter = Counter()
+    counts["total"] = int(stats.get("total", 0) or 0)
+    for tier in ("high", "medium", "low"):
+        counts[f"priority.{tier}"] = int(stats.get(f"{tier}_priority", 0) or 0)
+    for topic in digest.get("focus_topics") or []:
+        if isinstance(topic, dict) and topic.get("topic"):
+            counts[f"topic.{topic['topic']}"] += int(topic.get("count", 0) or 0)
+
+    articles = payload.get("articles")
+    for article in articles if isinstance(articles, list) else []:
+        if not isinstance(article, dict):
+            continue
+        journal = str(article.get("journal", "") or "").strip()
+        if journal:
+            counts[f"journal.{journal}"] += 1
+        # AI items carry neither field; leave them out of the IF histogram.
+        if "impact_factor" in article or journal:
+            counts[if_bucket(article.get("impact_factor"))] += 1
+    return +counts
+
+
+def _read_header(raw: bytes) -> tuple[int, dict]:
+    """Offset of the newline ending the JSON header line, and the parsed header."""
+    header_end = raw.find(b"\n")
+    if header_end < 0:
+        raise ValueError("missing header")
+    header = loads(raw[:header_end])
+    if not isinstance(header, dict):
+        raise ValueError("malformed header")
+    if header.get("version") != STORE_VERSION:
+        raise ValueError(f"unsupported version {header.get('version')!r}")
+    return header_end, header
+
+
+class RollupStore:
+    """Dense day × counter matrix for one domain, stored column by column."""
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.start = 0  # date ordinal of row 0
+        self.days = 0
+        self.columns: dict[str, array] = {}
+        self._prefix: dict[str, array] = {}
+
+    # ── persistence ──────────────────────────────────────────
+    @classmethod
+    def load(cls, domain: str, path: Path | None = None) -> "RollupStore":
+        path = path or store_path(domain)
+        store = cls(domain)
+        try:
+            raw = path.read_bytes()
+        except FileNotFoundError:
+            return store
+        try:
+            header_end, header = _read_header(raw)
+            days = int(header["days"])
+            start = date.fromisoformat(header["start"]).toordinal() if days else 0
+            names = [str(name) for name in header["columns"]]
+            if days < 0 or len(raw) != header_end + 1 + len(names) * days * 4:
+                raise ValueError("size does not match the header")
+        except (KeyError, TypeError, ValueError) as exc:
+            # Derived data: an empty or truncated store (e.g. a crash before the
+            # first save) must not break /api/trends; the next rebuild fills it in.
+            print(
+                f"[WARN] ignoring unreadable rollup store {path} ({exc}); "
+                "run `python3 scripts/rollups.py --rebuild`",
+                file=sys.stderr,
+            )
+            return store
+        store.days, store.start = days, start
+        width = days * 4
+        offset = header_end + 1
+        for name in names:
+            column = array(_CELL)
+            column.frombytes(raw[offset : offset + width])
+            if sys.byteorder == "big":
+                column.byteswap()
+            store.columns[name] = column
+            offset += width
+        return store
+
+    def save(self, path: Path | None = None) -> None:
+        path = path or store_path(self.domain)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = {
+            "version": STORE_VERSION,
+            "domain": self.domain,
+            "start": date.fromordinal(self.start).isoformat() if self.days else "",
+            "days": self.days,
+            "columns": sorted(self.columns),
+        }
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as f:
+            f.write(dumpb(header) + b"\n")
+            for name in header["columns"]:
+                column = self.columns[name]
+                if sys.byteorder == "big":
+                    column = array(_CELL, column)
+                    column.byteswap()
+                f.write(column.tobytes())
+        os.replace(tmp_path, path)
+
+    # ── updates ──────────────────────────────────────────────
+    def set_day(self, day: date, counts: Mapping[str, int]) -> None:
+        """Replace one day's row (idempotent: re-digesting a file does not double count)."""
+        ordinal = day.toordinal()
+        if not self.days:
+            self.start, self.days = ordinal, 1
+            for name in self.columns:
+                self.columns[name] = array(_CELL, [0])
+        elif ordinal < self.start:
+            pad = array(_CELL, [0]) * (self.start - ordinal)
+            for name, column in self.columns.items():
+                self.columns[name] = pad + column
+            self.days += self.start - ordinal
+            self.start = ordinal
+        elif ordinal >= self.start + self.days:
+            pad = array(_CELL, [0]) * (ordinal - self.start - self.days + 1)
+            for column in self.columns.values():
+                column.extend(pad)
+            self.days += len(pad)
+
+        row = ordinal - self.start
+        for name in counts:
+            if name not in self.columns:
+                self.columns[name] = array(_CELL, [0]) * self.days
+        for name, column in self.columns.items():
+            column[row] = max(0, min(int(counts.get(name, 0)), 0xFFFFFFFF))
+        self._prefix.clear()
+
+    # ── queries ──────────────────────────────────────────────
+    def _prefix_for(self, name: str) -> array:
+        prefix = self._prefix.get(name)
+        if prefix is None:
+            prefix = array("Q", [0]) * (self.days + 1)
+            running = 0
+            for i, value in enumerate(self.columns[name]):
+                running += value
+                prefix[i + 1] = running
+            self._prefix[name] = prefix
+        return prefix
+
+    def total(self, name: str, first: date, last: date) -> int:
+        """Sum of a column over [first, last], clipped to the stored range."""
+        if name not in self.columns or not self.days:
+            return 0
+        lo = max(first.toordinal() - self.start, 0)
+        hi = min(last.toordinal() - self.start, self.days - 1)
+        if hi < lo:
+            return 0
+        prefix = self._prefix_for(name)
+        return prefix[hi + 1] - prefix[lo]
+
+    @property
+    def first_day(self) -> date | None:
+        return date.fromordinal(self.start) if self.days else None
+
+    @property
+    def last_day(self) -> date | None:
+        return date.fromordinal(self.start + self.days - 1) if self.days else None
+
+
+def bucket_ranges(first: date, last: date, bucket: str) -> list[tuple[date, date]]:
+    """Calendar-aligned buckets (ISO weeks start Monday) clipped to [first, last]."""
+    ranges = []
+    cursor = first
+    while cursor <= last:
+        if bucket == "day":
+            end = cursor
+        elif bucket == "week":
+            end = cursor + timedelta(days=6 - cursor.weekday())
+        else:
+            next_month = date(cursor.year + cursor.month // 12, cursor.month % 12 + 1, 1)
+            end = next_month - timedelta(days=1)
+        end = min(end, last)
+        ranges.append((cursor, end))
+        cursor = end + timedelta(days=1)
+    return ranges
+
+
+def load_store(domain: str) -> RollupStore:
+    """Load a domain store, reusing the parsed copy (and its prefix sums) until the file changes."""
+    path = store_path(domain)
+    try:
+        st = path.stat()
+        key = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        return RollupStore(domain)
+    with _store_cache_lock:
+        cached = _store_cache.get(str(path))
+        if cached and cached[0] == key:
+            return cached[1]
+    store = RollupStore.load(domain, path)
+    with _store_cache_lock:
+        _store_cache[str(path)] = (key, store)
+    return store
+
+
+def query_trends(domain: str, date_from: str = "", date_to: str = "", bucket: str = "week", columns: str = "") -> dict:
+    """Bucketed counters for /api/trends; raises ValueError on bad parameters.
+
+    ``columns`` is a comma-separated list of column names or prefixes
+    (e.g. ``priority.,topic.``); empty selects every column.
+    """
+    domain = domain.strip().lower()
+    if not DOMAIN_RE.match(domain):
+        raise ValueError("invalid domain")
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+    try:
+        first = date.fromisoformat(date_from) if date_from else None
+        last = date.fromisoformat(date_to) if date_to else None
+    except ValueError:
+        raise ValueError("from/to must be YYYY-MM-DD") from None
+
+    store = load_store(domain)
+    # Clip to stored days so an open-ended range cannot fan out into empty buckets.
+    if store.days:
+        first = max(first, store.first_day) if first else store.first_day
+        last = min(last, store.last_day) if last else store.last_day
+    if first is None or last is None or last < first:
+        ranges = []
+    else:
+        ranges = bucket_ranges(first, last, bucket)
+
+    wanted = [c.strip() for c in columns.split(",") if c.strip()]
+    names = sorted(
+        name for name in store.columns if not wanted or any(name == w or name.startswith(w) for w in wanted)
+    )
+    series = {name: [store.total(name, lo, hi) for lo, hi in ranges] for name in names}
+    return {
+        "domain": domain,
+        "bucket": bucket,
+        "from": first.isoformat() if first else "",
+        "to": last.isoformat() if last else "",
+        "buckets": [{"start": lo.isoformat(), "end": hi.isoformat()} for lo, hi in ranges],
+        "series": {name: values for name, values in series.items() if any(values)},
+    }
+
+
+def parse_data_filename(path: str | Path) -> tuple[date, str] | None:
+    match = DATA_FILE_RE.match(Path(path).name)
+    if not match:
+        return None
+    try:
+        return date.fromisoformat(match.group(1)), match.group(2).lower()
+    except ValueError:
+        return None
+
+
+def _locked(domain: str):
+    directory = rollup_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    lock_file = (directory / f"{domain}.lock").open("a")
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    return lock_file
+
+
+def record_payload(path: str | Path, payload: dict) -> bool:
+    """Replace the day's counters for a data/ file; returns False for files outside the store's scope."""
+    path = Path(path)
+    parsed = parse_data_filename(path)
+    if parsed is None or path.resolve().parent != DATA_DIR.resolve():
+        return False
+    day, domain = parsed
+    with _locked(domain):
+        store = RollupStore.load(domain)
+        store.set_day(day, day_counters(payload))
+        store.save()
+    return True
+
+
+def rebuild(domains: set[str] | None = None, data_dir: Path = DATA_DIR) -> dict[str, int]:
+    """Recreate stores from every data file; returns days written per domain."""
+    stores: dict[str, RollupStore] = {}
+    days: Counter = Counter()
+    for path in sorted(data_dir.glob("*.json")):
+        parsed = parse_data_filename(path)
+        if parsed is None:
+            continue
+        day, domain = parsed
+        if domains and domain not in domains:
+            continue
+        try:
+            payload = read_file(path)
+        except (OSError, JSONDecodeError) as exc:
+            print(f"[WARN] skipped {path.name}: {exc}")
+            continue
+        if isinstance(payload, dict):
+            stores.setdefault(domain, RollupStore(domain)).set_day(day, day_counters(payload))
+            days[domain] += 1
+    for domain, store in stores.items():
+        with _locked(domain):
+            store.save()
+    return dict(days)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintain and query per-domain digest rollups")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild stores from data/*.json")
+    parser.add_argument("--domain", action="append", default=[], help="Limit --rebuild to these domains")
+    parser.add_argument("--show", metavar="DOMAIN", help="Print bucketed trends for a domain")
+    parser.add_argument("--from", dest="date_from", default="", help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", default="", help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--bucket", choices=BUCKETS, default="week")
+    parser.add_argument("--columns", default="", help="Comma-separated column names or prefixes")
+    args = parser.parse_args()
+
+    if not args.rebuild and not args.show:
+        parser.error("nothing to do: pass --rebuild and/or --show DOMAIN")
+    if args.rebuild:
+        written = rebuild({d.lower() for d in args.domain} or None)
+        for domain, days in sorted(written.items()):
+            print(f"Rollup rebuilt: {domain} ({days} days) -> {store_path(domain)}")
+    if args.show:
+        try:
+            result = query_trends(args.show, args.date_from, args.date_to, args.bucket, args.columns)
+        except ValueError as exc:
+            print(f"[ERROR] {exc}", file=sys.stderr)
+            return 2
+        print(dumps(result, pretty=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_main(main))
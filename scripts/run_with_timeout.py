@@ -1,61 +1,300 @@
 #!/usr/bin/env python3
-"""Run a command with timeout and stream output."""
+"""Run a command with timeout and stream output.
+
+Every run appends one line to the run history (.cache/runs/history.jsonl,
+RUN_HISTORY_PATH overrides): key, wall time, user/sys CPU and peak RSS of
+the child (resource.getrusage(RUSAGE_CHILDREN)), exit code and whether it
+timed out. The key defaults to the command name; fetch.sh passes
+`codex-<domain>`.
+
+--adaptive derives the timeout from that history: ADAPTIVE_MARGIN times the
+p99 wall time of the key's recent successful runs, clamped to
+[--min-timeout, --timeout]. `--timeout` stays the ceiling, and is used as is
+while there are fewer than MIN_SAMPLES successes or when one of the last
+runs timed out (so a too-tight estimate cannot ratchet itself down).
+
+--max-memory-mb / --max-cpu-seconds set RLIMIT_AS / RLIMIT_CPU in the child,
+so a runaway process dies on its own limit instead of at the wall timeout.
+
+SIGTERM/SIGINT to run_with_timeout itself (e.g. /api/fetch/cancel signalling
+fetch.sh's process group) is passed on to the child's process group the same
+way a timeout is: SIGTERM, then SIGKILL after STOP_GRACE_SECONDS.
+
+    python3 scripts/run_with_timeout.py --timeout 600 --adaptive --key codex-ai -- codex exec ...
+    python3 scripts/run_with_timeout.py --stats [--key codex-ai]
+"""
 
 from __future__ import annotations
 
 import argparse
+import fcntl
+import math
 import os
+import resource
 import signal
 import subprocess
 import sys
+import time
+from pathlib import Path
+
+from json_codec import JSONDecodeError, dumps, loads
+from profiling import run_main
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+HISTORY_PATH = PROJECT_DIR / ".cache" / "runs" / "history.jsonl"
+HISTORY_WINDOW = 50  # recent runs per key used for the p99
+MAX_HISTORY_LINES = 5000  # compacted to HISTORY_WINDOW runs per key beyond this
+MIN_SAMPLES = 5
+RECENT_TIMEOUT_RUNS = 3
+ADAPTIVE_MARGIN = 1.5
+DEFAULT_MIN_TIMEOUT = 60
+TIMEOUT_EXIT = 124
+STOP_GRACE_SECONDS = 3
+
+
+def history_path() -> Path:
+    return Path(os.environ.get("RUN_HISTORY_PATH", "") or HISTORY_PATH)
+
+
+def log(message: str) -> None:
+    print(f"[run_with_timeout] {message}", file=sys.stderr)
+
+
+# ── history ──────────────────────────────────────────────────
+def load_history(path: Path, key: str | None = None) -> list[dict]:
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+    runs = []
+    for line in lines:
+        try:
+            run = loads(line)
+        except JSONDecodeError:
+            continue
+        if isinstance(run, dict) and (key is None or run.get("key") == key):
+            runs.append(run)
+    return runs
+
+
+def _compact(lines: list[str]) -> list[str]:
+    """Keep the last HISTORY_WINDOW runs of every key, in file order."""
+    seen: dict[str, int] = {}
+    kept = []
+    for line in reversed(lines):
+        try:
+            key = str(loads(line).get("key", ""))
+        except (JSONDecodeError, AttributeError):
+            continue
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] <= HISTORY_WINDOW:
+            kept.append(line)
+    kept.reverse()
+    return kept
+
+
+def append_history(path: Path, run: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+", encoding="utf-8") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.write(dumps(run) + "\n")
+        f.flush()
+        f.seek(0)
+        lines = f.read().splitlines()
+        if len(lines) > MAX_HISTORY_LINES:
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_text("\n".join(_compact(lines)) + "\n", encoding="utf-8")
+            os.replace(tmp_path, path)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def adaptive_timeout(runs: list[dict], ceiling: int, floor: int) -> tuple[int, str]:
+    """(timeout seconds, reason) for the next run of a key given its history."""
+    recent = runs[-HISTORY_WINDOW:]
+    if any(run.get("timed_out") for run in recent[-RECENT_TIMEOUT_RUNS:]):
+        return ceiling, "a recent run timed out"
+    walls = [float(run["wall"]) for run in recent if run.get("exit") == 0 and "wall" in run]
+    if len(walls) < MIN_SAMPLES:
+        return ceiling, f"{len(walls)} successful run(s) on record, need {MIN_SAMPLES}"
+    p99 = percentile(walls, 99)
+    timeout = min(ceiling, max(floor, math.ceil(p99 * ADAPTIVE_MARGIN)))
+    return timeout, f"p99 {p99:.1f}s over {len(walls)} run(s) x {ADAPTIVE_MARGIN:g}"
+
+
+def print_stats(path: Path, key: str | None) -> int:
+    runs = load_history(path, key)
+    by_key: dict[str, list[dict]] = {}
+    for run in runs:
+        by_key.setdefault(str(run.get("key", "")), []).append(run)
+    if not by_key:
+        print(f"No runs recorded in {path}")
+        return 0
+    print(f"{'key':<24} {'runs':>5} {'ok':>4} {'t/o':>4} {'p50':>8} {'p99':>8} {'cpu p99':>8} {'rss max':>9}")
+    for name, items in sorted(by_key.items()):
+        walls = [float(r.get("wall", 0)) for r in items]
+        cpu = [float(r.get("user", 0)) + float(r.get("sys", 0)) for r in items]
+        rss = max(int(r.get("max_rss_kb", 0)) for r in items)
+        print(
+            f"{name:<24} {len(items):>5} {sum(r.get('exit') == 0 for r in items):>4} "
+            f"{sum(bool(r.get('timed_out')) for r in items):>4} {percentile(walls, 50):>7.1f}s "
+            f"{percentile(walls, 99):>7.1f}s {percentile(cpu, 99):>7.1f}s {rss / 1024:>7.0f}MB"
+        )
+    return 0
+
+
+# ── child process ────────────────────────────────────────────
+def _limits(max_memory_mb: int, max_cpu_seconds: int):
+    """preexec_fn applying RLIMIT_AS / RLIMIT_CPU in the child, or None."""
+    if max_memory_mb <= 0 and max_cpu_seconds <= 0:
+        return None
+
+    def apply() -> None:
+        if max_memory_mb > 0:
+            limit = max_memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        if max_cpu_seconds > 0:
+            # SIGXCPU at the soft limit, SIGKILL a few seconds later.
+            resource.setrlimit(resource.RLIMIT_CPU, (max_cpu_seconds, max_cpu_seconds + 5))
+
+    return apply
+
+
+class Terminated(Exception):
+    """SIGTERM received by run_with_timeout itself."""
+
+
+def _raise_terminated(signum, frame) -> None:
+    raise Terminated()
+
+
+def _kill_group(proc: subprocess.Popen, sig: int) -> None:
+    try:
+        os.killpg(proc.pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def _group_alive(proc: subprocess.Popen) -> bool:
+    try:
+        os.killpg(proc.pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def _stop_group(proc: subprocess.Popen) -> None:
+    """SIGTERM the child's process group, SIGKILL it if still alive after the grace period."""
+    deadline = time.monotonic() + STOP_GRACE_SECONDS
+    _kill_group(proc, signal.SIGTERM)
+    try:
+        proc.wait(timeout=STOP_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        pass
+    # The child may exit on SIGTERM while others in its group ignore it.
+    while _group_alive(proc) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    _kill_group(proc, signal.SIGKILL)
+    proc.wait()
+
+
+def run_command(command: list[str], timeout: int, preexec_fn=None) -> tuple[int, bool]:
+    """(exit code, timed out) of `command` run in its own process group."""
+    try:
+        proc = subprocess.Popen(command, start_new_session=True, preexec_fn=preexec_fn)
+    except subprocess.SubprocessError as exc:
+        # setrlimit() failed in the child (e.g. RLIMIT_AS unsupported on this platform).
+        log(f"could not apply resource limits: {exc}")
+        return 2, False
+    previous = signal.signal(signal.SIGTERM, _raise_terminated)
+    try:
+        return proc.wait(timeout=timeout), False
+    except subprocess.TimeoutExpired:
+        log(f"timed out after {timeout}s, terminating process group")
+        _stop_group(proc)
+        return TIMEOUT_EXIT, True
+    except KeyboardInterrupt:
+        _stop_group(proc)
+        return 130, False
+    except Terminated:
+        log("terminated, stopping process group")
+        _stop_group(proc)
+        return 128 + signal.SIGTERM, False
+    finally:
+        signal.signal(signal.SIGTERM, previous)
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Run command with timeout")
-    parser.add_argument("--timeout", type=int, required=True, help="Timeout seconds (>0)")
+    parser.add_argument("--timeout", type=int, default=0, help="Timeout seconds (>0); the ceiling with --adaptive")
+    parser.add_argument("--key", default="", help="History key (default: command name)")
+    parser.add_argument("--adaptive", action="store_true", help="Derive the timeout from the key's p99 wall time")
+    parser.add_argument("--min-timeout", type=int, default=DEFAULT_MIN_TIMEOUT, help="Lower bound with --adaptive")
+    parser.add_argument("--max-memory-mb", type=int, default=0, help="RLIMIT_AS for the child in MiB (0: none)")
+    parser.add_argument("--max-cpu-seconds", type=int, default=0, help="RLIMIT_CPU for the child (0: none)")
+    parser.add_argument("--stats", action="store_true", help="Print recorded runs per key and exit")
     parser.add_argument("command", nargs=argparse.REMAINDER, help="Command after --")
     args = parser.parse_args()
 
+    path = history_path()
+    if args.stats:
+        return print_stats(path, args.key or None)
+
     timeout = args.timeout
     command = args.command
     if command and command[0] == "--":
         command = command[1:]
 
     if timeout <= 0:
-        print("[run_with_timeout] timeout must be > 0", file=sys.stderr)
+        log("timeout must be > 0")
         return 2
     if not command:
-        print("[run_with_timeout] command is required", file=sys.stderr)
+        log("command is required")
         return 2
 
-    proc = subprocess.Popen(command, start_new_session=True)
+    key = args.key or os.path.basename(command[0])
+    if args.adaptive:
+        timeout, reason = adaptive_timeout(load_history(path, key), timeout, min(args.min_timeout, timeout))
+        log(f"adaptive timeout for {key}: {timeout}s ({reason})")
+
+    started = time.time()
+    wall_started = time.perf_counter()
+    code, timed_out = run_command(command, timeout, _limits(args.max_memory_mb, args.max_cpu_seconds))
+    wall = time.perf_counter() - wall_started
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    max_rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss  # bytes on macOS
+    if code < 0:
+        name = signal.Signals(-code).name if -code in signal.valid_signals() else str(-code)
+        if args.max_memory_mb > 0 or args.max_cpu_seconds > 0:
+            log(f"child killed by {name} (limits: memory {args.max_memory_mb or '-'} MiB, cpu {args.max_cpu_seconds or '-'}s)")
+        else:
+            log(f"child killed by {name}")
+
     try:
-        return proc.wait(timeout=timeout)
-    except subprocess.TimeoutExpired:
-        print(
-            f"[run_with_timeout] timed out after {timeout}s, terminating process group",
-            file=sys.stderr,
+        append_history(
+            path,
+            {
+                "key": key,
+                "at": round(started, 3),
+                "wall": round(wall, 3),
+                "user": round(usage.ru_utime, 3),
+                "sys": round(usage.ru_stime, 3),
+                "max_rss_kb": max_rss_kb,
+                "exit": code,
+                "timed_out": timed_out,
+                "timeout": timeout,
+            },
         )
-        try:
-            os.killpg(proc.pid, signal.SIGTERM)
-        except ProcessLookupError:
-            pass
-        try:
-            proc.wait(timeout=3)
-        except subprocess.TimeoutExpired:
-            try:
-                os.killpg(proc.pid, signal.SIGKILL)
-            except ProcessLookupError:
-                pass
-            proc.wait()
-        return 124
-    except KeyboardInterrupt:
-        try:
-            os.killpg(proc.pid, signal.SIGTERM)
-        except ProcessLookupError:
-            pass
-        return 130
+    except OSError as exc:
+        log(f"[WARN] Could not record run history: {exc} (non-blocking)")
+    return code
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(run_main(main))
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Configurable article scoring profiles for generate_digest.py.
+
+Profiles live in scoring_profiles.json next to this file (override with
+SCORING_PROFILES_PATH). Each profile is compiled once per process into
+keyword groups, an impact-factor bonus curve and an optional recency decay.
+An ArticleBatch lowercases each article's text once, so several profiles can
+rank the same day without re-reading or re-lowercasing any article.
+
+Keyword matching is a plain substring test per keyword and text, the same
+O(keywords x articles) work the per-article scorer did. A group counts every
+keyword found, including keywords nested in longer ones ("release" inside
+"released"). With a dozen or so keywords per group, CPython's substring
+search beats a lookahead alternation regex over the same keywords, which
+needs a zero-width match attempt at every position of the text.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from datetime import date
+from pathlib import Path
+
+from article import Article, search_text
+from json_codec import read_file
+
+
+DEFAULT_PROFILES_PATH = Path(__file__).resolve().parent / "scoring_profiles.json"
+
+_profile_cache: dict[tuple[str, float], dict] = {}
+
+
+def article_text(article: dict | Article) -> str:
+    return article.text if isinstance(article, Article) else search_text(article)
+
+
+def _parse_date(value: object) -> date | None:
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+def _impact_factor(article: dict) -> float | None:
+    try:
+        value = float(article.get("impact_factor"))
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) and value > 0 else None
+
+
+class ArticleBatch:
+    """Per-day article view with derived columns computed once and shared by all profiles."""
+
+    def __init__(self, articles: list[dict | Article | None], reference_date: str = ""):
+        records = [a if isinstance(a, Article) else Article(a) for a in articles if isinstance(a, (dict, Article))]
+        self.records = records
+        self.articles = [record.data for record in records]
+        self.texts = [record.text for record in records]
+        self.impact_factors = [_impact_factor(a) for a in self.articles]
+        ref = _parse_date(reference_date)
+        self.ages: list[int | None] = []
+        for article in self.articles:
+            published = _parse_date(article.get("published_date", ""))
+            self.ages.append(max(0, (ref - published).days) if ref and published else None)
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+
+class ScoringProfile:
+    """A compiled scoring profile; see scoring_profiles.json for the schema."""
+
+    def __init__(self, profile_id: str, spec: dict):
+        self.id = profile_id
+        self.kind = str(spec.get("kind", "research"))
+        self.description = str(spec.get("description", ""))
+        self.groups = tuple(
+            (
+                str(group["name"]),
+                tuple(dict.fromkeys(str(kw).lower() for kw in group.get("keywords", []))),
+                float(group.get("weight", 1)),
+                str(group.get("reason", "")),
+            )
+            for group in spec.get("groups", [])
+        )
+        self.baseline_score = float(spec.get("baseline_score", 1))
+        self.fallback_reason = str(spec.get("fallback_reason", "general update"))
+        thresholds = spec.get("priority_thresholds", {})
+        self.high_threshold = float(thresholds.get("high", 5))
+        self.medium_threshold = float(thresholds.get("medium", 2))
+        self.if_bonus = tuple(
+            sorted(
+                ((float(step["min_if"]), float(step["bonus"])) for step in spec.get("if_bonus", [])),
+                reverse=True,
+            )
+        )
+        half_life = spec.get("recency_half_life_days")
+        self.half_life_days = float(half_life) if half_life else None
+        near_dup = spec.get("near_duplicates")
+        self.near_duplicates = (
+            {
+                "threshold": float(near_dup.get("threshold", 0.5)),
+                "window_days": int(near_dup.get("window_days", 0)),
+            }
+            if near_dup
+            else None
+        )
+
+    def priority(self, score: float) -> str:
+        if score >= self.high_threshold:
+            return "high"
+        if score >= self.medium_threshold:
+            return "medium"
+        return "low"
+
+    def bonus_for_if(self, impact_factor: float | None) -> tuple[float, float]:
+        """Return (bonus, threshold) for the highest step reached, or (0, 0)."""
+        if impact_factor is None:
+            return 0.0, 0.0
+        for threshold, bonus in self.if_bonus:
+            if impact_factor >= threshold:
+                return bonus, threshold
+        return 0.0, 0.0
+
+    def score_batch(self, batch: ArticleBatch) -> list[dict]:
+        texts = batch.texts
+        hits_by_group = []
+        for _, keywords, _, _ in self.groups:
+            hits = [0] * len(texts)
+            for kw in keywords:
+                for i, text in enumerate(texts):
+                    if kw in text:
+                        hits[i] += 1
+            hits_by_group.append(hits)
+
+        results = []
+        for i in range(len(texts)):
+            score = 0.0
+            reasons = []
+            any_hit = False
+            for g, (_, _, weight, reason) in enumerate(self.groups):
+                count = hits_by_group[g][i]
+                if count:
+                    any_hit = True
+                    score += count * weight
+                    if reason:
+                        reasons.append(reason)
+            if not any_hit:
+                score = self.baseline_score
+                reasons.append(self.fallback_reason)
+
+            bonus, threshold = self.bonus_for_if(batch.impact_factors[i])
+            if bonus:
+                score += bonus
+                reasons.append(f"high-impact journal (IF >= {threshold:g})")
+
+            age = batch.ages[i]
+            if self.half_life_days and age and score > 0:
+                score *= 0.5 ** (age / self.half_life_days)
+
+            score = int(score) if float(score).is_integer() else round(score, 3)
+            metrics = {
+                "score": score,
+                "priority": self.priority(score),
+                "reason": "; ".join(reasons),
+            }
+            for g, (name, _, _, _) in enumerate(self.groups):
+                metrics[f"{name}_hits"] = hits_by_group[g][i]
+            results.append(metrics)
+        return results
+
+
+def load_profiles(path: str | Path | None = None) -> dict:
+    """Load and compile profiles; cached per (path, mtime) so each process compiles once."""
+    path = Path(path or os.environ.get("SCORING_PROFILES_PATH", "") or DEFAULT_PROFILES_PATH)
+    key = (str(path), path.stat().st_mtime)
+    cached = _profile_cache.get(key)
+    if cached is not None:
+        return cached
+    raw = read_file(path)
+    profiles = {pid: ScoringProfile(pid, spec) for pid, spec in raw.get("profiles", {}).items()}
+    compiled = {"defaults": dict(raw.get("defaults", {})), "profiles": profiles}
+    _profile_cache[key] = compiled
+    return compiled
+
+
+def get_profile(profile_id: str = "", kind: str = "research", path: str | Path | None = None) -> ScoringProfile:
+    compiled = load_profiles(path)
+    profile_id = profile_id or compiled["defaults"].get(kind, "")
+    profile = compiled["profiles"].get(profile_id)
+    if profile is None:
+        raise KeyError(f"unknown scoring profile: {profile_id or kind}")
+    return profile
@@ -1,5 +1,7 @@
+import argparse
+import email.utils
 import http.server
-import json
+import io
 import os
 import re
 import subprocess
@@ -9,111 +11,213 @@ import queue
 from datetime import datetime
 from urllib.parse import urlparse, parse_qs
 
-PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATA_DIR = os.path.join(PROJECT_DIR, "data")
-WEB_DIR = os.path.join(PROJECT_DIR, "web")
-FETCH_SCRIPT = os.path.join(PROJECT_DIR, "scripts", "fetch.sh")
-ACADEMIC_SOURCES_DIR = os.path.join(PROJECT_DIR, ".agents", "skills", "academic-search", "sources")
-SKILLS_DIR = os.path.join(PROJECT_DIR, ".agents", "skills")
+from dashboard_data import (
+    DATA_DIR,
+    FETCH_SCRIPT,
+    LOGS_DIR,
+    PROJECT_DIR,
+    WEB_DIR,
+    academic_domain_ids,
+    gzip_sidecar,
+    list_data_dates,
+    load_domains,
+)
+from export import (
+    CONTENT_TYPE as EXPORT_CONTENT_TYPE,
+    ExportQuery,
+    catalog_etag,
+    etag_matches,
+    iter_ndjson,
+    select_files,
+)
+from fetch_jobs import known_mode, plan_fetch, remaining_domains, task_key_for, terminate_group
+from json_codec import JSONDecodeError, dumpb, dumps, loads
+from log_pipeline import filter_command, read_batches
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, RequestMetrics
+from payload_cache import PayloadCache, warm_days_from_env
+from profiling import debug_profile, run_main
+from related import TOP_K, related_for
+from rolling_digest import DEFAULT_TOP as ROLLING_TOP, build_rolling_digest
+from rollups import query_trends
+from stream import PING_SECONDS as STREAM_PING_SECONDS, DataWatcher, StreamHub, format_event
+
 
 # Global state for task logs
 task_logs = {}
 active_processes = {}
+active_domains = {}  # task key -> domains its fetch.sh run has not finished
+cancelled_tasks = set()
 log_queues = {}
 log_lock = threading.Lock()
+metrics = RequestMetrics()
+data_cache = PayloadCache.from_env()
+stream_hub = StreamHub()
 
 
-def parse_frontmatter(filepath):
-    """Parse YAML frontmatter (between --- markers) from a markdown file."""
-    result = {}
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        match = re.match(r'^---\s*\n(.*?)\n---', content, re.DOTALL)
-        if match:
-            for line in match.group(1).splitlines():
-                line = line.strip()
-                if ':' in line:
-                    key, _, value = line.partition(':')
-                    result[key.strip()] = value.strip().strip('"').strip("'")
-    except Exception:
-        pass
-    return result
-
-
-def load_domains():
-    """Load domain configs and auto-discover from data files.
-
-    Priority: academic-search/sources/{id}.md > skill SKILL.md (domain_* fields) > minimal fallback.
-    Any domain ID found in data/ but missing a config gets a default entry.
-    """
-    # Step 1: explicit configs from academic-search/sources/*.md
-    explicit = {}
-    if os.path.isdir(ACADEMIC_SOURCES_DIR):
-        for fname in sorted(os.listdir(ACADEMIC_SOURCES_DIR)):
-            if not fname.endswith('.md'):
-                continue
-            domain = parse_frontmatter(os.path.join(ACADEMIC_SOURCES_DIR, fname))
-            if domain.get('id'):
-                explicit[domain['id']] = domain
-
-    # Step 2: skill-level domain configs (skills that declare domain_id in SKILL.md)
-    skill_domains = {}
-    if os.path.isdir(SKILLS_DIR):
-        for skill_name in os.listdir(SKILLS_DIR):
-            skill_md = os.path.join(SKILLS_DIR, skill_name, 'SKILL.md')
-            if not os.path.isfile(skill_md):
-                continue
-            meta = parse_frontmatter(skill_md)
-            domain_id = meta.get('domain_id')
-            if not domain_id:
-                continue
-            skill_domains[domain_id] = {
-                'id': domain_id,
-                'label': meta.get('domain_label', domain_id.upper()),
-                'category': meta.get('domain_category', domain_id.upper()),
-                'color': meta.get('domain_color', '#6366f1'),
-                'icon': meta.get('domain_icon', 'layers'),
-                'skill': meta.get('name', skill_name),
-                'order': meta.get('domain_order', '0'),
-            }
-
-    # Step 3: discover domain IDs from data files
-    discovered = set()
-    if os.path.isdir(DATA_DIR):
-        for f in os.listdir(DATA_DIR):
-            if not f.endswith('.json'):
-                continue
-            name = f[:-5]
-            parts = name.rsplit('-', 1)
-            if len(parts) == 2 and re.match(r'^\d{4}-\d{2}-\d{2}$', parts[0]):
-                discovered.add(parts[1])
-
-    # Step 4: merge — explicit wins, then skill_domains, then minimal fallback
-    all_domains = dict(explicit)
-    for domain_id in discovered:
-        if domain_id in all_domains:
-            continue
-        if domain_id in skill_domains:
-            all_domains[domain_id] = skill_domains[domain_id]
-        else:
-            all_domains[domain_id] = {
-                'id': domain_id,
-                'label': domain_id.upper(),
-                'category': domain_id.upper(),
-                'color': '#6366f1',
-                'icon': 'layers',
-                'skill': 'daily-ai-news',
-                'order': '0',
-            }
-
-    domains = list(all_domains.values())
-    domains.sort(key=lambda d: int(d.get('order', 99)))
-    return domains
+def _fetch_gauges():
+    with log_lock:
+        return [({"task": k}, 1 if p.poll() is None else 0) for k, p in sorted(active_processes.items())]
+
+
+def _subscriber_gauges():
+    with log_lock:
+        return [({"task": k}, len(qs)) for k, qs in sorted(log_queues.items())]
+
+
+def _queue_depth_gauges():
+    with log_lock:
+        return [({"task": k}, sum(q.qsize() for q in qs)) for k, qs in sorted(log_queues.items())]
+
+
+metrics.add_gauge("fetch_running", "1 while the fetch subprocess of a task is running.", _fetch_gauges)
+metrics.add_gauge("sse_subscribers", "Connected /api/events clients per task.", _subscriber_gauges)
+metrics.add_gauge("log_queue_depth", "Log batches queued for SSE clients, summed per task.", _queue_depth_gauges)
+metrics.add_gauge(
+    "data_cache_bytes",
+    "Bytes charged to the data/ payload cache, and its budget.",
+    lambda: [({"kind": "used"}, data_cache.stats()["bytes"]), ({"kind": "budget"}, data_cache.budget)],
+)
+metrics.add_gauge("stream_subscribers", "Connected /api/stream clients.", lambda: [({}, len(stream_hub))])
+metrics.add_gauge("data_cache_entries", "Files held by the data/ payload cache.", lambda: [({}, len(data_cache))])
+
+
+def task_status(task_key, proc):
+    """running / done / error / cancelled for one fetch task; caller holds log_lock."""
+    if proc.poll() is None:
+        return "running"
+    if task_key in cancelled_tasks:
+        return "cancelled"
+    return "done" if proc.returncode == 0 else "error"
+
+
+def running_fetches():
+    """{task key: domains} of fetch jobs still running; caller holds log_lock."""
+    return {k: active_domains.get(k, ()) for k, p in active_processes.items() if p.poll() is None}
 
 
 class DailyNewsHandler(http.server.SimpleHTTPRequestHandler):
 
+    def handle_one_request(self):
+        self._metrics_started = None
+        self._metrics_code = None
+        self._metrics_size = 0
+        super().handle_one_request()
+        if self._metrics_started is not None and self._metrics_code is not None:
+            metrics.observe(
+                urlparse(getattr(self, "path", "")).path,
+                self.command or "",
+                self._metrics_code,
+                time.perf_counter() - self._metrics_started,
+                self._metrics_size,
+            )
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            # One handler thread per connection: fold its metrics shard before the thread exits.
+            metrics.retire_thread()
+
+    def parse_request(self):
+        # Start the clock once the request line is in, not while a keep-alive
+        # connection sits idle waiting for it.
+        self._metrics_started = time.perf_counter()
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        self._metrics_code = code
+        super().send_response(code, message)
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == "content-length":
+            try:
+                self._metrics_size = int(value)
+            except (TypeError, ValueError):
+                pass
+        super().send_header(keyword, value)
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        self._vary_encoding = path.endswith(".json") and os.path.dirname(path) == DATA_DIR
+        sidecar = gzip_sidecar(path, self.headers.get("Accept-Encoding", ""))
+        if self._vary_encoding and data_cache.enabled:
+            return self._send_cached(path, sidecar)
+        if sidecar is None:
+            return super().send_head()
+        try:
+            f = open(sidecar, "rb")
+        except OSError:
+            return super().send_head()
+        try:
+            mtime = os.stat(path).st_mtime
+            since = self.headers.get("If-Modified-Since")
+            if since:
+                try:
+                    if int(mtime) <= email.utils.parsedate_to_datetime(since).timestamp():
+                        self.send_response(304)
+                        self.end_headers()
+                        f.close()
+                        return None
+                except (TypeError, ValueError):
+                    pass
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            self.send_header("Last-Modified", self.date_time_string(mtime))
+            self.end_headers()
+            return f
+        except Exception:
+            f.close()
+            raise
+
+    def _send_cached(self, path, sidecar):
+        """send_head() for data/*.json served from data_cache (gzip sidecar if given)."""
+        try:
+            body, mtime = data_cache.read(sidecar or path)
+            if sidecar:
+                mtime = os.stat(path).st_mtime
+        except OSError:
+            return super().send_head()
+        since = self.headers.get("If-Modified-Since")
+        if since and not self.headers.get("If-None-Match"):
+            try:
+                if int(mtime) <= email.utils.parsedate_to_datetime(since).timestamp():
+                    self.send_response(304)
+                    self.end_headers()
+                    return None
+            except (TypeError, ValueError):
+                pass
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if sidecar:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Last-Modified", self.date_time_string(mtime))
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def end_headers(self):
+        if getattr(self, "_vary_encoding", False):
+            # Revalidate data files on every load (cheap 304s); /api/stream says when they change.
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Vary", "Accept-Encoding")
+            self._vary_encoding = False
+        super().end_headers()
+
+    def copyfile(self, source, outputfile):
+        # Hand regular files to the kernel (os.sendfile via socket.sendfile)
+        # instead of copying them through userspace buffers; cached bodies
+        # are already in memory and go out in one write.
+        if isinstance(source, io.BytesIO):
+            outputfile.write(source.getbuffer())
+            return
+        if outputfile is self.wfile and hasattr(source, "fileno"):
+            self.wfile.flush()
+            self.connection.sendfile(source)
+            return
+        super().copyfile(source, outputfile)
+
     def translate_path(self, path):
         parsed = urlparse(path)
         clean = parsed.path
@@ -136,6 +240,27 @@ class DailyNewsHandler(http.server.SimpleHTTPRequestHandler):
         if parsed.path == "/api/events":
             self._handle_events(parsed)
             return
+        if parsed.path == "/api/stream":
+            self._handle_stream()
+            return
+        if parsed.path == "/api/trends":
+            self._handle_trends(parsed)
+            return
+        if parsed.path == "/api/related":
+            self._handle_related(parsed)
+            return
+        if parsed.path == "/api/debug/profile":
+            self._handle_debug_profile(parsed)
+            return
+        if parsed.path == "/api/export":
+            self._handle_export(parsed)
+            return
+        if parsed.path == "/api/digest/rolling":
+            self._handle_rolling_digest(parsed)
+            return
+        if parsed.path == "/metrics":
+            self._handle_metrics()
+            return
         super().do_GET()
 
     def do_POST(self):
@@ -143,42 +268,140 @@ class DailyNewsHandler(http.server.SimpleHTTPRequestHandler):
         if parsed.path == "/api/fetch":
             self._handle_fetch(parsed)
             return
+        if parsed.path == "/api/fetch/cancel":
+            self._handle_fetch_cancel()
+            return
         self.send_error(404)
 
     def _handle_status(self):
         status = {}
         with log_lock:
             for k, p in active_processes.items():
-                if p.poll() is None:
-                    status[k] = "running"
-                else:
-                    status[k] = "done" if p.returncode == 0 else "error"
+                status[k] = task_status(k, p)
         self._json_response(status)
 
     def _handle_dates(self):
         """Return all dates that have at least one data file."""
-        dates = set()
-        if os.path.isdir(DATA_DIR):
-            for f in os.listdir(DATA_DIR):
-                if not f.endswith('.json'):
-                    continue
-                # Format: YYYY-MM-DD-{id}.json — split off domain id at last hyphen
-                name = f[:-5]  # strip .json
-                parts = name.rsplit('-', 1)
-                if len(parts) == 2 and re.match(r'^\d{4}-\d{2}-\d{2}$', parts[0]):
-                    dates.add(parts[0])
-        self._json_response({"dates": sorted(dates, reverse=True)})
+        self._json_response({"dates": list_data_dates()})
 
     def _handle_domains(self):
         """Return domain metadata loaded from academic-search/sources/*.md."""
         domains = load_domains()
         self._json_response({"domains": domains})
 
+    def _handle_trends(self, parsed):
+        """Return bucketed per-domain counters from the rollup store."""
+        query = parse_qs(parsed.query)
+        try:
+            result = query_trends(
+                query.get("domain", [""])[0],
+                query.get("from", [""])[0],
+                query.get("to", [""])[0],
+                query.get("bucket", ["week"])[0],
+                query.get("columns", [""])[0],
+            )
+        except ValueError as exc:
+            self._json_response({"error": str(exc)}, 400)
+            return
+        self._json_response(result)
+
+    def _handle_related(self, parsed):
+        """Return precomputed related articles for ?url= (see related.py)."""
+        query = parse_qs(parsed.query)
+        url = query.get("url", [""])[0]
+        try:
+            k = int(query.get("k", [TOP_K])[0])
+        except ValueError:
+            self._json_response({"error": "k must be an integer"}, 400)
+            return
+        related = related_for(url, k) if url else None
+        if related is None:
+            self._json_response({"error": "url not indexed", "url": url}, 404)
+            return
+        self._json_response({"url": url, "related": related})
+
+    def _handle_rolling_digest(self, parsed):
+        """Return the weekly/monthly top-N merged from per-day digests (see rolling_digest.py)."""
+        query = parse_qs(parsed.query)
+        try:
+            top = int(query.get("top", [ROLLING_TOP])[0])
+        except ValueError:
+            self._json_response({"error": "top must be an integer"}, 400)
+            return
+        try:
+            result = build_rolling_digest(
+                query.get("window", ["week"])[0],
+                query.get("to", [""])[0],
+                ",".join(query.get("domain", [])),
+                top,
+                load=data_cache.payload,
+            )
+        except ValueError as exc:
+            self._json_response({"error": str(exc)}, 400)
+            return
+        self._json_response(result)
+
+    def _handle_export(self, parsed):
+        """Stream articles of ?from=&to=&domain= as NDJSON (see export.py)."""
+        try:
+            query = ExportQuery.from_query(parse_qs(parsed.query))
+        except ValueError as exc:
+            self._json_response({"error": str(exc)}, 400)
+            return
+        files = select_files(query)
+        etag = catalog_etag(files, query)
+        if etag_matches(self.headers.get("If-None-Match", ""), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        # Chunked encoding needs an HTTP/1.1 status line; this handler answers
+        # HTTP/1.0 by default, so switch for this response only and close after.
+        chunked = self.request_version == "HTTP/1.1"
+        if chunked:
+            self.protocol_version = "HTTP/1.1"
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", EXPORT_CONTENT_TYPE)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Connection", "close")
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in iter_ndjson(files, query.fields, data_cache.peek):
+                self._metrics_size += len(chunk)
+                if chunked:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                else:
+                    self.wfile.write(chunk)
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _handle_metrics(self):
+        """Prometheus text exposition of request and task metrics."""
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+        self.send_header("Content-Length", len(body))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle_debug_profile(self, parsed):
+        """Sample live handler threads for ?seconds=N (SERVER_DEBUG_PROFILE=1, localhost only)."""
+        code, data = debug_profile(parse_qs(parsed.query), self.client_address[0])
+        self._json_response(data, code)
+
     def _handle_events(self, parsed):
         # SSE endpoint
         query = parse_qs(parsed.query)
         mode = query.get("mode", ["ai"])[0]
-        task_key = f"fetch_{mode}"
+        task_key = task_key_for(mode)
 
         self.send_response(200)
         self.send_header("Content-Type", "text/event-stream")
@@ -194,29 +417,22 @@ class DailyNewsHandler(http.server.SimpleHTTPRequestHandler):
             except (BrokenPipeError, ConnectionResetError):
                 return
 
-            existing = task_logs.get(task_key, [])
+            existing = list(task_logs.get(task_key, []))
             client_queue = queue.Queue()
             if task_key not in log_queues:
                 log_queues[task_key] = []
             log_queues[task_key].append(client_queue)
 
-        for line in existing:
-            try:
-                self.wfile.write(f"data: {json.dumps({'log': line})}\n\n".encode('utf-8'))
-                self.wfile.flush()
-            except (BrokenPipeError, ConnectionResetError):
-                return
-
         try:
+            self._write_log_events(existing)
             while True:
                 try:
-                    line = client_queue.get(timeout=5)
-                    if line is None:
-                        self.wfile.write(f"data: {json.dumps({'status': 'done'})}\n\n".encode('utf-8'))
+                    lines = client_queue.get(timeout=5)
+                    if lines is None:
+                        self.wfile.write(f"data: {dumps({'status': 'done'})}\n\n".encode('utf-8'))
                         self.wfile.flush()
                         break
-                    self.wfile.write(f"data: {json.dumps({'log': line})}\n\n".encode('utf-8'))
-                    self.wfile.flush()
+                    self._write_log_events(lines)
                 except queue.Empty:
                     try:
                         self.wfile.write(b": keep-alive\n\n")
@@ -234,38 +450,91 @@ class DailyNewsHandler(http.server.SimpleHTTPRequestHandler):
                 if task_key in log_queues and client_queue in log_queues[task_key]:
                     log_queues[task_key].remove(client_queue)
 
-    def _handle_fetch(self, parsed):
-        content_length = int(self.headers.get("Content-Length", 0))
+    def _read_mode(self):
+        """`mode` from the JSON request body, or None after answering 400."""
+        try:
+            content_length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            self._json_response({"error": "bad content-length"}, 400)
+            return None
         body = self.rfile.read(content_length) if content_length else b"{}"
         try:
-            params = json.loads(body) if body else {}
-        except json.JSONDecodeError:
+            params = loads(body) if body else {}
+        except JSONDecodeError:
             params = {}
 
-        mode = params.get("mode", "ai")
+        mode = params.get("mode", "ai") if isinstance(params, dict) else "ai"
 
         # Validate: alphanumeric, hyphens, underscores only
-        if not re.match(r'^[a-zA-Z0-9_-]+$', mode):
+        if not isinstance(mode, str) or not re.match(r'^[a-zA-Z0-9_-]+$', mode):
             self._json_response({"error": "invalid mode"}, 400)
+            return None
+        return mode
+
+    def _handle_stream(self):
+        """One SSE connection for every task's logs and status plus data/ file changes."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "keep-alive")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+
+        client_queue = stream_hub.subscribe()
+        try:
+            with log_lock:
+                tasks = {k: task_status(k, p) for k, p in active_processes.items()}
+            self.wfile.write(b": connected\n\n" + format_event("hello", {"tasks": tasks}))
+            self.wfile.flush()
+            while True:
+                try:
+                    payload = client_queue.get(timeout=STREAM_PING_SECONDS)
+                except queue.Empty:
+                    if not stream_hub.subscribed(client_queue):
+                        break  # dropped as a slow consumer
+                    payload = b": keep-alive\n\n"
+                self.wfile.write(payload)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            stream_hub.unsubscribe(client_queue)
+
+    def _handle_fetch(self, parsed):
+        mode = self._read_mode()
+        if mode is None:
             return
 
-        task_key = f"fetch_{mode}"
+        task_key = task_key_for(mode)
+        academic_ids = academic_domain_ids()
+        if not known_mode(mode, academic_ids):
+            self._json_response({"error": f"unknown mode: {mode}"}, 400)
+            return
         with log_lock:
-            if task_key in active_processes and active_processes[task_key].poll() is None:
-                self._json_response({"status": "already_running", "mode": mode})
+            # Domains already being fetched by another job are attached to, not run twice.
+            plan = plan_fetch(mode, academic_ids, running_fetches())
+            if plan.covered:
+                self._json_response(plan.response("already_running"))
                 return
 
-            start_log = f"[{datetime.now().strftime('%H:%M:%S')}] [SERVER] Fetch task accepted: mode={mode}"
-            task_logs[task_key] = [start_log]
+            now = datetime.now().strftime('%H:%M:%S')
+            task_logs[task_key] = [f"[{now}] [SERVER] Fetch task accepted: mode={mode}"]
+            for other, domains in plan.attached.items():
+                task_logs[task_key].append(
+                    f"[{now}] [SERVER] Skipping {', '.join(domains)}: already being fetched by {other}"
+                )
+            cancelled_tasks.discard(task_key)
 
             try:
+                # Own session, so /api/fetch/cancel can signal the whole process group.
                 proc = subprocess.Popen(
-                    [FETCH_SCRIPT, mode],
+                    [FETCH_SCRIPT, *plan.argv],
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1,
                     cwd=PROJECT_DIR,
+                    start_new_session=True,
                 )
             except Exception as exc:
                 err = f"[{datetime.now().strftime('%H:%M:%S')}] [ERROR] Failed to start fetch process: {exc}"
@@ -274,50 +543,72 @@ class DailyNewsHandler(http.server.SimpleHTTPRequestHandler):
                 return
 
             active_processes[task_key] = proc
+            active_domains[task_key] = plan.todo
             threading.Thread(target=self._read_process_logs, args=(task_key, proc), daemon=True).start()
+            stream_hub.publish("status", {"task": task_key, "status": "running"})
 
-        self._json_response({"status": "started", "mode": mode})
+        self._json_response(plan.response("started"))
+
+    def _handle_fetch_cancel(self):
+        mode = self._read_mode()
+        if mode is None:
+            return
+
+        task_key = task_key_for(mode)
+        with log_lock:
+            proc = active_processes.get(task_key)
+            if proc is None or proc.poll() is not None:
+                self._json_response({"status": "not_running", "mode": mode}, 404)
+                return
+            cancelled_tasks.add(task_key)
+            line = f"[{datetime.now().strftime('%H:%M:%S')}] [SERVER] Fetch task cancelled: mode={mode}"
+            task_logs.setdefault(task_key, []).append(line)
+            for q in log_queues.get(task_key, []):
+                q.put([line])
+            stream_hub.publish("log", {"task": task_key, "lines": [line]})
+            terminate_group(proc)
+
+        self._json_response({"status": "cancelled", "mode": mode, "domains": list(active_domains.get(task_key, ()))})
+
+    def _write_log_events(self, lines):
+        if not lines:
+            return
+        payload = "".join(f"data: {dumps({'log': line})}\n\n" for line in lines)
+        self.wfile.write(payload.encode('utf-8'))
+        self.wfile.flush()
 
     def _read_process_logs(self, task_key, proc):
-        ansi_escape = re.compile(r'\x1b\[[0-9;]*m')
-        for line in iter(proc.stdout.readline, ''):
-            clean_line = ansi_escape.sub('', line.rstrip())
-            if not clean_line:
-                continue
-            if self._is_info_log(clean_line):
-                continue
-            if len(clean_line) > 500:
-                clean_line = clean_line[:500] + '  …[truncated]'
+        def publish(lines):
             with log_lock:
-                if task_key not in task_logs:
-                    task_logs[task_key] = []
-                task_logs[task_key].append(clean_line)
-                if task_key in log_queues:
-                    for q in log_queues[task_key]:
-                        q.put(clean_line)
-
+                active_domains[task_key] = remaining_domains(active_domains.get(task_key, ()), lines)
+                task_logs.setdefault(task_key, []).extend(lines)
+                for q in log_queues.get(task_key, []):
+                    q.put(lines)
+            stream_hub.publish("log", {"task": task_key, "lines": lines})
+
+        # Filtering and the raw log run in their own process (see log_pipeline.py).
+        log_filter = subprocess.Popen(
+            filter_command(os.path.join(LOGS_DIR, f"server-{task_key}.log")),
+            stdin=proc.stdout,
+            stdout=subprocess.PIPE,
+        )
         proc.stdout.close()
+        for lines in read_batches(log_filter.stdout):
+            publish(lines)
+
+        log_filter.stdout.close()
+        log_filter.wait()
         proc.wait()
 
         with log_lock:
             if task_key in log_queues:
                 for q in log_queues[task_key]:
                     q.put(None)  # End-of-stream sentinel
-
-    @staticmethod
-    def _is_info_log(line):
-        # INFO level markers
-        if re.search(r'\[INFO\]|\bINFO\[|\blevel=info\b|"level"\s*:\s*"info"', line, re.IGNORECASE):
-            return True
-        if re.match(r'^INFO\s', line):
-            return True
-        # opencode internal bus messages (service=bus, message.part.updated, etc.)
-        if re.search(r'service=bus|type=message\.|message\.part\.', line):
-            return True
-        return False
+            status = task_status(task_key, proc)
+        stream_hub.publish("status", {"task": task_key, "status": status})
 
     def _json_response(self, data, code=200):
-        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        body = dumpb(data)
         self.send_response(code)
         self.send_header("Content-Type", "application/json; charset=utf-8")
         self.send_header("Content-Length", len(body))
@@ -337,13 +628,32 @@ class DailyNewsHandler(http.server.SimpleHTTPRequestHandler):
 
 
 def main():
-    port = 8080
+    parser = argparse.ArgumentParser(description="Daily Insights dashboard server")
+    parser.add_argument("--port", type=int, default=8080, help="Listen port (default: 8080)")
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Serve with the single-threaded asyncio backend instead of one thread per connection",
+    )
+    args = parser.parse_args()
+    port = args.port
     os.makedirs(DATA_DIR, exist_ok=True)
+    if args.use_async:
+        from async_server import serve
+
+        serve(port)
+        return
+    warmed = data_cache.warm(warm_days_from_env())
+    stream_hub.watch(DataWatcher(DATA_DIR))
     server = http.server.ThreadingHTTPServer(("", port), DailyNewsHandler)
     print(f"Server running at http://localhost:{port}")
     print(f"  Web UI:   http://localhost:{port}/")
     print(f"  Domains:  http://localhost:{port}/api/domains")
     print(f"  Data:     http://localhost:{port}/data/")
+    print(f"  Metrics:  http://localhost:{port}/metrics")
+    if data_cache.enabled:
+        print(f"  Cache:    {warmed} data file(s) preloaded, budget {data_cache.budget // (1024 * 1024)} MiB")
     try:
         server.serve_forever()
     except KeyboardInterrupt:
@@ -352,4 +662,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Shared pieces of the multiplexed `/api/stream` SSE endpoint.
+
+One connection carries every event the dashboard needs, as named SSE events:
+
+    event: hello    {"tasks": {task key: status}}            on connect
+    event: log      {"task": "fetch_ai", "lines": [...]}     filtered fetch output
+    event: status   {"task": "fetch_ai", "status": "running"|"done"|"error"|"cancelled"}
+    event: data     {"date": "2026-02-24", "domain": "ai", "version": "...", "deleted": false}
+
+`data` events come from DataWatcher, which polls data/ every
+DATA_POLL_SECONDS (one listdir plus a stat per file, no inotify needed) and
+reports files whose (mtime, size) changed. `version` is derived from those two
+values, so a client can fetch `/data/<date>-<domain>.json?v=<version>` for
+exactly the file that changed instead of reloading every domain.
+
+The threaded server fans events out through StreamHub; the asyncio backend
+keeps its own set of asyncio queues and reuses format_event() and DataWatcher.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+
+from json_codec import dumps
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_DIR / "data"
+DATA_FILE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-([A-Za-z0-9_-]+)\.json$")
+DATA_POLL_SECONDS = float(os.environ.get("STREAM_DATA_POLL_SECONDS", "2"))
+SUBSCRIBER_QUEUE_SIZE = 1000
+PING_SECONDS = 5
+
+
+def format_event(event: str, data: object) -> bytes:
+    return f"event: {event}\ndata: {dumps(data)}\n\n".encode("utf-8")
+
+
+def file_version(st: os.stat_result) -> str:
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+class DataWatcher:
+    """Reports data/*.json files created, changed or removed since the previous scan()."""
+
+    def __init__(self, data_dir: str | Path = DATA_DIR):
+        self.data_dir = Path(data_dir)
+        self._versions: dict[str, str] = self._snapshot()
+
+    def _snapshot(self) -> dict[str, str]:
+        versions = {}
+        try:
+            names = os.listdir(self.data_dir)
+        except FileNotFoundError:
+            return versions
+        for name in names:
+            if not DATA_FILE_RE.match(name):
+                continue
+            try:
+                versions[name] = file_version(os.stat(self.data_dir / name))
+            except FileNotFoundError:
+                continue
+        return versions
+
+    def scan(self) -> list[dict]:
+        """`data` event payloads for every change since the previous scan (or construction)."""
+        current = self._snapshot()
+        changes = []
+        for name in sorted(current.keys() | self._versions.keys()):
+            version = current.get(name)
+            if version == self._versions.get(name):
+                continue
+            day, domain = DATA_FILE_RE.match(name).groups()
+            changes.append({"date": day, "domain": domain, "version": version or "", "deleted": version is None})
+        self._versions = current
+        return changes
+
+
+class StreamHub:
+    """Thread-safe fan-out of encoded SSE events to bounded per-client queues."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: set[queue.Queue] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> queue.Queue:
+        q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def subscribed(self, q: queue.Queue) -> bool:
+        return q in self._subscribers
+
+    def publish(self, event: str, data: object) -> None:
+        if not self._subscribers:
+            return
+        payload = format_event(event, data)
+        with self._lock:
+            for q in list(self._subscribers):
+                try:
+                    q.put_nowait(payload)
+                except queue.Full:
+                    # Slow consumer: drop it rather than buffer without bound.
+                    self._subscribers.discard(q)
+
+    def watch(self, watcher: DataWatcher, interval: float = DATA_POLL_SECONDS) -> threading.Thread:
+        """Start a daemon thread publishing `data` events from `watcher` every `interval` seconds."""
+
+        def run() -> None:
+            while True:
+                time.sleep(interval)
+                # Scan even with no listeners, so a later client is not sent stale changes.
+                for change in watcher.scan():
+                    self.publish("data", change)
+
+        thread = threading.Thread(target=run, name="data-watcher", daemon=True)
+        thread.start()
+        return thread
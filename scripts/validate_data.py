@@ -1,18 +1,59 @@
 #!/usr/bin/env python3
-"""Validate fetched data JSON structure and quality constraints."""
+"""Validate fetched data JSON structure and quality constraints.
+
+Per-domain rules are declared in the domain's config frontmatter rather than
+in code: `schema_required` (extra required article fields, comma separated)
+and `schema_category` (exact `category` every article must carry) in
+academic-search/sources/<id>.md, or `domain_schema_required` /
+`domain_schema_category` in a skill's SKILL.md. Domains without a config
+require `source`. Each domain's rules are compiled once per process into a
+DomainSchema whose article check has the field list and optional rules bound
+in and reads URL/title keys from the shared Article records (article.py), and
+keeps errors as (template, args) pairs that are only formatted when reported.
+
+    python3 scripts/validate_data.py data/2026-02-24-ad.json
+    python3 scripts/validate_data.py --all
+"""
 
 from __future__ import annotations
 
 import argparse
-import json
 import re
+import time
 from pathlib import Path
-from urllib.parse import urlparse
 
+from article import Article, split_url, wrap_articles
+from json_codec import JSONDecodeError, read_file
+from profiling import run_main
 
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_DIR / "data"
+SKILLS_DIR = PROJECT_DIR / ".agents" / "skills"
+SOURCES_DIR = SKILLS_DIR / "academic-search" / "sources"
+DATA_FILE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}-[A-Za-z0-9_-]+\.json$")
 DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
-SPACE_RE = re.compile(r"\s+")
+FRONTMATTER_RE = re.compile(r"^---\s*\n(.*?)\n---", re.DOTALL)
 BASE_REQUIRED_FIELDS = ("title", "summary", "url", "category", "published_date", "date")
+DEFAULT_EXTRA_FIELDS = ("source",)
+
+# Error templates; arguments are kept apart until the error list is rendered.
+E_TOP_OBJECT = "top-level JSON must be an object"
+E_TOP_DATE = 'top-level field "date" must be a non-empty string'
+E_TOP_DATE_FORMAT = 'top-level field "date" must match YYYY-MM-DD'
+E_TOP_ARTICLES = 'top-level field "articles" must be an array'
+E_ARTICLE_OBJECT = "article #{}: must be an object"
+E_REQUIRED = 'article #{}: field "{}" must be a non-empty string'
+E_PUBLISHED_FORMAT = 'article #{}: field "published_date" must match YYYY-MM-DD'
+E_DATE_FORMAT = 'article #{}: field "date" must match YYYY-MM-DD'
+E_DATE_MISMATCH = 'article #{}: field "date" ({}) must equal top-level date ({})'
+E_URL = 'article #{}: field "url" must be a valid http/https URL'
+E_CATEGORY = 'article #{}: {} category must be "{}" (got "{}")'
+E_DUPLICATE_KEY = "article #{}: duplicate article key (url+title), first seen at article #{}"
+E_DUPLICATE_URL = "article #{}: duplicate URL, first seen at article #{} ({})"
+
+_schemas: dict[str, "DomainSchema"] | None = None
+_fallback_schemas: dict[str, "DomainSchema"] = {}
 
 
 def infer_domain_id(path: Path) -> str:
@@ -32,126 +73,212 @@ def is_valid_date(value: str) -> bool:
 
 
 def normalize_url(value: str) -> str:
-    parsed = urlparse(value.strip())
-    scheme = parsed.scheme.lower()
-    netloc = parsed.netloc.lower()
-    path = parsed.path.rstrip("/") or "/"
-    query = f"?{parsed.query}" if parsed.query else ""
-    return f"{scheme}://{netloc}{path}{query}"
+    return split_url(value)[1]
 
 
 def is_valid_http_url(value: str) -> bool:
-    parsed = urlparse(value.strip())
-    return parsed.scheme in ("http", "https") and bool(parsed.netloc)
-
+    return split_url(value)[0]
+
+
+def _split_list(value: str) -> tuple[str, ...]:
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+class DomainSchema:
+    """Validation rules of one domain, compiled into a specialised article check."""
+
+    def __init__(self, domain_id: str, spec: dict[str, str]):
+        self.domain_id = domain_id
+        extra = _split_list(spec["required"]) if "required" in spec else DEFAULT_EXTRA_FIELDS
+        self.required = BASE_REQUIRED_FIELDS + tuple(f for f in extra if f not in BASE_REQUIRED_FIELDS)
+        self.category = spec.get("category", "").strip()
+        self._check_articles = self._compile()
+
+    def _compile(self):
+        required = self.required
+        category = self.category
+        label = self.domain_id.upper()
+        date_re = DATE_RE.match
+
+        def check_articles(records: list, top_date: object, append) -> None:
+            seen_pairs: dict[tuple[str, str], int] = {}
+            seen_urls: dict[str, tuple[int, str]] = {}
+            for idx, record in enumerate(records, start=1):
+                if record is None:
+                    append((E_ARTICLE_OBJECT, (idx,)))
+                    continue
+                get = record.data.get
+                for field in required:
+                    value = get(field)
+                    if not (isinstance(value, str) and value and not value.isspace()):
+                        append((E_REQUIRED, (idx, field)))
+
+                title = record.title
+                url = record.url
+                article_date = str(get("date", "")).strip()
+                published_date = str(get("published_date", "")).strip()
+
+                if published_date and not date_re(published_date):
+                    append((E_PUBLISHED_FORMAT, (idx,)))
+                if article_date:
+                    if not date_re(article_date):
+                        append((E_DATE_FORMAT, (idx,)))
+                    if top_date and article_date != top_date:
+                        append((E_DATE_MISMATCH, (idx, article_date, top_date)))
+                if url and not record.url_valid:
+                    append((E_URL, (idx,)))
+                if category:
+                    value = str(get("category", "")).strip()
+                    if value and value != category:
+                        append((E_CATEGORY, (idx, label, category, value)))
+                if not (title and url):
+                    continue
+                normalized_url = record.url_key
+                pair_key = (normalized_url, record.title_key)
+                first_idx = seen_pairs.get(pair_key)
+                if first_idx is not None:
+                    append((E_DUPLICATE_KEY, (idx, first_idx)))
+                else:
+                    seen_pairs[pair_key] = idx
+                previous = seen_urls.get(normalized_url)
+                if previous is not None:
+                    append((E_DUPLICATE_URL, (idx, previous[0], previous[1])))
+                else:
+                    seen_urls[normalized_url] = (idx, title)
+
+        return check_articles
+
+    def check(self, payload: object, records: list[Article | None] | None = None) -> list[tuple[str, tuple]]:
+        """Unformatted errors as (template, args) pairs; empty if the payload is valid.
+
+        `records` is wrap_articles(payload["articles"]) when the caller already has it.
+        """
+        if not isinstance(payload, dict):
+            return [(E_TOP_OBJECT, ())]
+        errors: list[tuple[str, tuple]] = []
+        top_date = payload.get("date", "")
+        if not is_non_empty_str(top_date):
+            errors.append((E_TOP_DATE, ()))
+        elif not is_valid_date(top_date.strip()):
+            errors.append((E_TOP_DATE_FORMAT, ()))
+        articles = payload.get("articles")
+        if not isinstance(articles, list):
+            errors.append((E_TOP_ARTICLES, ()))
+            return errors
+        if records is None:
+            records = wrap_articles(articles)
+        self._check_articles(records, top_date, errors.append)
+        return errors
 
-def normalize_title(value: str) -> str:
-    return SPACE_RE.sub(" ", value.strip().lower())
+    def validate(self, payload: object, records: list[Article | None] | None = None) -> list[str]:
+        return [template.format(*args) for template, args in self.check(payload, records)]
+
+
+def _frontmatter(path: Path) -> dict[str, str]:
+    try:
+        match = FRONTMATTER_RE.match(path.read_text(encoding="utf-8"))
+    except OSError:
+        return {}
+    result = {}
+    for line in match.group(1).splitlines() if match else []:
+        key, sep, value = line.strip().partition(":")
+        if sep:
+            result[key.strip()] = value.strip().strip('"').strip("'")
+    return result
+
+
+def load_schemas(refresh: bool = False) -> dict[str, DomainSchema]:
+    """Compile schemas from domain frontmatter once per process (refresh=True re-reads).
+
+    Same priority as the dashboard's domain list: academic sources win over
+    skill-level `domain_*` declarations.
+    """
+    global _schemas
+    if _schemas is not None and not refresh:
+        return _schemas
+    specs: dict[str, dict[str, str]] = {}
+    for path in sorted(SKILLS_DIR.glob("*/SKILL.md")):
+        meta = _frontmatter(path)
+        domain_id = meta.get("domain_id", "").strip().lower()
+        if domain_id:
+            specs[domain_id] = {
+                k[len("domain_schema_") :]: v for k, v in meta.items() if k.startswith("domain_schema_")
+            }
+    for path in sorted(SOURCES_DIR.glob("*.md")):
+        meta = _frontmatter(path)
+        domain_id = meta.get("id", "").strip().lower()
+        if domain_id:
+            specs[domain_id] = {k[len("schema_") :]: v for k, v in meta.items() if k.startswith("schema_")}
+    _schemas = {domain_id: DomainSchema(domain_id, spec) for domain_id, spec in specs.items()}
+    return _schemas
+
+
+def get_schema(domain_id: str) -> DomainSchema:
+    domain_id = (domain_id or "").strip().lower()
+    schema = load_schemas().get(domain_id)
+    if schema is None:
+        schema = _fallback_schemas.get(domain_id)
+        if schema is None:
+            schema = _fallback_schemas[domain_id] = DomainSchema(domain_id, {})
+    return schema
 
 
 def required_fields_for_domain(domain_id: str) -> tuple[str, ...]:
-    if domain_id == "ai":
-        return BASE_REQUIRED_FIELDS + ("subcategory",)
-    return BASE_REQUIRED_FIELDS + ("source",)
-
+    return get_schema(domain_id).required
 
-def validate_payload(payload: object, domain_id: str) -> list[str]:
-    errors: list[str] = []
-    domain_id = (domain_id or "").strip().lower()
-    required_fields = required_fields_for_domain(domain_id)
 
-    if not isinstance(payload, dict):
-        return ["top-level JSON must be an object"]
+def validate_payload(payload: object, domain_id: str, records: list[Article | None] | None = None) -> list[str]:
+    return get_schema(domain_id).validate(payload, records)
 
-    top_date = payload.get("date", "")
-    if not is_non_empty_str(top_date):
-        errors.append('top-level field "date" must be a non-empty string')
-    elif not is_valid_date(top_date.strip()):
-        errors.append('top-level field "date" must match YYYY-MM-DD')
 
-    articles = payload.get("articles")
-    if not isinstance(articles, list):
-        errors.append('top-level field "articles" must be an array')
-        return errors
-
-    seen_pairs: dict[tuple[str, str], int] = {}
-    seen_urls: dict[str, dict[str, object]] = {}
-
-    for idx, article in enumerate(articles, start=1):
-        if not isinstance(article, dict):
-            errors.append(f"article #{idx}: must be an object")
+def validate_archive(data_dir: Path = DATA_DIR) -> int:
+    """Validate every data/YYYY-MM-DD-<domain>.json; returns the number of failing files."""
+    started = time.perf_counter()
+    files = articles = failed = 0
+    for path in sorted(data_dir.glob("*.json")):
+        if not DATA_FILE_RE.match(path.name):
             continue
-
-        for field in required_fields:
-            value = article.get(field)
-            if not is_non_empty_str(value):
-                errors.append(f'article #{idx}: field "{field}" must be a non-empty string')
-
-        title = str(article.get("title", "")).strip()
-        url = str(article.get("url", "")).strip()
-        article_date = str(article.get("date", "")).strip()
-        published_date = str(article.get("published_date", "")).strip()
-        category = str(article.get("category", "")).strip()
-
-        if published_date and not is_valid_date(published_date):
-            errors.append(f"article #{idx}: field \"published_date\" must match YYYY-MM-DD")
-        if article_date and not is_valid_date(article_date):
-            errors.append(f"article #{idx}: field \"date\" must match YYYY-MM-DD")
-        if top_date and article_date and article_date != top_date:
-            errors.append(
-                f"article #{idx}: field \"date\" ({article_date}) must equal top-level date ({top_date})"
-            )
-
-        if url and not is_valid_http_url(url):
-            errors.append(f"article #{idx}: field \"url\" must be a valid http/https URL")
-
-        if domain_id == "ai" and category and category != "AI":
-            errors.append(f'article #{idx}: AI category must be "AI" (got "{category}")')
-
-        if title and url:
-            normalized_url = normalize_url(url)
-            normalized_title = normalize_title(title)
-            pair_key = (normalized_url, normalized_title)
-
-            if pair_key in seen_pairs:
-                first_idx = seen_pairs[pair_key]
-                errors.append(
-                    f"article #{idx}: duplicate article key (url+title), first seen at article #{first_idx}"
-                )
-            else:
-                seen_pairs[pair_key] = idx
-
-            prev_for_url = seen_urls.get(normalized_url)
-            if prev_for_url is not None:
-                first_idx = int(prev_for_url["index"])
-                first_title = str(prev_for_url["title"])
-                errors.append(
-                    "article "
-                    f"#{idx}: duplicate URL, first seen at article #{first_idx} ({first_title})"
-                )
-            else:
-                seen_urls[normalized_url] = {"index": idx, "title": title}
-
-    return errors
+        files += 1
+        try:
+            payload = read_file(path)
+        except (OSError, JSONDecodeError) as exc:
+            failed += 1
+            print(f"[ERROR] {path.name}: {exc}")
+            continue
+        if isinstance(payload, dict) and isinstance(payload.get("articles"), list):
+            articles += len(payload["articles"])
+        errors = get_schema(infer_domain_id(path)).check(payload)
+        if errors:
+            failed += 1
+            print(f"[ERROR] {path.name}: {len(errors)} problem(s)")
+            for template, args in errors:
+                print(f"  - {template.format(*args)}")
+    elapsed = time.perf_counter() - started
+    print(f"Archive validated: {files} files, {articles} articles, {failed} failing ({elapsed:.3f}s)")
+    return failed
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Validate fetched data JSON quality")
-    parser.add_argument("file", help="Path to JSON file")
+    parser.add_argument("file", nargs="?", default="", help="Path to JSON file")
     parser.add_argument(
         "domain_id",
         nargs="?",
         default="",
         help="Domain id (e.g. ai, brainmri). If omitted, inferred from filename.",
     )
+    parser.add_argument("--all", action="store_true", help="Validate every data file under data/")
     args = parser.parse_args()
 
+    if args.all:
+        return 1 if validate_archive() else 0
+    if not args.file:
+        parser.error("file is required unless --all is given")
     path = Path(args.file)
     if not path.exists():
         raise FileNotFoundError(f"file not found: {path}")
 
-    with path.open("r", encoding="utf-8") as f:
-        payload = json.load(f)
+    payload = read_file(path)
 
     domain_id = args.domain_id.strip().lower() or infer_domain_id(path)
     errors = validate_payload(payload, domain_id)
@@ -170,4 +297,4 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(run_main(main))
@@ -0,0 +1,207 @@
+import asyncio
+import gzip
+import os
+import time
+
+import async_server
+import dashboard_data
+from async_server import AsyncDashboard
+from json_codec import dumpb, loads
+
+
+async def serve(dashboard: AsyncDashboard) -> tuple[asyncio.AbstractServer, int]:
+    server = await asyncio.start_server(
+        dashboard.handle_client, host="127.0.0.1", port=0, limit=async_server.MAX_HEADER_BYTES
+    )
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def exchange(reader, writer, method: str, path: str, headers: dict | None = None, body: bytes = b""):
+    """Send one request and read its response: (status, headers, body)."""
+    lines = [f"{method} {path} HTTP/1.1", "Host: test"]
+    lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+    if body:
+        lines.append(f"Content-Length: {len(body)}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+    status_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+    response_headers = {k.lower(): v.strip() for k, _, v in (line.partition(":") for line in header_lines)}
+    length = 0 if method == "HEAD" else int(response_headers.get("content-length", 0))
+    data = await asyncio.wait_for(reader.readexactly(length), 5) if length else b""
+    return int(status_line.split()[1]), response_headers, data
+
+
+async def fetch(port: int, method: str, path: str, headers: dict | None = None, body: bytes = b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        return await exchange(reader, writer, method, path, {"Connection": "close", **(headers or {})}, body)
+    finally:
+        writer.close()
+
+
+def use_data_dir(monkeypatch, path) -> None:
+    monkeypatch.setattr(async_server, "DATA_DIR", str(path))
+    monkeypatch.setattr(dashboard_data, "DATA_DIR", str(path))
+
+
+def test_keep_alive_and_head(tmp_path, monkeypatch):
+    use_data_dir(monkeypatch, tmp_path)
+    (tmp_path / "2026-03-01-ai.json").write_bytes(dumpb({"date": "2026-03-01", "articles": []}))
+
+    async def scenario():
+        server, port = await serve(AsyncDashboard())
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            status, headers, body = await exchange(reader, writer, "GET", "/api/dates")
+            assert status == 200 and headers["connection"] == "keep-alive"
+            assert loads(body) == {"dates": ["2026-03-01"]}
+            # HEAD carries the headers only; the next response follows right after them.
+            status, headers, _ = await exchange(reader, writer, "HEAD", "/api/dates")
+            assert status == 200 and int(headers["content-length"]) == len(body)
+            status, _, body = await exchange(reader, writer, "GET", "/api/status")
+            assert status == 200 and loads(body) == {}
+            status, headers, _ = await exchange(reader, writer, "GET", "/api/status", {"Connection": "close"})
+            assert headers["connection"] == "close"
+            assert await asyncio.wait_for(reader.read(), 5) == b""
+            writer.close()
+
+    asyncio.run(scenario())
+
+
+def test_connections_over_the_cap_get_503(tmp_path, monkeypatch):
+    use_data_dir(monkeypatch, tmp_path)
+    monkeypatch.setattr(async_server, "MAX_CONNECTIONS", 2)
+
+    async def scenario():
+        server, port = await serve(AsyncDashboard())
+        async with server:
+            held = [await asyncio.open_connection("127.0.0.1", port) for _ in range(2)]
+            for reader, writer in held:
+                assert (await exchange(reader, writer, "GET", "/api/status"))[0] == 200
+            status, headers, body = await fetch(port, "GET", "/api/status")
+            assert status == 503 and body == b"server busy\n"
+
+            held[0][1].close()
+            await held[0][1].wait_closed()
+            for _ in range(50):
+                status = (await fetch(port, "GET", "/api/status"))[0]
+                if status == 200:
+                    break
+                await asyncio.sleep(0.02)
+            assert status == 200
+            held[1][1].close()
+
+    asyncio.run(scenario())
+
+
+def test_data_files_are_sent_plain_or_from_the_gzip_sidecar(tmp_path, monkeypatch):
+    use_data_dir(monkeypatch, tmp_path)
+    path = tmp_path / "2026-03-01-ad.json"
+    raw = dumpb({"date": "2026-03-01", "articles": [{"title": "x" * 500}]})
+    path.write_bytes(raw)
+    compressed = gzip.compress(raw)
+    (tmp_path / "2026-03-01-ad.json.gz").write_bytes(compressed)
+    os.utime(path, (time.time() - 10, time.time() - 10))
+
+    sendfile_calls = []
+    original_sendfile = asyncio.BaseEventLoop.sendfile
+
+    async def counting_sendfile(self, transport, file, *args, **kwargs):
+        sendfile_calls.append(file.name)
+        return await original_sendfile(self, transport, file, *args, **kwargs)
+
+    monkeypatch.setattr(asyncio.BaseEventLoop, "sendfile", counting_sendfile)
+
+    async def scenario(cache_bytes: str):
+        monkeypatch.setenv("DATA_CACHE_BYTES", cache_bytes)
+        server, port = await serve(AsyncDashboard())
+        async with server:
+            status, headers, body = await fetch(port, "GET", "/data/2026-03-01-ad.json")
+            assert status == 200 and body == raw and "content-encoding" not in headers
+            assert headers["vary"] == "Accept-Encoding"
+
+            status, headers, body = await fetch(
+                port, "GET", "/data/2026-03-01-ad.json", {"Accept-Encoding": "br, gzip"}
+            )
+            assert headers["content-encoding"] == "gzip" and body == compressed
+            assert gzip.decompress(body) == raw
+
+            _, headers, body = await fetch(port, "GET", "/data/2026-03-01-ad.json", {"Accept-Encoding": "gzip;q=0"})
+            assert "content-encoding" not in headers and body == raw
+
+            status, headers, _ = await fetch(port, "HEAD", "/data/2026-03-01-ad.json", {"Accept-Encoding": "gzip"})
+            assert status == 200 and int(headers["content-length"]) == len(compressed)
+
+    asyncio.run(scenario("0"))
+    assert sorted(os.path.basename(name) for name in sendfile_calls) == [
+        "2026-03-01-ad.json",
+        "2026-03-01-ad.json",
+        "2026-03-01-ad.json.gz",
+    ]
+
+    sendfile_calls.clear()
+    asyncio.run(scenario(str(1024 * 1024)))
+    assert sendfile_calls == []
+
+    # A sidecar older than its JSON is stale and never served.
+    os.utime(path, None)
+    os.utime(tmp_path / "2026-03-01-ad.json.gz", (time.time() - 60, time.time() - 60))
+
+    async def stale():
+        monkeypatch.setenv("DATA_CACHE_BYTES", "0")
+        server, port = await serve(AsyncDashboard())
+        async with server:
+            _, headers, body = await fetch(port, "GET", "/data/2026-03-01-ad.json", {"Accept-Encoding": "gzip"})
+            assert "content-encoding" not in headers and body == raw
+
+    asyncio.run(stale())
+
+
+def test_fetch_attach_and_cancel(tmp_path, monkeypatch):
+    use_data_dir(monkeypatch, tmp_path)
+    script = tmp_path / "fetch.sh"
+    script.write_text('#!/bin/bash\necho "args: $*"\necho "[00:00:00] [DOMAIN] ai"\nsleep 30\n')
+    script.chmod(0o755)
+    monkeypatch.setattr(async_server, "FETCH_SCRIPT", str(script))
+    monkeypatch.setattr(async_server, "LOGS_DIR", str(tmp_path))
+    monkeypatch.setattr(async_server, "academic_domain_ids", lambda: ["ad", "pd"])
+
+    async def scenario():
+        dashboard = AsyncDashboard()
+        server, port = await serve(dashboard)
+        async with server:
+            status, _, body = await fetch(port, "POST", "/api/fetch", body=b'{"mode": "all"}')
+            assert status == 200 and loads(body) == {"status": "started", "mode": "all", "domains": ["ai", "ad", "pd"]}
+            task = dashboard.tasks["fetch_all"]
+            for _ in range(250):
+                if any("[DOMAIN] ai" in line for line in task.logs):
+                    break
+                await asyncio.sleep(0.02)
+            assert "args: all" in task.logs
+
+            _, _, body = await fetch(port, "POST", "/api/fetch", body=b'{"mode": "all"}')
+            assert loads(body)["status"] == "already_running"
+            _, _, body = await fetch(port, "POST", "/api/fetch", body=b'{"mode": "pd"}')
+            assert loads(body)["attached"] == [{"task": "fetch_all", "domains": ["pd"]}]
+            status, _, _ = await fetch(port, "POST", "/api/fetch", body=b'{"mode": "zzz"}')
+            assert status == 400
+            proc = task.proc
+
+            _, _, body = await fetch(port, "GET", "/api/status")
+            assert loads(body) == {"fetch_all": "running"}
+            status, _, body = await fetch(port, "POST", "/api/fetch/cancel", body=b'{"mode": "all"}')
+            assert status == 200 and loads(body)["status"] == "cancelled"
+            await asyncio.wait_for(proc.wait(), 5)
+            for _ in range(250):
+                _, _, body = await fetch(port, "GET", "/api/status")
+                if loads(body) == {"fetch_all": "cancelled"}:
+                    break
+                await asyncio.sleep(0.02)
+            assert loads(body) == {"fetch_all": "cancelled"}
+            assert task.proc is proc
+            status, _, _ = await fetch(port, "POST", "/api/fetch/cancel", body=b'{"mode": "all"}')
+            assert status == 404
+
+    asyncio.run(scenario())
+    assert (tmp_path / "server-fetch_all.log").exists()
@@ -0,0 +1,134 @@
+import fcntl
+import subprocess
+import threading
+import time
+
+import data_sync
+from data_sync import add_pending, strip_volatile, write_json_if_changed
+from json_codec import dumps
+
+
+def test_strip_volatile_at_any_depth():
+    value = {
+        "generated_at": "x",
+        "date": "2026-03-01",
+        "digest": {"updated_at": "y", "items": [{"generated_at": "z", "title": "a"}, 3]},
+    }
+    assert strip_volatile(value) == {"date": "2026-03-01", "digest": {"items": [{"title": "a"}, 3]}}
+    assert value["digest"]["updated_at"] == "y"
+
+
+def test_timestamp_only_rewrites_leave_the_file_alone(tmp_path):
+    path = tmp_path / "2026-03-01-ad.json"
+    payload = {"date": "2026-03-01", "generated_at": "10:00", "articles": [{"title": "a"}]}
+    assert write_json_if_changed(path, payload)
+    before = path.stat().st_mtime_ns, path.read_bytes()
+
+    assert not write_json_if_changed(path, {**payload, "generated_at": "11:00"})
+    assert (path.stat().st_mtime_ns, path.read_bytes()) == before
+    assert write_json_if_changed(path, {**payload, "articles": []})
+    path.write_text("{broken")
+    assert write_json_if_changed(path, payload)
+
+
+def use_sync_dir(monkeypatch, tmp_path) -> list[tuple[float, list[str]]]:
+    sync_dir = tmp_path / "sync"
+    monkeypatch.setattr(data_sync, "SYNC_DIR", sync_dir)
+    monkeypatch.setattr(data_sync, "PENDING_PATH", sync_dir / "pending.jsonl")
+    monkeypatch.setattr(data_sync, "PENDING_LOCK_PATH", sync_dir / "pending.lock")
+    monkeypatch.setattr(data_sync, "LEADER_LOCK_PATH", sync_dir / "leader.lock")
+    commits: list[tuple[float, list[str]]] = []
+
+    def fake_commit(labels):
+        commits.append((time.monotonic(), labels))
+        return 0
+
+    monkeypatch.setattr(data_sync, "commit_and_push", fake_commit)
+    return commits
+
+
+def test_leader_debounces_requests_into_one_commit(tmp_path, monkeypatch):
+    commits = use_sync_dir(monkeypatch, tmp_path)
+    add_pending("ai")
+    add_pending("ad")
+    late = threading.Timer(0.15, add_pending, args=("ad",))
+    late.start()
+    assert data_sync.run(debounce=0.3, max_wait=5.0) == 0
+    late.join()
+
+    assert [labels for _, labels in commits] == [["ai", "ad", "ad"]]
+    assert data_sync.last_request_at() is None
+
+
+def test_max_wait_caps_the_debounce(tmp_path, monkeypatch):
+    commits = use_sync_dir(monkeypatch, tmp_path)
+    stop = threading.Event()
+
+    def keep_requesting():
+        while not stop.is_set():
+            add_pending("pd")
+            time.sleep(0.05)
+
+    add_pending("pd")
+    writer = threading.Thread(target=keep_requesting)
+    started = time.monotonic()
+    writer.start()
+    threading.Timer(1.0, stop.set).start()
+    data_sync.run(debounce=0.3, max_wait=0.4)
+    # Requests never paused for the debounce window, yet the leader committed within max_wait.
+    assert commits and commits[0][0] - started < 0.8 and not stop.is_set()
+    writer.join()
+
+    data_sync.run(debounce=0.0, max_wait=0.0)
+    assert sum(len(labels) for _, labels in commits) >= 15
+    assert data_sync.last_request_at() is None
+
+
+def test_only_one_leader_and_late_requests_get_their_own_commit(tmp_path, monkeypatch):
+    commits = use_sync_dir(monkeypatch, tmp_path)
+    add_pending("ai")
+    data_sync.SYNC_DIR.mkdir(parents=True, exist_ok=True)
+    with data_sync.LEADER_LOCK_PATH.open("a") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        assert data_sync.run(debounce=0.0, max_wait=0.0) == 0
+    assert commits == [] and data_sync.last_request_at() is not None
+
+    def commit_then_request(labels):
+        commits.append((time.monotonic(), labels))
+        if len(commits) == 1:
+            add_pending("late")
+        return 0
+
+    monkeypatch.setattr(data_sync, "commit_and_push", commit_then_request)
+    data_sync.run(debounce=0.0, max_wait=0.0)
+    assert [labels for _, labels in commits] == [["ai"], ["late"]]
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", "-C", str(cwd), *args], check=True, capture_output=True, text=True).stdout
+
+
+def test_commit_and_push_stages_only_data(tmp_path, monkeypatch):
+    origin, work = tmp_path / "origin.git", tmp_path / "work"
+    git(tmp_path, "init", "-q", "--bare", str(origin))
+    git(tmp_path, "init", "-q", "-b", "main", str(work))
+    git(work, "config", "user.name", "test")
+    git(work, "config", "user.email", "test@example.org")
+    git(work, "remote", "add", "origin", str(origin))
+    (work / "README.md").write_text("readme\n")
+    git(work, "add", "README.md")
+    git(work, "commit", "-q", "-m", "init")
+    git(work, "push", "-q", "origin", "main")
+
+    (work / "data").mkdir()
+    (work / "data" / "2026-03-01-ad.json").write_text(dumps({"articles": []}))
+    (work / "README.md").write_text("edited\n")
+    monkeypatch.setattr(data_sync, "PROJECT_DIR", work)
+
+    assert data_sync.commit_and_push(["ad", "pd", "ad"]) == 0
+    subject = git(origin, "log", "-1", "--format=%s", "main")
+    assert subject.startswith("data: auto-fetch ad, pd ")
+    assert git(origin, "show", "--name-only", "--format=", "main").split() == ["data/2026-03-01-ad.json"]
+    assert "README.md" in git(work, "status", "--porcelain")
+    assert data_sync.commit_and_push(["ad"]) == 0
+    assert git(origin, "rev-list", "--count", "main").strip() == "2"
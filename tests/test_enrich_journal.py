@@ -0,0 +1,44 @@
+from enrich_journal import EnrichCheckpoint, LetPubSearchParser, parse_letpub_search_html
+
+
+def test_checkpoint_round_trip_and_finish(tmp_path):
+    path = tmp_path / "2026-02-23-ad.json"
+    checkpoint = EnrichCheckpoint(path)
+    assert not checkpoint.resumed
+    checkpoint.add_summaries({"123": {"journal": "Brain", "issn": "0006-8950"}})
+    checkpoint.add_lookup("00068950", None)
+
+    resumed = EnrichCheckpoint(path)
+    assert resumed.resumed
+    assert resumed.summaries == {"123": {"journal": "Brain", "issn": "0006-8950"}}
+    assert resumed.lookups == {"00068950": None}
+
+    resumed.failed = 1
+    resumed.finish()
+    assert path.exists()
+    EnrichCheckpoint(path).finish()
+    assert not path.exists()
+
+
+def letpub_page(rows: list[str], closed: bool = True) -> str:
+    header = "<table><tr>" + "".join(f"<th>{h}</th>" for h in ["ISSN", "期刊名"] + [""] * 10) + "</tr>"
+    body = "".join(rows)
+    return header + body + ("</table>" if closed else "")
+
+
+def letpub_row(issn: str, name: str, impact: str, closed: bool = True) -> str:
+    cells = [issn, f'<a href="?journalid=42">{name}</a><font>{name[:3]}</font>', "", impact] + [""] * 8
+    row = "<tr>" + "".join(f"<td>{c}</td>" for c in cells)
+    return row + "</tr>" if closed else row
+
+
+def test_truncated_page_keeps_its_last_row():
+    page = letpub_page([letpub_row("0006-8950", "Brain", "IF: 14.5", closed=False)], closed=False)
+    result = parse_letpub_search_html(page, "0006-8950")
+    assert result["journal_name"] == "Brain"
+    assert result["impact_factor"] == 14.5
+
+    parser = LetPubSearchParser()
+    parser.feed(letpub_page([letpub_row("1", "A", "1"), letpub_row("2", "B", "2", closed=False)], closed=False))
+    parser.close()
+    assert len(parser.rows) == 2
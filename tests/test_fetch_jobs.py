@@ -0,0 +1,70 @@
+import subprocess
+import time
+
+from fetch_jobs import (
+    CANCEL_GRACE_SECONDS,
+    group_alive,
+    known_mode,
+    plan_fetch,
+    remaining_domains,
+    task_key_for,
+    terminate_group,
+)
+from run_with_timeout import STOP_GRACE_SECONDS
+
+
+ACADEMIC = ["ad", "pd"]
+
+
+def test_known_modes():
+    assert all(known_mode(mode, ACADEMIC) for mode in ("ai", "test", "all", "ad"))
+    assert not known_mode("zzz", ACADEMIC)
+
+
+def test_all_job_only_holds_domains_it_has_not_finished():
+    domains = plan_fetch("all", ACADEMIC, {}).todo
+    assert domains == ("ai", "ad", "pd")
+    domains = remaining_domains(domains, ["[10:00:00] [DOMAIN] ai", "noise"])
+    assert domains == ("ai", "ad", "pd")
+    domains = remaining_domains(domains, ["[10:05:00] [OK] done", "[10:05:01] [DOMAIN] ad"])
+    assert domains == ("ad", "pd")
+
+    plan = plan_fetch("ai", ACADEMIC, {"fetch_all": domains})
+    assert plan.todo == ("ai",) and not plan.attached
+    plan = plan_fetch("pd", ACADEMIC, {"fetch_all": domains})
+    assert plan.covered and plan.attached == {"fetch_all": ["pd"]}
+
+
+def test_cancel_outlasts_run_with_timeout_grace():
+    assert CANCEL_GRACE_SECONDS > STOP_GRACE_SECONDS
+
+
+def test_rerunning_a_live_mode_attaches_to_its_job():
+    running = {"fetch_all": ("ad", "pd")}
+    plan = plan_fetch("all", ACADEMIC, running)
+    assert plan.covered
+    assert plan.attached == {"fetch_all": ["ad", "pd"]}
+    assert plan.response("already_running")["attached"] == [{"task": "fetch_all", "domains": ["ad", "pd"]}]
+
+    plan = plan_fetch("all", ACADEMIC, {"fetch_ai": ("ai",)})
+    assert plan.todo == ("ad", "pd") and task_key_for(plan.mode) == "fetch_all"
+
+
+def test_cancel_kills_group_members_that_outlive_fetch_sh(tmp_path):
+    pid_file = tmp_path / "pid"
+    proc = subprocess.Popen(
+        ["sh", "-c", f"(trap '' TERM; exec sleep 60) & echo $! > {pid_file}; wait"], start_new_session=True
+    )
+    for _ in range(200):
+        if pid_file.exists() and pid_file.read_text().strip():
+            break
+        time.sleep(0.02)
+    started = time.monotonic()
+    terminate_group(proc, grace=0.5).join(timeout=5)
+    assert proc.wait(timeout=5) != 0
+    for _ in range(100):
+        if not group_alive(proc.pid):
+            break
+        time.sleep(0.02)
+    assert not group_alive(proc.pid)
+    assert time.monotonic() - started < 3
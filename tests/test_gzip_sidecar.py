@@ -0,0 +1,79 @@
+import gzip
+import http.client
+import http.server
+import os
+import threading
+import time
+
+import dashboard_data
+import server
+from dashboard_data import accepts_gzip, gzip_sidecar
+from generate_digest import write_json
+from payload_cache import PayloadCache
+
+
+def test_accept_encoding_negotiation():
+    for header in ("gzip", "GZIP", "br, gzip", "gzip;q=0.5", "*", "deflate, *;q=1", "gzip; q=1.0"):
+        assert accepts_gzip(header), header
+    for header in ("", None, "br", "gzip;q=0", "gzip;q=0.0", "*;q=0", "gzip;q=abc", "x-gzip"):
+        assert not accepts_gzip(header), header
+
+
+def test_write_json_keeps_the_sidecar_in_step(tmp_path, monkeypatch):
+    monkeypatch.setattr(dashboard_data, "DATA_DIR", str(tmp_path))
+    path = str(tmp_path / "2026-03-01-ad.json")
+    payload = {"date": "2026-03-01", "articles": [{"title": "Amyloid PET"}]}
+    assert write_json(path, payload)
+    with open(path, "rb") as f, gzip.open(path + ".gz") as g:
+        assert g.read() == f.read()
+    assert gzip_sidecar(path, "gzip") == path + ".gz"
+    assert gzip_sidecar(path, "identity") is None
+    assert gzip_sidecar(str(tmp_path / "other" / "2026-03-01-ad.json"), "gzip") is None
+
+    # A plain rewrite of the JSON makes the older sidecar stale.
+    later = time.time() + 5
+    os.utime(path, (later, later))
+    assert gzip_sidecar(path, "gzip") is None
+    assert write_json(path, {**payload, "articles": []})
+    assert gzip_sidecar(path, "gzip") == path + ".gz"
+
+
+def get(port: int, path: str, accept_encoding: str = "") -> tuple[int, dict, bytes]:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path, headers={"Accept-Encoding": accept_encoding} if accept_encoding else {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response.status, {k.lower(): v for k, v in response.getheaders()}, body
+
+
+def test_threaded_server_serves_the_sidecar_to_gzip_clients(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    monkeypatch.setattr(server, "PROJECT_DIR", str(tmp_path))
+    monkeypatch.setattr(server, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(dashboard_data, "DATA_DIR", str(data_dir))
+    path = str(data_dir / "2026-03-01-ad.json")
+    write_json(path, {"date": "2026-03-01", "articles": [{"title": "x" * 400}]})
+    with open(path, "rb") as f:
+        raw = f.read()
+    with open(path + ".gz", "rb") as f:
+        compressed = f.read()
+
+    for budget in (0, 1024 * 1024):
+        monkeypatch.setattr(server, "data_cache", PayloadCache(budget))
+        httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), server.DailyNewsHandler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        try:
+            port = httpd.server_address[1]
+            status, headers, body = get(port, "/data/2026-03-01-ad.json", "gzip, br")
+            assert status == 200 and headers["content-encoding"] == "gzip" and body == compressed
+            assert headers["vary"] == "Accept-Encoding"
+            status, headers, body = get(port, "/data/2026-03-01-ad.json")
+            assert status == 200 and "content-encoding" not in headers and body == raw
+            status, headers, body = get(port, "/data/2026-03-01-ad.json", "gzip;q=0")
+            assert "content-encoding" not in headers and body == raw
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
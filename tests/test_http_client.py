@@ -0,0 +1,39 @@
+import http_client
+from http_client import ResponseCache
+from json_codec import read_file
+
+
+def test_concurrent_instances_keep_each_others_entries(tmp_path):
+    first = ResponseCache(tmp_path)
+    second = ResponseCache(tmp_path)
+    first.put("a", "https://example.org/a", b"alpha", {"ETag": '"1"'})
+    second.put("b", "https://example.org/b", b"beta", {})
+
+    entries = ResponseCache(tmp_path)._entries
+    assert set(entries) == {"a", "b"}
+    assert entries["a"]["etag"] == '"1"'
+
+
+def test_eviction_sees_entries_of_other_instances(tmp_path):
+    first = ResponseCache(tmp_path, max_bytes=10)
+    second = ResponseCache(tmp_path, max_bytes=10)
+    first.put("old", "https://example.org/old", b"123456", {})
+    second.put("new", "https://example.org/new", b"abcdef", {})
+
+    assert set(ResponseCache(tmp_path)._entries) == {"new"}
+    assert first.get("old") is None
+    assert not any(path.name.startswith("8d969eef") for path in (tmp_path / "blobs").rglob("*"))
+
+
+def test_hit_access_time_is_saved(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path)
+    cache.put("a", "https://example.org/a", b"alpha", {})
+    stored = read_file(tmp_path / "index.json")["entries"]["a"]["last_access"]
+
+    monkeypatch.setattr(http_client, "ACCESS_FLUSH_SECONDS", 3600)
+    entry, body = cache.get("a")
+    assert body == b"alpha"
+    assert read_file(tmp_path / "index.json")["entries"]["a"]["last_access"] == stored
+
+    cache.flush()
+    assert read_file(tmp_path / "index.json")["entries"]["a"]["last_access"] == entry["last_access"] > stored
@@ -0,0 +1,78 @@
+import dataclasses
+import math
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from json_codec import BACKENDS
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+needs_orjson = pytest.mark.skipif("orjson" not in BACKENDS, reason="orjson is not installed")
+
+
+def encode_both(value: object, pretty: bool) -> tuple[bytes, bytes]:
+    return BACKENDS["json"][1](value, pretty), BACKENDS["orjson"][1](value, pretty)
+
+
+@needs_orjson
+@pytest.mark.parametrize("pretty", [False, True])
+def test_backends_write_the_same_bytes_for_the_data_files(pretty):
+    std_loads, orjson_loads = BACKENDS["json"][0], BACKENDS["orjson"][0]
+    paths = sorted(DATA_DIR.glob("*.json"))
+    assert paths
+    for path in paths:
+        raw = path.read_bytes()
+        value = std_loads(raw)
+        assert orjson_loads(raw) == value
+        std, orj = encode_both(value, pretty)
+        assert std == orj, path.name
+
+
+@needs_orjson
+@pytest.mark.parametrize("pretty", [False, True])
+def test_backends_write_the_same_bytes_for_plain_values(pretty):
+    values = [
+        {"title": "Amyloid β – PET 🧠", "sep": " ", "ctrl": "\x00\x1f\x7f", "quote": '"\\/'},
+        {"nested": [[], {}, [{}], {"a": [1, [2, [3]]]}], "empty": ""},
+        {1: "int key", True: "bool key", None: "null key", "z": 0, "a": -1},
+        [0, -1, 2**63 - 1, -(2**63), 2**64, 2**200, True, False, None],
+        [0.0, -0.0, 0.5, 0.1 + 0.2, 123456789.123, 1e-4, 9.5e15, -2.5],
+        ("tuple", 1),
+        "plain",
+    ]
+    for value in values:
+        std, orj = encode_both(value, pretty)
+        assert std == orj, value
+
+
+@needs_orjson
+def test_float_spelling_differs_but_parses_back_the_same():
+    std_loads, orjson_loads = BACKENDS["json"][0], BACKENDS["orjson"][0]
+    for value in (1e-05, 1e16, 1.5e300):
+        std, orj = encode_both([value], False)
+        assert std != orj
+        assert std_loads(orj) == std_loads(std) == orjson_loads(std) == [value]
+
+
+@needs_orjson
+def test_documented_differences_for_non_json_values():
+    assert encode_both([math.nan, math.inf, -math.inf], False) == (b"[NaN,Infinity,-Infinity]", b"[null,null,null]")
+
+    @dataclasses.dataclass
+    class Point:
+        x: int
+
+    for value in (date(2026, 3, 1), Point(1)):
+        with pytest.raises(TypeError):
+            BACKENDS["json"][1](value)
+        assert BACKENDS["orjson"][1](value)
+
+
+def test_stdlib_backend_rejects_unknown_types_and_lone_surrogates():
+    with pytest.raises(TypeError):
+        BACKENDS["json"][1]({"s": {1, 2}})
+    with pytest.raises(UnicodeEncodeError):
+        BACKENDS["json"][1]("\ud800")
@@ -0,0 +1,25 @@
+import subprocess
+
+from log_pipeline import RotatingLogWriter, filter_command, read_batches
+
+
+def test_rotation_counts_bytes(tmp_path):
+    path = tmp_path / "fetch.log"
+    writer = RotatingLogWriter(str(path), max_bytes=100, backup_count=2)
+    writer.write_lines(["中" * 20])  # 61 bytes, 21 characters
+    writer.write_lines(["文" * 20])
+    writer.close()
+    assert path.read_text(encoding="utf-8") == "文" * 20 + "\n"
+    assert (tmp_path / "fetch.log.1").read_text(encoding="utf-8") == "中" * 20 + "\n"
+
+
+def test_filter_process_keeps_raw_log_and_drops_noise(tmp_path):
+    raw = tmp_path / "logs" / "server-fetch_ai.log"
+    output = "[10:00:00] start\n[INFO] bus chatter\n\x1b[32mservice=bus\x1b[0m\n[10:00:01] [DOMAIN] ai\npartial"
+    proc = subprocess.Popen(filter_command(str(raw)), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    proc.stdin.write(output.encode("utf-8"))
+    proc.stdin.close()
+    lines = [line for batch in read_batches(proc.stdout) for line in batch]
+    assert proc.wait() == 0
+    assert lines == ["[10:00:00] start", "[10:00:01] [DOMAIN] ai", "partial"]
+    assert raw.read_text(encoding="utf-8") == output + "\n"
@@ -0,0 +1,38 @@
+import threading
+
+from metrics import RequestMetrics, route_label
+
+
+def test_retired_threads_keep_their_counts_and_release_shards():
+    metrics = RequestMetrics()
+
+    def connection():
+        metrics.observe("/api/status", "GET", 200, 0.002, 10)
+        metrics.retire_thread()
+
+    threads = [threading.Thread(target=connection) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics._shards == []
+    text = metrics.render()
+    assert 'dailynews_http_requests_total{route="/api/status",method="GET",code="200"} 50' in text
+    assert 'dailynews_http_response_bytes_total{route="/api/status"} 500' in text
+    assert 'dailynews_http_request_duration_seconds_count{route="/api/status",method="GET"} 50' in text
+
+
+def test_live_shard_is_merged_at_scrape_time():
+    metrics = RequestMetrics()
+    metrics.observe("/data/2026-02-24-ai.json", "GET", 200, 0.5)
+    metrics.observe("/api/stream", "GET", 200, 30.0)
+    text = metrics.render()
+    assert 'route="/data/",method="GET",code="200"} 1' in text
+    # Streaming routes are counted but stay out of the latency histogram.
+    assert 'dailynews_http_request_duration_seconds_count{route="/api/stream"' not in text
+
+
+def test_route_labels_are_bounded():
+    assert route_label("/api/nope") == "/api/other"
+    assert route_label("/index.html") == "static"
@@ -0,0 +1,93 @@
+import random
+
+from near_dup import find_near_duplicates, shingles, signature, similarity
+
+
+WORDS = (
+    "openai anthropic google meta model agent release benchmark inference chip gpu cloud startup robot "
+    "vision speech search browser coding safety policy research paper dataset training open weights"
+).split()
+
+
+def story(rng, length=14):
+    return " ".join(rng.choice(WORDS) + str(rng.randrange(40)) for _ in range(length))
+
+
+def reworded(rng, text, edits):
+    words = text.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = rng.choice(WORDS) + "x"
+    return " ".join(words)
+
+
+def jaccard(left, right):
+    a, b = shingles(left), shingles(right)
+    return len(a & b) / len(a | b)
+
+
+def brute_force_clusters(articles, threshold):
+    sigs = [signature(a["title"]) for a in articles]
+    parent = list(range(len(articles)))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i in range(len(articles)):
+        for j in range(i):
+            if similarity(sigs[i], sigs[j]) >= threshold:
+                parent[find(i)] = find(j)
+    groups = {}
+    for i in range(len(articles)):
+        groups.setdefault(find(i), []).append(i)
+    return sorted(g for g in groups.values() if len(g) > 1)
+
+
+def test_signature_estimates_jaccard():
+    rng = random.Random(35)
+    errors = []
+    for _ in range(200):
+        base = story(rng)
+        other = reworded(rng, base, rng.randrange(8))
+        errors.append(abs(similarity(signature(base), signature(other)) - jaccard(base, other)))
+    assert sum(errors) / len(errors) < 0.05
+    assert max(errors) < 0.25
+
+
+def test_lsh_clusters_agree_with_all_pairs_comparison():
+    rng = random.Random(7)
+    articles = []
+    for _ in range(60):
+        base = story(rng)
+        articles.append({"title": base})
+        for _ in range(rng.randrange(3)):
+            articles.append({"title": reworded(rng, base, rng.randrange(1, 4))})
+    rng.shuffle(articles)
+
+    clusters, _ = find_near_duplicates(articles, threshold=0.5)
+    expected = brute_force_clusters(articles, 0.5)
+    # LSH may only miss borderline pairs: every cluster it finds lies inside an all-pairs cluster,
+    # and pairs well above the threshold are always found.
+    assert all(any(set(c) <= set(e) for e in expected) for c in clusters)
+    cluster_of = {i: k for k, c in enumerate(clusters) for i in c}
+    sigs = [signature(a["title"]) for a in articles]
+    for i in range(len(articles)):
+        for j in range(i):
+            if similarity(sigs[i], sigs[j]) >= 0.8:
+                assert cluster_of.get(i) is not None and cluster_of.get(i) == cluster_of.get(j)
+    assert len(clusters) >= 0.9 * len(expected)
+
+
+def test_first_seen_is_the_earliest_match():
+    rng = random.Random(3)
+    text = story(rng)
+    history = [
+        {"title": text, "date": "2026-02-20", "url": "https://a.example/1"},
+        {"title": reworded(rng, text, 1), "date": "2026-02-18", "url": "https://b.example/2"},
+        {"title": story(rng), "date": "2026-02-17", "url": "https://c.example/3"},
+    ]
+    articles = [{"title": text}, {"title": story(rng)}, {"title": ""}]
+    clusters, first_seen = find_near_duplicates(articles, history)
+    assert clusters == []
+    assert first_seen == {0: {"date": "2026-02-18", "title": history[1]["title"], "url": "https://b.example/2"}}
@@ -0,0 +1,50 @@
+from payload_cache import PARSED_COST_FACTOR, PayloadCache
+
+
+def write_days(tmp_path, count, size=100):
+    paths = []
+    for day in range(count):
+        path = tmp_path / f"2026-02-{day + 1:02d}-ai.json"
+        path.write_text('{"articles": [], "pad": "' + "x" * size + '"}')
+        paths.append(path)
+    return paths
+
+
+def test_budget_evicts_least_recently_used(tmp_path):
+    paths = write_days(tmp_path, 4)
+    entry_cost = (1 + PARSED_COST_FACTOR) * paths[0].stat().st_size
+    cache = PayloadCache(budget=3 * entry_cost)
+    for path in paths[:3]:
+        cache.payload(path)
+    cache.payload(paths[0])
+    cache.payload(paths[3])
+
+    assert cache.stats()["bytes"] == 3 * entry_cost <= cache.budget
+    assert set(cache._entries) == {str(paths[0]), str(paths[2]), str(paths[3])}
+
+
+def test_file_over_budget_is_not_kept(tmp_path):
+    (path,) = write_days(tmp_path, 1, size=1000)
+    cache = PayloadCache(budget=500)
+    assert cache.payload(path)["articles"] == []
+    assert len(cache) == 0 and cache.stats()["bytes"] == 0
+
+
+def test_rewritten_file_is_reloaded(tmp_path):
+    (path,) = write_days(tmp_path, 1)
+    cache = PayloadCache()
+    assert cache.payload(path)["articles"] == []
+    path.write_text('{"articles": [{"title": "new"}]}')
+    assert cache.payload(path)["articles"] == [{"title": "new"}]
+
+
+def test_peek_does_not_evict_cached_days(tmp_path):
+    paths = write_days(tmp_path, 5)
+    entry_cost = (1 + PARSED_COST_FACTOR) * paths[0].stat().st_size
+    cache = PayloadCache(budget=2 * entry_cost)
+    cached = cache.payload(paths[0])
+    cache.payload(paths[1])
+
+    assert cache.peek(paths[0]) is cached
+    assert [cache.peek(path)["articles"] for path in paths[2:]] == [[], [], []]
+    assert set(cache._entries) == {str(paths[0]), str(paths[1])}
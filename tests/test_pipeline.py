@@ -0,0 +1,29 @@
+import shutil
+from pathlib import Path
+
+import pipeline
+from json_codec import read_file
+
+
+DATA_FILE = Path(__file__).resolve().parent.parent / "data" / "2026-02-23-ad.json"
+
+
+def test_failed_enrich_writes_articles_as_they_were(tmp_path, monkeypatch):
+    monkeypatch.setenv("ENRICH_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    monkeypatch.setenv("PMID_STORE_DIR", str(tmp_path / "pmids"))
+    path = tmp_path / DATA_FILE.name
+    shutil.copy(DATA_FILE, path)
+    before = read_file(path)["articles"]
+
+    def broken_enrich(data, path, records=None, checkpoint=None):
+        for article in data["articles"]:
+            article.pop("journal_issn", None)
+            article["journal"] = "half-done"
+        raise RuntimeError("upstream went away")
+
+    monkeypatch.setattr(pipeline, "enrich_payload", broken_enrich)
+    assert pipeline.run_file(path, stages=("enrich", "digest")) == 0
+
+    written = read_file(path)
+    assert written["articles"] == before
+    assert written["digest"]["recommendations"]
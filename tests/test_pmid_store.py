@@ -0,0 +1,77 @@
+import random
+import struct
+from datetime import date
+
+import pmid_store
+from json_codec import dumps
+from pmid_store import HEADER, MAGIC, PmidStore, carry_forward, read_pmid_list, record_file
+
+
+def test_record_keeps_the_earliest_day_and_filters_older_pmids():
+    store = PmidStore("ad")
+    assert store.record([30, 10, 20, 10], date(2026, 2, 24)) == 3
+    assert store.record([20, 40, 5], date(2026, 2, 23)) == 2
+    assert store.record([40, 50], date(2026, 2, 25)) == 1
+
+    assert list(store.pmids) == [5, 10, 20, 30, 40, 50]
+    assert store.first_seen_day(20) == date(2026, 2, 23)
+    assert store.first_seen_day(40) == date(2026, 2, 23)
+    assert store.first_seen_day(99) is None
+    assert store.watermark_day == date(2026, 2, 25)
+    assert 50 in store and 51 not in store
+
+    # Same-day re-runs keep their own PMIDs; anything stored earlier is dropped.
+    assert store.filter_new([50, 40, 10, 99], date(2026, 2, 25)) == [50, 99]
+    assert store.filter_new([5, 10], date(2026, 2, 24)) == [10]
+
+
+def test_binary_round_trip_matches_a_dict_model(tmp_path):
+    rng = random.Random(37)
+    store, model = PmidStore("pd"), {}
+    for offset in range(20):
+        day = date(2026, 1, 1).toordinal() + rng.randrange(60)
+        pmids = [rng.randrange(1, 2**32) if offset == 0 else rng.randrange(1, 5000) for _ in range(50)]
+        store.record(pmids, date.fromordinal(day))
+        for pmid in pmids:
+            model[pmid] = min(model.get(pmid, day), day)
+
+    path = tmp_path / "pd.bin"
+    store.save(path)
+    raw = path.read_bytes()
+    assert raw[:4] == MAGIC
+    assert struct.unpack_from("<I", raw, HEADER.size)[0] == min(model)
+    assert len(raw) == HEADER.size + 8 * len(model)
+
+    loaded = PmidStore.load("pd", path)
+    assert list(loaded.pmids) == sorted(model)
+    assert {p: d.toordinal() for p in model if (d := loaded.first_seen_day(p))} == model
+    assert loaded.watermark == store.watermark
+    assert PmidStore.load("pd", tmp_path / "missing.bin").pmids.tolist() == []
+
+
+def article(pmid: int, journal: str = "") -> dict:
+    return {"title": f"paper {pmid}", "url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/", "journal": journal}
+
+
+def test_record_file_and_carry_forward(tmp_path, monkeypatch):
+    monkeypatch.setattr(pmid_store, "DATA_DIR", tmp_path)
+    monkeypatch.setenv("PMID_STORE_DIR", str(tmp_path / "store"))
+    first = tmp_path / "2026-02-23-ad.json"
+    first.write_text(dumps({"articles": [article(1, "Brain"), article(2)]}))
+    second = tmp_path / "2026-02-24-ad.json"
+    second.write_text(dumps({"articles": [article(1), article(2), article(3)]}))
+
+    assert record_file(first) == 2
+    assert record_file(second) == 1
+    assert record_file(second) == 0
+    assert record_file(tmp_path / "notes.json") is None
+
+    # Journal of PMID 1 comes from the day it was first stored; PMID 2 had none, PMID 3 is new.
+    assert carry_forward(second, ["1", "2", "3"]) == {"1": {"journal": "Brain"}}
+    assert carry_forward(first, ["1"]) == {}
+
+
+def test_read_pmid_list_formats():
+    assert read_pmid_list('{"esearchresult": {"idlist": ["3", "1", "x"]}}') == [3, 1]
+    assert read_pmid_list('["4", 5]') == [4, 5]
+    assert read_pmid_list("6, 7\n8") == [6, 7, 8]
@@ -0,0 +1,45 @@
+from refresh_letpub import Checkpoint, diff_catalog
+
+
+def journal(journal_id, *fields, **extra):
+    return {"journal_id": journal_id, "journal_name": f"J{journal_id}", "fields": list(fields), **extra}
+
+
+def test_prune_only_touches_refreshed_fields():
+    existing = [
+        journal(1, "A"),
+        journal(2, "A", "B"),
+        journal(3, "ISSN补录"),
+        journal(4, "B"),
+    ]
+    journals, stats = diff_catalog(existing, {}, prune=True, targets=["A"])
+    assert {j["journal_id"]: j["fields"] for j in journals} == {2: ["B"], 3: ["ISSN补录"], 4: ["B"]}
+    assert stats["removed"] == 1
+    assert stats["updated"] == 1
+
+
+def test_without_prune_missing_journals_are_kept():
+    existing = [journal(1, "A"), journal(2, "B")]
+    journals, stats = diff_catalog(existing, {}, prune=False, targets=["A"])
+    assert [j["journal_id"] for j in journals] == [1, 2]
+    assert stats["removed"] == 0
+
+
+def test_refreshed_metrics_update_and_new_journals_are_added():
+    existing = [journal(1, "A", impact_factor=1.0, views=10)]
+    refreshed = {
+        1: journal(1, "A", impact_factor=2.0, views=99),
+        5: journal(5, "A", impact_factor=3.0),
+    }
+    journals, stats = diff_catalog(existing, refreshed, prune=True, targets=["A"])
+    by_id = {j["journal_id"]: j for j in journals}
+    assert by_id[1]["impact_factor"] == 2.0
+    assert stats == {"added": 1, "updated": 1, "unchanged": 0, "removed": 0}
+
+
+def test_checkpoint_is_scoped_to_data_dir_and_expires(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    Checkpoint(path, "/data/one").save(3, 1, [{"journal_id": 1}])
+    assert Checkpoint(path, "/data/one").get(3, 1) == [{"journal_id": 1}]
+    assert Checkpoint(path, "/data/two").get(3, 1) is None
+    assert Checkpoint(path, "/data/one", max_age=-1).get(3, 1) is None
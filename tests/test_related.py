@@ -0,0 +1,100 @@
+import shutil
+from pathlib import Path
+
+from json_codec import dumps, read_file
+from related import REBUILD_DRIFT, RelatedIndex
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+BASE_DAYS = ("2026-02-23", "2026-02-24", "2026-02-25", "2026-02-26", "2026-02-27")
+# Pairs scored by earlier runs keep the IDF of that run until REBUILD_DRIFT;
+# within it an incremental score may differ from a full rebuild by this much.
+SCORE_TOLERANCE = 0.03
+
+
+def copy_days(target: Path, *days: str) -> None:
+    for day in days:
+        for path in DATA_DIR.glob(f"{day}-*.json"):
+            shutil.copy(path, target / path.name)
+
+
+def built_index(tmp_path: Path, days: tuple[str, ...] = BASE_DAYS) -> tuple[Path, Path]:
+    data_dir, index_dir = tmp_path / "data", tmp_path / "index"
+    data_dir.mkdir()
+    copy_days(data_dir, *days)
+    index = RelatedIndex.load(index_dir)
+    index.sync_files(data_dir)
+    index.rebuild()
+    index.save(index_dir)
+    return data_dir, index_dir
+
+
+def edit_corpus(data_dir: Path) -> None:
+    """A day's worth of change that stays within REBUILD_DRIFT."""
+    for domain in ("ad", "pd", "depression", "autism"):
+        shutil.copy(DATA_DIR / f"2026-02-28-{domain}.json", data_dir)
+    (data_dir / "2026-02-24-pd.json").unlink()
+    changed = data_dir / "2026-02-23-depression.json"
+    payload = read_file(changed)
+    payload["articles"][0]["title"] = "Ketamine response in treatment-resistant depression tracked by EEG"
+    changed.write_text(dumps(payload), encoding="utf-8")
+    untouched = data_dir / "2026-02-23-ad.json"
+    untouched.write_text(dumps(read_file(untouched)), encoding="utf-8")
+
+
+def full_rebuild(data_dir: Path, index_dir: Path) -> RelatedIndex:
+    index = RelatedIndex.load(index_dir)
+    index.sync_files(data_dir)
+    index.rebuild()
+    return index
+
+
+def test_incremental_update_stays_close_to_full_rebuild(tmp_path):
+    data_dir, index_dir = built_index(tmp_path)
+    edit_corpus(data_dir)
+    index = RelatedIndex.load(index_dir)
+    dirty, removed = index.sync_files(data_dir)
+    assert dirty and removed and not index.needs_rebuild()
+    assert not any(index.docs[url]["file"] == "2026-02-23-ad.json" for url in dirty)
+    index.update(dirty, removed)
+
+    fresh = full_rebuild(data_dir, tmp_path / "fresh")
+    assert index.docs.keys() == fresh.docs.keys() == index.neighbors.keys()
+    assert index.df == fresh.df
+    for url in dirty:
+        assert index.neighbors[url] == fresh.neighbors[url]
+
+    for url, pairs in fresh.neighbors.items():
+        got = dict(index.neighbors[url])
+        assert not removed & got.keys()
+        for other, score in pairs:
+            if other in got:
+                assert abs(got[other] - score) <= SCORE_TOLERANCE, (url, other)
+            else:
+                # Only borderline pairs may swap places with one scored under the older IDF.
+                assert score - pairs[-1][1] <= SCORE_TOLERANCE, (url, other)
+
+
+def test_growth_past_drift_triggers_full_rebuild(tmp_path):
+    data_dir, index_dir = built_index(tmp_path, ("2026-02-23", "2026-02-24"))
+    index = RelatedIndex.load(index_dir)
+    assert index.sync_files(data_dir) == (set(), set())
+    assert not index.needs_rebuild()
+    size = index.full_build_size
+
+    shutil.copy(DATA_DIR / "2026-02-25-ai.json", data_dir)
+    dirty, removed = index.sync_files(data_dir)
+    assert 0 < len(index.docs) - size <= size * REBUILD_DRIFT
+    assert not index.needs_rebuild()
+    index.update(dirty, removed)
+    index.save(index_dir)
+
+    shutil.copy(DATA_DIR / "2026-02-25-brainmri.json", data_dir)
+    index = RelatedIndex.load(index_dir)
+    index.sync_files(data_dir)
+    assert len(index.docs) - size > size * REBUILD_DRIFT
+    assert index.needs_rebuild()
+
+    index.rebuild()
+    assert index.full_build_size == len(index.docs) and not index.needs_rebuild()
+    assert index.neighbors == full_rebuild(data_dir, tmp_path / "fresh").neighbors
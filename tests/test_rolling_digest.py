@@ -0,0 +1,69 @@
+import random
+import shutil
+from pathlib import Path
+
+from export import ExportQuery, load_payload, select_files
+from json_codec import dumps
+from rolling_digest import build_rolling_digest, dedupe_key, rank_key, ranked_stream
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DAYS = [f"2026-03-{day:02d}" for day in range(1, 10)]
+
+
+def recommendation(rng: random.Random) -> dict:
+    n = rng.randrange(30)
+    url = rng.choice(
+        [
+            f"https://pubmed.ncbi.nlm.nih.gov/{4000 + n}/",
+            f"https://pubmed.ncbi.nlm.nih.gov/{4000 + n}",
+            f"https://Example.org/story/{n}/",
+            f"https://example.org/story/{n}",
+            "",
+        ]
+    )
+    return {
+        "title": f"Story {n}" + rng.choice(["", " ", "  "]),
+        "url": url,
+        "published_date": rng.choice(DAYS),
+        "score": rng.randrange(8) + rng.choice([0, 0.5]),
+    }
+
+
+def write_corpus(data_dir: Path, rng: random.Random) -> None:
+    for day in DAYS:
+        for domain in ("ad", "ai", "pd"):
+            recommendations = [recommendation(rng) for _ in range(rng.randrange(12))]
+            recommendations.sort(key=rank_key, reverse=True)
+            payload = {"date": day, "articles": [], "digest": {"recommendations": recommendations}}
+            (data_dir / f"{day}-{domain}.json").write_text(dumps(payload), encoding="utf-8")
+    # A digest from before recommendations carried scores, rescored from its articles.
+    shutil.copy(DATA_DIR / "2026-02-27-ai.json", data_dir / "2026-03-08-ai.json")
+
+
+def brute_force(data_dir: Path, start: str, end: str, domains: str, top: int) -> list[dict]:
+    entries = []
+    for day, domain, path in select_files(ExportQuery(start, end, domains), data_dir):
+        entries.extend(ranked_stream(load_payload(path), day, domain))
+    entries.sort(key=rank_key, reverse=True)
+    kept, seen = [], set()
+    for entry in entries:
+        if dedupe_key(entry) not in seen:
+            seen.add(dedupe_key(entry))
+            kept.append(entry)
+    return kept[:top]
+
+
+def test_merge_matches_sorting_every_entry(tmp_path):
+    write_corpus(tmp_path, random.Random(48))
+    rescored = list(ranked_stream(load_payload(tmp_path / "2026-03-08-ai.json"), "2026-03-08", "ai"))
+    assert rescored and all(isinstance(entry["score"], (int, float)) for entry in rescored)
+    assert rescored == sorted(rescored, key=rank_key, reverse=True)
+
+    for window, end, domains in (("week", "2026-03-09", ""), ("week", "2026-03-05", "ai,pd"), ("month", "", "ad")):
+        for top in (1, 5, 20, 200):
+            digest = build_rolling_digest(window, end, domains, top, data_dir=tmp_path)
+            expected = brute_force(tmp_path, digest["from"], digest["to"], domains, top)
+            assert digest["recommendations"] == expected
+            keys = [dedupe_key(entry) for entry in digest["recommendations"]]
+            assert len(keys) == len(set(keys))
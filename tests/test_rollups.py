@@ -0,0 +1,84 @@
+import random
+from datetime import date, timedelta
+
+from rollups import RollupStore, bucket_ranges, query_trends
+
+
+START = date(2026, 1, 1)
+COLUMNS = ("total", "priority.high", "topic.mri", "journal.Brain")
+
+
+def random_store(rng):
+    """A store filled out of order (prepends, appends, rewrites) plus the plain per-day dict it should equal."""
+    store = RollupStore("ad")
+    expected: dict[date, dict[str, int]] = {}
+    for _ in range(200):
+        day = START + timedelta(days=rng.randrange(120))
+        counts = {name: rng.randrange(50) for name in rng.sample(COLUMNS, rng.randrange(1, len(COLUMNS) + 1))}
+        store.set_day(day, counts)
+        expected[day] = counts
+    return store, expected
+
+
+def brute_total(expected, name, first, last):
+    return sum(counts.get(name, 0) for day, counts in expected.items() if first <= day <= last)
+
+
+def test_prefix_sums_match_brute_force_totals(tmp_path):
+    rng = random.Random(34)
+    store, expected = random_store(rng)
+    store.save(tmp_path / "ad.u32")
+    loaded = RollupStore.load("ad", tmp_path / "ad.u32")
+    for _ in range(500):
+        first = START + timedelta(days=rng.randrange(-10, 130))
+        last = first + timedelta(days=rng.randrange(-3, 60))
+        for name in COLUMNS + ("missing",):
+            want = brute_total(expected, name, first, last)
+            assert store.total(name, first, last) == want
+            assert loaded.total(name, first, last) == want
+
+
+def test_rewriting_a_day_invalidates_prefix_sums():
+    store = RollupStore("ad")
+    store.set_day(START, {"total": 3})
+    store.set_day(START + timedelta(days=2), {"total": 4})
+    assert store.total("total", START, START + timedelta(days=2)) == 7
+    store.set_day(START, {"total": 1})
+    assert store.total("total", START, START + timedelta(days=2)) == 5
+
+
+def test_buckets_tile_the_range():
+    first, last = date(2026, 1, 29), date(2026, 3, 3)
+    for bucket in ("day", "week", "month"):
+        ranges = bucket_ranges(first, last, bucket)
+        assert ranges[0][0] == first and ranges[-1][1] == last
+        assert all(hi + timedelta(days=1) == lo for (_, hi), (lo, _) in zip(ranges, ranges[1:]))
+    assert bucket_ranges(first, last, "week")[0] == (date(2026, 1, 29), date(2026, 2, 1))
+    assert bucket_ranges(first, last, "month")[1] == (date(2026, 2, 1), date(2026, 2, 28))
+
+
+def test_query_trends_sums_each_bucket(tmp_path, monkeypatch):
+    monkeypatch.setenv("ROLLUP_DIR", str(tmp_path))
+    rng = random.Random(7)
+    store, expected = random_store(rng)
+    store.save()
+    result = query_trends("ad", "2026-01-10", "2026-03-20", "week", "total,priority.")
+    assert set(result["series"]) <= {"total", "priority.high"}
+    for i, bucket in enumerate(result["buckets"]):
+        lo, hi = date.fromisoformat(bucket["start"]), date.fromisoformat(bucket["end"])
+        for name, values in result["series"].items():
+            assert values[i] == brute_total(expected, name, lo, hi)
+
+
+def test_unreadable_stores_load_empty(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("ROLLUP_DIR", str(tmp_path))
+    store, _ = random_store(random.Random(3))
+    store.save(tmp_path / "ad.u32")
+    raw = (tmp_path / "ad.u32").read_bytes()
+    header = raw[: raw.index(b"\n") + 1]
+    for broken in (b"", raw[:10], header, raw[:-1], b'{"version": 99}\n', b"[]\n", b'{"version": 1}\n'):
+        (tmp_path / "ad.u32").write_bytes(broken)
+        assert RollupStore.load("ad").days == 0
+        assert "[WARN] ignoring unreadable rollup store" in capsys.readouterr().err
+        result = query_trends("ad")
+        assert result["buckets"] == [] and result["series"] == {}
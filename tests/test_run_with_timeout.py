@@ -0,0 +1,139 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import run_with_timeout
+from json_codec import dumps
+from run_with_timeout import (
+    ADAPTIVE_MARGIN,
+    MIN_SAMPLES,
+    STOP_GRACE_SECONDS,
+    TIMEOUT_EXIT,
+    adaptive_timeout,
+    append_history,
+    load_history,
+)
+
+
+SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "run_with_timeout.py"
+
+
+def run_tool(history: Path, *args: str, **kwargs) -> subprocess.CompletedProcess:
+    env = {**os.environ, "RUN_HISTORY_PATH": str(history)}
+    return subprocess.run(
+        [sys.executable, str(SCRIPT), *args], env=env, capture_output=True, text=True, timeout=30, **kwargs
+    )
+
+
+def alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # A zombie is gone for our purposes.
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_runs_are_recorded_per_key(tmp_path):
+    history = tmp_path / "history.jsonl"
+    assert run_tool(history, "--timeout", "10", "--", "true").returncode == 0
+    assert run_tool(history, "--timeout", "10", "--key", "job", "--", "sh", "-c", "exit 3").returncode == 3
+
+    first, second = load_history(history)
+    assert first["key"] == "true" and first["exit"] == 0 and not first["timed_out"]
+    assert second["key"] == "job" and second["exit"] == 3 and second["timeout"] == 10
+    assert {"wall", "user", "sys", "max_rss_kb", "at"} <= first.keys()
+    assert load_history(history, "job") == [second]
+
+    stats = run_tool(history, "--stats").stdout
+    assert "job" in stats and "true" in stats
+
+
+def test_timeout_kills_the_whole_process_group(tmp_path):
+    history = tmp_path / "history.jsonl"
+    pid_file = tmp_path / "pid"
+    # The background sleep ignores SIGTERM, so only the SIGKILL after the grace period stops it.
+    child = f"(trap '' TERM; exec sleep 60) & echo $! > {pid_file}; wait"
+    started = time.monotonic()
+    result = run_tool(history, "--timeout", "1", "--key", "slow", "--", "sh", "-c", child)
+    elapsed = time.monotonic() - started
+
+    assert result.returncode == TIMEOUT_EXIT
+    assert "timed out after 1s" in result.stderr
+    assert 1 + STOP_GRACE_SECONDS - 0.5 <= elapsed < 1 + STOP_GRACE_SECONDS + 5
+    assert not alive(int(pid_file.read_text()))
+    assert load_history(history)[-1]["timed_out"] is True
+
+
+def test_sigterm_is_passed_on_to_the_child_group(tmp_path):
+    history = tmp_path / "history.jsonl"
+    pid_file = tmp_path / "pid"
+    env = {**os.environ, "RUN_HISTORY_PATH": str(history)}
+    proc = subprocess.Popen(
+        [sys.executable, str(SCRIPT), "--timeout", "60", "--", "sh", "-c", f"sleep 60 & echo $! > {pid_file}; wait"],
+        env=env,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    for _ in range(200):
+        if pid_file.exists() and pid_file.read_text().strip():
+            break
+        time.sleep(0.02)
+    proc.send_signal(signal.SIGTERM)
+    assert proc.wait(timeout=10) == 128 + signal.SIGTERM
+    assert "terminated, stopping process group" in proc.stderr.read()
+    assert not alive(int(pid_file.read_text()))
+    assert load_history(history)[-1]["exit"] == 128 + signal.SIGTERM
+
+
+def test_child_killed_by_a_signal_is_reported(tmp_path):
+    history = tmp_path / "history.jsonl"
+    result = run_tool(history, "--timeout", "10", "--", "sh", "-c", "kill -KILL $$")
+    assert "child killed by SIGKILL" in result.stderr
+    assert result.returncode == -signal.SIGKILL & 0xFF
+    assert load_history(history)[-1]["exit"] == -signal.SIGKILL
+
+
+def runs(walls: list[float], exit_code: int = 0, timed_out: bool = False) -> list[dict]:
+    return [{"key": "k", "wall": w, "exit": exit_code, "timed_out": timed_out} for w in walls]
+
+
+def test_adaptive_timeout():
+    assert adaptive_timeout(runs([10.0] * (MIN_SAMPLES - 1)), 600, 60)[0] == 600
+    walls = [10.0] * 20 + [100.0]
+    assert adaptive_timeout(runs(walls), 600, 60)[0] == int(100 * ADAPTIVE_MARGIN)
+    assert adaptive_timeout(runs([10.0] * 20), 600, 60)[0] == 60
+    assert adaptive_timeout(runs([1000.0] * 20), 600, 60)[0] == 600
+    # Failures do not count as samples, and a recent timeout resets to the ceiling.
+    assert adaptive_timeout(runs([10.0] * 20) + runs([500.0], exit_code=1), 600, 60)[0] == 60
+    timeout, reason = adaptive_timeout(runs([10.0] * 20) + runs([600.0], 124, True), 600, 60)
+    assert timeout == 600 and "timed out" in reason
+
+
+def test_adaptive_flag_uses_the_key_history(tmp_path):
+    history = tmp_path / "history.jsonl"
+    for wall in [2.0] * MIN_SAMPLES:
+        append_history(history, {"key": "fast", "wall": wall, "exit": 0, "timed_out": False})
+    result = run_tool(history, "--timeout", "600", "--adaptive", "--min-timeout", "5", "--key", "fast", "--", "true")
+    assert "adaptive timeout for fast: 5s" in result.stderr
+    assert load_history(history, "fast")[-1]["timeout"] == 5
+
+
+def test_history_is_compacted_per_key(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_with_timeout, "MAX_HISTORY_LINES", 30)
+    monkeypatch.setattr(run_with_timeout, "HISTORY_WINDOW", 5)
+    history = tmp_path / "history.jsonl"
+    history.write_text("not json\n" + "".join(dumps({"key": "b", "n": n}) + "\n" for n in range(3)))
+    for n in range(40):
+        append_history(history, {"key": "a", "n": n})
+    kept = load_history(history)
+    assert [(r["key"], r["n"]) for r in kept if r["key"] == "b"] == [("b", 0), ("b", 1), ("b", 2)]
+    assert len(kept) <= 30
+    assert [r["n"] for r in kept if r["key"] == "a"][-1] == 39
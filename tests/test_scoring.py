@@ -0,0 +1,217 @@
+"""The default profiles reproduce the keyword scores generate_digest.py computed before scoring profiles."""
+
+import random
+from pathlib import Path
+
+from json_codec import dumps, read_file
+from scoring import ArticleBatch, get_profile
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+# Keyword sets and scoring of generate_digest.py before scoring_profiles.json.
+AI_MODEL_KEYWORDS = {
+    "model",
+    "llm",
+    "foundation model",
+    "open-weights",
+    "checkpoint",
+    "release",
+    "released",
+    "gpt",
+    "claude",
+    "gemini",
+    "sonnet",
+    "reasoning model",
+}
+
+AI_ARCH_KEYWORDS = {
+    "architecture",
+    "transformer",
+    "moe",
+    "mixture-of-experts",
+    "agent",
+    "multi-agent",
+    "orchestrator",
+    "framework",
+    "sdk",
+    "inference",
+    "benchmark",
+    "pipeline",
+}
+
+AI_BUSINESS_KEYWORDS = {
+    "acquisition",
+    "acquire",
+    "acquired",
+    "merger",
+    "merge",
+    "funding",
+    "raised",
+    "valuation",
+    "ipo",
+    "earnings",
+    "revenue",
+    "partnership",
+    "lawsuit",
+    "antitrust",
+}
+
+RESEARCH_ANALYSIS_KEYWORDS = {
+    "mri",
+    "fmri",
+    "dti",
+    "diffusion",
+    "tensor",
+    "voxel",
+    "connectivity",
+    "functional connectivity",
+    "multimodal",
+    "machine learning",
+    "deep learning",
+    "analysis",
+    "perfusion",
+    "spectroscopy",
+    "resting-state",
+    "graph",
+    "biomarker",
+}
+
+RESEARCH_MECHANISM_KEYWORDS = {
+    "mechanism",
+    "pathophysiology",
+    "neural",
+    "circuit",
+    "network",
+    "disease",
+    "alzheimer",
+    "amyloid",
+    "tau",
+    "autism",
+    "depression",
+    "adhd",
+    "parkinson",
+    "schizophrenia",
+    "cognitive decline",
+}
+
+
+def count_hits(text, keywords):
+    return sum(1 for kw in keywords if kw in text)
+
+
+def article_text(article):
+    return " ".join(str(article.get(k, "")) for k in ("title", "summary", "source", "subcategory", "category")).lower()
+
+
+def priority_from_score(score):
+    if score >= 5:
+        return "high"
+    if score >= 2:
+        return "medium"
+    return "low"
+
+
+def score_ai(article):
+    text = article_text(article)
+    model_hits = count_hits(text, AI_MODEL_KEYWORDS)
+    arch_hits = count_hits(text, AI_ARCH_KEYWORDS)
+    business_hits = count_hits(text, AI_BUSINESS_KEYWORDS)
+    score = model_hits * 3 + arch_hits * 2 - business_hits * 3
+    if model_hits == 0 and arch_hits == 0 and business_hits == 0:
+        score = 1
+    reasons = []
+    if model_hits:
+        reasons.append("mentions new models or releases")
+    if arch_hits:
+        reasons.append("contains architecture/agent/framework signals")
+    if business_hits:
+        reasons.append("business-heavy content (deprioritized)")
+    if not reasons:
+        reasons.append("general AI update")
+    return {
+        "score": score,
+        "priority": priority_from_score(score),
+        "reason": "; ".join(reasons),
+        "model_hits": model_hits,
+        "arch_hits": arch_hits,
+        "business_hits": business_hits,
+    }
+
+
+def score_research(article):
+    text = article_text(article)
+    analysis_hits = count_hits(text, RESEARCH_ANALYSIS_KEYWORDS)
+    mechanism_hits = count_hits(text, RESEARCH_MECHANISM_KEYWORDS)
+    score = analysis_hits * 2 + mechanism_hits * 3
+    if analysis_hits == 0 and mechanism_hits == 0:
+        score = 1
+    reasons = []
+    if mechanism_hits:
+        reasons.append("has disease/neural mechanism relevance")
+    if analysis_hits:
+        reasons.append("has imaging analysis/method relevance")
+    if not reasons:
+        reasons.append("general literature update")
+    return {
+        "score": score,
+        "priority": priority_from_score(score),
+        "reason": "; ".join(reasons),
+        "analysis_hits": analysis_hits,
+        "mechanism_hits": mechanism_hits,
+    }
+
+
+SYNTHETIC = [
+    {"title": "Startup raised funding at a record valuation after acquisition talks"},
+    {"title": "New open-weights LLM release with a mixture-of-experts transformer"},
+    {"title": "Quarterly update", "summary": ""},
+    {"title": "fMRI functional connectivity reveals tau network mechanism in Alzheimer disease"},
+    {},
+]
+
+
+def all_articles():
+    articles = list(SYNTHETIC)
+    for path in sorted(DATA_DIR.glob("*.json")):
+        payload = read_file(path)
+        articles.extend(a for a in payload.get("articles", []) if isinstance(a, dict))
+    return articles
+
+
+def test_ai_default_matches_previous_scores():
+    articles = all_articles()
+    scored = get_profile(kind="ai").score_batch(ArticleBatch(articles))
+    assert scored == [score_ai(a) for a in articles]
+
+
+def test_research_default_matches_previous_scores_without_if():
+    articles = [{k: v for k, v in a.items() if k != "impact_factor"} for a in all_articles()]
+    scored = get_profile(kind="research").score_batch(ArticleBatch(articles))
+    assert scored == [score_research(a) for a in articles]
+
+
+def test_research_default_if_bonus_is_added_on_top():
+    profile = get_profile(kind="research")
+    base = SYNTHETIC[3]
+    articles = [{**base, "impact_factor": value} for value in (None, 4.9, 5, 12.5)]
+    scores = [m["score"] for m in profile.score_batch(ArticleBatch(articles))]
+    previous = score_research(base)["score"]
+    assert scores == [previous, previous, previous + 1, previous + 2]
+
+
+def test_keyword_scan_counts_overlapping_and_nested_keywords(tmp_path):
+    groups = [
+        {"name": "a", "keywords": ["ai", "openai", "open", "pen", "a.i", "release", "released"], "weight": 1},
+        {"name": "b", "keywords": ["released", "sed", "eleas", "agent", "multi-agent", "nt"], "weight": 2},
+    ]
+    path = tmp_path / "profiles.json"
+    path.write_text(dumps({"defaults": {"ai": "t"}, "profiles": {"t": {"kind": "ai", "groups": groups}}}))
+    profile = get_profile(kind="ai", path=path)
+    rng = random.Random(30)
+    pieces = ["openai", "released", "multi-agent", "a.i", "aix", " ", "pen", "agents", "nt", "x"]
+    for _ in range(500):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randrange(8)))
+        expected = [count_hits(text, group["keywords"]) for group in groups]
+        metrics = profile.score_batch(ArticleBatch([{"title": text}]))[0]
+        assert [metrics["a_hits"], metrics["b_hits"]] == expected, text
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+
+from async_server import AsyncDashboard
+from json_codec import loads
+from stream import DataWatcher, StreamHub, format_event
+
+
+def parse_event(payload: bytes) -> tuple[str, object]:
+    event, data = payload.decode("utf-8").rstrip("\n").split("\n")
+    return event.removeprefix("event: "), loads(data.removeprefix("data: "))
+
+
+def test_format_event_frames_one_named_event():
+    payload = format_event("log", {"task": "fetch_ai", "lines": ["a\nb"]})
+    assert payload.endswith(b"\n\n") and payload.count(b"\n") == 3
+    assert parse_event(payload) == ("log", {"task": "fetch_ai", "lines": ["a\nb"]})
+
+
+def test_data_watcher_reports_each_change_once(tmp_path):
+    (tmp_path / "2026-03-01-ai.json").write_text("{}")
+    watcher = DataWatcher(tmp_path)
+    assert watcher.scan() == []
+
+    (tmp_path / "2026-03-01-ai.json").write_text('{"a": 1}')
+    (tmp_path / "2026-03-02-ad.json").write_text("{}")
+    (tmp_path / "notes.json").write_text("{}")
+    (tmp_path / "2026-03-02-ad.json.gz").write_bytes(b"")
+    changes = watcher.scan()
+    assert [(c["date"], c["domain"], c["deleted"]) for c in changes] == [
+        ("2026-03-01", "ai", False),
+        ("2026-03-02", "ad", False),
+    ]
+    assert all(c["version"] for c in changes)
+    assert watcher.scan() == []
+
+    os.remove(tmp_path / "2026-03-02-ad.json")
+    assert watcher.scan() == [{"date": "2026-03-02", "domain": "ad", "version": "", "deleted": True}]
+    assert DataWatcher(tmp_path / "missing").scan() == []
+
+
+def test_hub_fans_out_in_order_and_drops_slow_consumers():
+    hub = StreamHub(queue_size=50)
+    hub.publish("log", {"n": -1})  # no subscribers: nothing to do
+    readers = [hub.subscribe() for _ in range(5)]
+    slow = hub.subscribe()
+    received = [[] for _ in readers]
+
+    def drain(i: int, q: queue.Queue) -> None:
+        while (payload := q.get(timeout=5)) is not None:
+            received[i].append(parse_event(payload)[1])
+
+    threads = [threading.Thread(target=drain, args=(i, q)) for i, q in enumerate(readers)]
+    for thread in threads:
+        thread.start()
+    for n in range(40):
+        hub.publish("log", {"n": n})
+    # The reading clients keep up; `slow` never reads and is dropped once its queue is full.
+    for n in range(40, 80):
+        for q in readers:
+            while q.qsize() > 40:
+                time.sleep(0.001)
+        hub.publish("log", {"n": n})
+    for q in readers:
+        q.put(None)
+    for thread in threads:
+        thread.join()
+
+    assert all(r == [{"n": n} for n in range(80)] for r in received)
+    assert not hub.subscribed(slow) and slow.qsize() == 50
+    assert len(hub) == 5
+    hub.unsubscribe(readers[0])
+    assert len(hub) == 4
+
+
+def test_watch_thread_publishes_data_events(tmp_path):
+    hub = StreamHub()
+    q = hub.subscribe()
+    hub.watch(DataWatcher(tmp_path), interval=0.02)
+    (tmp_path / "2026-03-03-pd.json").write_text("{}")
+    event, data = parse_event(q.get(timeout=5))
+    assert event == "data" and data["domain"] == "pd" and not data["deleted"]
+
+
+def test_async_broadcast_fans_out_and_drops_full_queues():
+    async def scenario():
+        dashboard = AsyncDashboard()
+        fast = asyncio.Queue(maxsize=10)
+        slow = asyncio.Queue(maxsize=2)
+        dashboard.stream_subscribers |= {fast, slow}
+        for n in range(3):
+            dashboard.broadcast("status", {"n": n})
+        assert dashboard.stream_subscribers == {fast}
+        assert [parse_event(fast.get_nowait())[1]["n"] for _ in range(3)] == [0, 1, 2]
+
+    asyncio.run(scenario())
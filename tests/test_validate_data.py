@@ -0,0 +1,200 @@
+"""Compiled domain validators report exactly what validate_data.py reported before they were compiled."""
+
+import copy
+import random
+import re
+from pathlib import Path
+from urllib.parse import urlparse
+
+from json_codec import read_file
+from validate_data import infer_domain_id, validate_payload
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+MUTATED_PER_FILE = 60
+
+# validate_data.py before per-domain schemas were compiled from frontmatter.
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+SPACE_RE = re.compile(r"\s+")
+BASE_REQUIRED_FIELDS = ("title", "summary", "url", "category", "published_date", "date")
+
+
+def is_non_empty_str(value: object) -> bool:
+    return isinstance(value, str) and bool(value.strip())
+
+
+def is_valid_date(value: str) -> bool:
+    return bool(DATE_RE.match(value))
+
+
+def normalize_url(value: str) -> str:
+    parsed = urlparse(value.strip())
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    path = parsed.path.rstrip("/") or "/"
+    query = f"?{parsed.query}" if parsed.query else ""
+    return f"{scheme}://{netloc}{path}{query}"
+
+
+def is_valid_http_url(value: str) -> bool:
+    parsed = urlparse(value.strip())
+    return parsed.scheme in ("http", "https") and bool(parsed.netloc)
+
+
+def normalize_title(value: str) -> str:
+    return SPACE_RE.sub(" ", value.strip().lower())
+
+
+def required_fields_for_domain(domain_id: str) -> tuple[str, ...]:
+    if domain_id == "ai":
+        return BASE_REQUIRED_FIELDS + ("subcategory",)
+    return BASE_REQUIRED_FIELDS + ("source",)
+
+
+def legacy_validate_payload(payload: object, domain_id: str) -> list[str]:
+    errors: list[str] = []
+    domain_id = (domain_id or "").strip().lower()
+    required_fields = required_fields_for_domain(domain_id)
+
+    if not isinstance(payload, dict):
+        return ["top-level JSON must be an object"]
+
+    top_date = payload.get("date", "")
+    if not is_non_empty_str(top_date):
+        errors.append('top-level field "date" must be a non-empty string')
+    elif not is_valid_date(top_date.strip()):
+        errors.append('top-level field "date" must match YYYY-MM-DD')
+
+    articles = payload.get("articles")
+    if not isinstance(articles, list):
+        errors.append('top-level field "articles" must be an array')
+        return errors
+
+    seen_pairs: dict[tuple[str, str], int] = {}
+    seen_urls: dict[str, dict[str, object]] = {}
+
+    for idx, article in enumerate(articles, start=1):
+        if not isinstance(article, dict):
+            errors.append(f"article #{idx}: must be an object")
+            continue
+
+        for field in required_fields:
+            value = article.get(field)
+            if not is_non_empty_str(value):
+                errors.append(f'article #{idx}: field "{field}" must be a non-empty string')
+
+        title = str(article.get("title", "")).strip()
+        url = str(article.get("url", "")).strip()
+        article_date = str(article.get("date", "")).strip()
+        published_date = str(article.get("published_date", "")).strip()
+        category = str(article.get("category", "")).strip()
+
+        if published_date and not is_valid_date(published_date):
+            errors.append(f"article #{idx}: field \"published_date\" must match YYYY-MM-DD")
+        if article_date and not is_valid_date(article_date):
+            errors.append(f"article #{idx}: field \"date\" must match YYYY-MM-DD")
+        if top_date and article_date and article_date != top_date:
+            errors.append(
+                f"article #{idx}: field \"date\" ({article_date}) must equal top-level date ({top_date})"
+            )
+
+        if url and not is_valid_http_url(url):
+            errors.append(f"article #{idx}: field \"url\" must be a valid http/https URL")
+
+        if domain_id == "ai" and category and category != "AI":
+            errors.append(f'article #{idx}: AI category must be "AI" (got "{category}")')
+
+        if title and url:
+            normalized_url = normalize_url(url)
+            normalized_title = normalize_title(title)
+            pair_key = (normalized_url, normalized_title)
+
+            if pair_key in seen_pairs:
+                first_idx = seen_pairs[pair_key]
+                errors.append(
+                    f"article #{idx}: duplicate article key (url+title), first seen at article #{first_idx}"
+                )
+            else:
+                seen_pairs[pair_key] = idx
+
+            prev_for_url = seen_urls.get(normalized_url)
+            if prev_for_url is not None:
+                first_idx = int(prev_for_url["index"])
+                first_title = str(prev_for_url["title"])
+                errors.append(
+                    "article "
+                    f"#{idx}: duplicate URL, first seen at article #{first_idx} ({first_title})"
+                )
+            else:
+                seen_urls[normalized_url] = {"index": idx, "title": title}
+
+    return errors
+
+FIELDS = ("title", "summary", "url", "category", "published_date", "date", "source", "subcategory")
+BAD_VALUES = ("", "   ", None, 7, ["x"], "2026-2-3", "not a url", "ftp://example.org/x", "http://", "AI", "ai")
+
+
+def mutate(payload, rng):
+    """A copy of `payload` with a few random breakages of the kinds the validator reports."""
+    payload = copy.deepcopy(payload)
+    articles = payload["articles"]
+    for _ in range(rng.randint(1, 4)):
+        kind = rng.randrange(9)
+        if not articles or kind == 0:
+            articles.append(rng.choice([{}, "oops", 3, {"title": "only a title"}]))
+            continue
+        article = rng.choice(articles)
+        if not isinstance(article, dict):
+            continue
+        field = rng.choice(FIELDS)
+        if kind == 1:
+            article.pop(field, None)
+        elif kind == 2:
+            article[field] = rng.choice(BAD_VALUES)
+        elif kind == 3:
+            # Same story again, with case, whitespace and trailing-slash noise.
+            twin = dict(article)
+            twin["title"] = "  " + str(article.get("title", "")).upper().replace(" ", "   ") + " "
+            url = str(article.get("url", ""))
+            twin["url"] = url.replace("https://", "HTTPS://", 1).rstrip("/") + rng.choice(["", "/", "//"])
+            articles.insert(rng.randrange(len(articles) + 1), twin)
+        elif kind == 4:
+            article["url"] = str(article.get("url", "")) + rng.choice(["?a=1", "#frag", " ", "/"])
+        elif kind == 5:
+            article["date"] = rng.choice(["2025-01-01", " " + str(payload.get("date", "")), "2026-13-45"])
+        elif kind == 6:
+            payload["date"] = rng.choice(["", "2026/02/23", None, " 2026-02-23 ", "2026-02-24"])
+        elif kind == 7:
+            article["category"] = rng.choice(["AI", "ai", "Neuro", " AI "])
+        else:
+            articles.insert(rng.randrange(len(articles) + 1), dict(article, title="Different title"))
+    if rng.random() < 0.02:
+        payload["articles"] = rng.choice([None, {}, "x"])
+    return payload
+
+
+def archive():
+    for path in sorted(DATA_DIR.glob("????-??-??-*.json")):
+        yield infer_domain_id(path), read_file(path)
+
+
+def test_archive_matches_previous_validator():
+    for domain_id, payload in archive():
+        assert validate_payload(payload, domain_id) == legacy_validate_payload(payload, domain_id)
+
+
+def test_mutated_payloads_match_previous_validator():
+    rng = random.Random(41)
+    reported = 0
+    for domain_id, payload in archive():
+        for _ in range(MUTATED_PER_FILE):
+            mutated = mutate(payload, rng)
+            expected = legacy_validate_payload(mutated, domain_id)
+            assert validate_payload(mutated, domain_id) == expected
+            reported += bool(expected)
+    assert reported > 0
+
+
+def test_non_object_payloads():
+    for payload in (None, [], "x", 3):
+        assert validate_payload(payload, "ad") == legacy_validate_payload(payload, "ad")